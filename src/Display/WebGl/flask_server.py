@@ -1,12 +1,13 @@
 """ A flask webserver. """
 
+import hashlib
 import sys
-import uuid
 
 from OCC.Display.WebGl.threejs_renderer import ThreejsRenderer, OCC_VERSION, \
         THREEJS_RELEASE, color_to_hex, export_edgedata_to_json, spinning_cursor
 from OCC.Extend.TopologyUtils import is_edge, is_wire, discretize_edge, discretize_wire
-from OCC.Core.Tesselator import ShapeTesselator
+from OCC.Extend.TesselatorCache import get_tesselator
+from OCC.Extend.DataExchange import shape_content_hash
 # Import following for building vertex (or point cloud) in WebGL
 from OCC.Core.gp import gp_Pnt
 from OCC.Core.BRep import BRep_Builder
@@ -30,6 +31,9 @@ class RenderWraper(ThreejsRenderer):
         self._default_shape_color = default_shape_color
         self._default_edge_color = default_edge_color
         self._default_vertex_color = default_vertex_color
+        # the json contents of the converted shapes, by shape hash. Kept when
+        # the scene is cleared, so that shapes are not tesselated again
+        self._3js_contents = {}
 
     def ConvertShape(self,
                      shape,
@@ -46,18 +50,22 @@ class RenderWraper(ThreejsRenderer):
         color = color_to_hex(color)
         specular_color = color_to_hex(specular_color)
         if is_edge(shape):
-            print("discretize an edge")
-            pnts = discretize_edge(shape)
-            edge_hash = "edg%s" % uuid.uuid4().hex
-            shape_content = export_edgedata_to_json(edge_hash, pnts)
+            edge_hash = "edg%s" % shape_content_hash(shape, color, line_width)
+            if edge_hash not in self._3js_contents:
+                print("discretize an edge")
+                pnts = discretize_edge(shape)
+                self._3js_contents[edge_hash] = export_edgedata_to_json(edge_hash, pnts)
+            shape_content = self._3js_contents[edge_hash]
             # store this edge hash
             self._3js_edges[edge_hash] = [color, line_width, shape_content]
             return self._3js_shapes, self._3js_edges, self._3js_vertex
         elif is_wire(shape):
-            print("discretize a wire")
-            pnts = discretize_wire(shape)
-            wire_hash = "wir%s" % uuid.uuid4().hex
-            shape_content = export_edgedata_to_json(wire_hash, pnts)
+            wire_hash = "wir%s" % shape_content_hash(shape, color, line_width)
+            if wire_hash not in self._3js_contents:
+                print("discretize a wire")
+                pnts = discretize_wire(shape)
+                self._3js_contents[wire_hash] = export_edgedata_to_json(wire_hash, pnts)
+            shape_content = self._3js_contents[wire_hash]
             # store this edge hash
             self._3js_edges[wire_hash] = [color, line_width, shape_content]
             return self._3js_shapes, self._3js_edges, self._3js_vertex
@@ -73,47 +81,44 @@ class RenderWraper(ThreejsRenderer):
                 vertext_to_add = BRepBuilderAPI_MakeVertex(vertex).Shape()
                 BB.Add(compound, vertext_to_add)
                 vertices_list.append([vertex.X(), vertex.Y(), vertex.Z()])
-            points_hash = "pnt%s" % uuid.uuid4().hex
+            points_hash = "pnt%s" % hashlib.sha1(repr((vertices_list, color, point_size)).encode("utf-8")).hexdigest()
             # store this vertex hash. Note: TopoDS_Compound did not save now
             self._3js_vertex[points_hash] = [color, point_size, vertices_list]
             return self._3js_shapes, self._3js_edges, self._3js_vertex
 
-        # convert as TopoDS_Shape
-        shape_uuid = uuid.uuid4().hex
+        # convert as TopoDS_Shape, the hash is computed from the shape content
+        shape_uuid = shape_content_hash(shape, export_edges, mesh_quality, color, specular_color,
+                                        shininess, transparency, line_color, line_width)
         shape_hash = "shp%s" % shape_uuid
-        # tesselate
-        tess = ShapeTesselator(shape)
-        tess.Compute(compute_edges=export_edges,
-                     mesh_quality=mesh_quality,
-                     parallel=True)
-        # update spinning cursor
-        sys.stdout.write("\r%s mesh shape %s, %i triangles     " % (next(self.spinning_cursor),
-                                                                    shape_hash,
-                                                                    tess.ObjGetTriangleCount()))
-        sys.stdout.flush()
-        # export to 3JS
-        # generate the mesh
-        shape_content = tess.ExportShapeToThreejsJSONString(shape_uuid)
+        if shape_hash not in self._3js_contents:
+            # tesselate
+            tess = get_tesselator(shape,
+                                  compute_edges=export_edges,
+                                  mesh_quality=mesh_quality,
+                                  parallel=True)
+            # update spinning cursor
+            sys.stdout.write("\r%s mesh shape %s, %i triangles     " % (next(self.spinning_cursor),
+                                                                        shape_hash,
+                                                                        tess.ObjGetTriangleCount()))
+            sys.stdout.flush()
+            # export to 3JS
+            # generate the mesh
+            shape_content = tess.ExportShapeToThreejsJSONString(shape_uuid)
+            # export each edge to a single json
+            edge_contents = []
+            if export_edges:
+                for i, edge_point_set in enumerate(tess.GetEdgesPolylines()):
+                    edge_hash = "edg%s_%i" % (shape_uuid, i)
+                    edge_contents.append((edge_hash, export_edgedata_to_json(edge_hash, edge_point_set)))
+            self._3js_contents[shape_hash] = (shape_content, edge_contents)
+        shape_content, edge_contents = self._3js_contents[shape_hash]
         # add this shape to the shape dict, sotres everything related to it
         self._3js_shapes[shape_hash] = [export_edges, color, specular_color, shininess, transparency,
                                         line_color, line_width, shape_content]
         # draw edges if necessary
-        if export_edges:
-            # export each edge to a single json
-            # get number of edges
-            nbr_edges = tess.ObjGetEdgeCount()
-            for i_edge in range(nbr_edges):
-                # after that, the file can be appended
-                edge_content = ''
-                edge_point_set = []
-                nbr_vertices = tess.ObjEdgeGetVertexCount(i_edge)
-                for i_vert in range(nbr_vertices):
-                    edge_point_set.append(tess.GetEdgeVertex(i_edge, i_vert))
-                # write to file
-                edge_hash = "edg%s" % uuid.uuid4().hex
-                edge_content += export_edgedata_to_json(edge_hash, edge_point_set)
-                # store this edge hash, with black color
-                self._3js_edges[edge_hash] = [color_to_hex((0, 0, 0)), line_width, edge_content]
+        for edge_hash, edge_content in edge_contents:
+            # store this edge hash, with black color
+            self._3js_edges[edge_hash] = [color_to_hex((0, 0, 0)), line_width, edge_content]
         return self._3js_shapes, self._3js_edges, self._3js_vertex
 
 
@@ -44,15 +44,17 @@ $ conda install -c conda-forge pythreejs"""
 from OCC.Core.Bnd import Bnd_Box
 from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeSphere
 from OCC.Core.BRepBndLib import brepbndlib_Add
-from OCC.Core.gp import gp_Pnt, gp_Dir
+from OCC.Core.gp import gp_Pnt, gp_Dir, gp_Trsf
+from OCC.Core.TopLoc import TopLoc_Location
 from OCC.Core.TopoDS import TopoDS_Compound
 from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_MakeVertex
 from OCC.Core.BRep import BRep_Builder
-from OCC.Core.Tesselator import ShapeTesselator
+from OCC.Extend.TesselatorCache import get_tesselator
+from OCC.Extend.TesselatorLOD import TesselatorLOD
 
 from OCC.Extend.TopologyUtils import (TopologyExplorer, is_edge, is_wire, discretize_edge,
                                       discretize_wire, get_type_as_string)
-from OCC.Extend.ShapeFactory import (get_oriented_boundingbox,
+from OCC.Extend.ShapeFactory import (trsf_to_matrix, get_oriented_boundingbox,
                                      get_aligned_boundingbox,
                                      measure_shape_mass_center_of_gravity,
                                      recognize_face)
@@ -65,14 +67,6 @@ def _add(vec1, vec2):
     return list(v1 + v2 for v1, v2 in zip(vec1, vec2))
 
 
-def _explode(edge_list):
-    return [[edge_list[i], edge_list[i + 1]] for i in range(len(edge_list) - 1)]
-
-
-def _flatten(nested_dict):
-    return [y for x in nested_dict for y in x]
-
-
 def format_color(r, g, b):
     return '#%02x%02x%02x' % (r, g, b)
 
@@ -359,6 +353,15 @@ class JupyterRenderer:
         # each element is a key 'mesh_id:shape'
         self._shapes = {}
 
+        # the tesselators of the meshes displayed with topo_level="Face", used to
+        # map a picked triangle to its face. Each element is a key 'mesh_id:tesselator'
+        self._face_tables = {}
+
+        # the shapes displayed with several levels of detail. Each element is a key
+        # 'mesh_id:[TesselatorLOD, mesh, edge lines, {level: (geometry, edge geometry)},
+        # displayed level]', edge lines being None if the edges are not rendered
+        self._lods = {}
+
         # we save the renderer so that is can be accessed
         self._renderer = None
 
@@ -373,6 +376,8 @@ class JupyterRenderer:
 
         self._current_shape_selection = None
         self._current_mesh_selection = None
+        self._current_face_selection = None  # the index of the picked face in the face table
+        self._face_highlight = None  # the mesh displaying the picked face
         self._savestate = None
 
         self._selection_color = format_color(232, 176, 36)
@@ -416,6 +421,8 @@ class JupyterRenderer:
         # remove shape fro mthe mapping dict
         cur_id = self.clicked_obj.name
         del self._shapes[cur_id]
+        self._face_tables.pop(cur_id, None)
+        self._lods.pop(cur_id, None)
         self._remove_shp_button.disabled = True
 
     def on_compute_change(self, change):
@@ -479,10 +486,16 @@ class JupyterRenderer:
         """
         obj = value.owner.object
         self.clicked_obj = obj
-        if self._current_mesh_selection != obj:
+        # for meshes displayed with topo_level="Face", the picked triangle gives the face
+        picked_face = None
+        if obj is not None and obj.name in self._face_tables and value.owner.faceIndex is not None:
+            picked_face = self._face_tables[obj.name].ObjGetTriangleFaceIndex(value.owner.faceIndex)
+        if self._current_mesh_selection != obj or self._current_face_selection != picked_face:
             if self._current_mesh_selection is not None:
-                self._current_mesh_selection.material.color = self._current_selection_material_color
-                self._current_mesh_selection.material.transparent = False
+                if self._current_selection_material_color is not None:
+                    self._current_mesh_selection.material.color = self._current_selection_material_color
+                    self._current_mesh_selection.material.transparent = False
+                self._remove_face_highlight()
                 self._current_mesh_selection = None
                 self._current_selection_material_color = None
                 self._shp_properties_button.value = "Compute"
@@ -496,13 +509,20 @@ class JupyterRenderer:
                 self._remove_shp_button.disabled = False
                 id_clicked = obj.name  # the mesh id clicked
                 self._current_mesh_selection = obj
-                self._current_selection_material_color = obj.material.color
-                obj.material.color = self._selection_color
-                # selected part becomes transparent
-                obj.material.transparent = True
-                obj.material.opacity = 0.5
-                # get the shape from this mesh id
-                selected_shape = self._shapes[id_clicked]
+                if picked_face is None:
+                    self._current_selection_material_color = obj.material.color
+                    obj.material.color = self._selection_color
+                    # selected part becomes transparent
+                    obj.material.transparent = True
+                    obj.material.opacity = 0.5
+                    # get the shape from this mesh id
+                    selected_shape = self._shapes[id_clicked]
+                else:
+                    # only the picked face is highlighted
+                    tess = self._face_tables[id_clicked]
+                    self._add_face_highlight(tess, picked_face)
+                    self._current_face_selection = picked_face
+                    selected_shape = tess.ObjGetFace(picked_face)
                 html_value = "<b>Shape type:</b> %s<br>" % get_type_as_string(selected_shape)
                 html_value += "<b>Shape id:</b> %s<br>" % id_clicked
                 self.html.value = html_value
@@ -513,6 +533,26 @@ class JupyterRenderer:
             for callback in self._select_callbacks:
                 callback(self._current_shape_selection)
 
+    def _add_face_highlight(self, tess, face_index):
+        """ displays the face face_index of the tesselator with the selection color.
+        Only the vertices and triangles of this face are sent to the client.
+        """
+        first_triangle, nbr_triangles, first_vertex, nbr_vertices, _ = tess.GetFaceRangesAsArray()[face_index]
+        np_vertices = tess.GetIndexedVerticesPositionAsArray()[first_vertex:first_vertex + nbr_vertices]
+        np_faces = tess.GetTriangleIndicesAsArray()[first_triangle:first_triangle + nbr_triangles]
+        np_faces = (np_faces - np.uint32(first_vertex)).reshape(-1)
+        face_geometry = BufferGeometry(attributes={'position': BufferAttribute(np_vertices),
+                                                   'index': BufferAttribute(np_faces)})
+        self._face_highlight = Mesh(geometry=face_geometry,
+                                    material=self._material(self._selection_color))
+        self._displayed_non_pickable_objects.add(self._face_highlight)
+
+    def _remove_face_highlight(self):
+        if self._face_highlight is not None:
+            self._displayed_non_pickable_objects.remove(self._face_highlight)
+            self._face_highlight = None
+        self._current_face_selection = None
+
     def register_select_callback(self, callback):
         """ Adds a callback that will be called each time a shape is selected
         """
@@ -560,7 +600,8 @@ class JupyterRenderer:
                      opacity=1.,
                      topo_level='default',
                      update=False,
-                     selectable=True):
+                     selectable=True,
+                     lod_levels=1):
         """ Displays a topods_shape in the renderer instance.
         shp: the TopoDS_Shape to render
         shape_color: the shape color, in html corm, eg '#abe000'
@@ -576,9 +617,14 @@ class JupyterRenderer:
         transparency: optional, False by default (opaque).
         opacity: optional, float, by default to 1 (opaque). if transparency is set to True,
                  0. is fully opaque, 1. is fully transparent.
-        topo_level: "default" by default. The value should be either "compound", "shape", "vertex".
+        topo_level: "default" by default. The value should be either "Compound", "Compsolid",
+                    "Solid", "Shell" or "Face". With "Face", the shape is displayed as one mesh,
+                    the picked triangle being mapped to its face.
         update: optional, False by default. If True, render all the shapes.
         selectable: if True, can be doubleclicked from the 3d window
+        lod_levels: optional, 1 by default. If greater than 1, the shape is tesselated
+                    at lod_levels levels of detail. The coarsest level is displayed first,
+                    finer levels are computed and displayed when the shape gets bigger on screen.
         """
         if edge_color is None:
             edge_color = self._default_edge_color
@@ -596,9 +642,14 @@ class JupyterRenderer:
         elif is_wire(shp) or is_edge(shp):
             result = self.AddCurveToScene(shp, edge_color, edge_deflection)
             output.append(result)
+        elif topo_level == "Face":
+            result = self.AddShapeToScene(shp, shape_color, render_edges,
+                                          edge_color, vertex_color, quality,
+                                          transparency, opacity, face_picking=True)
+            output.append(result)
         elif topo_level != "default":
             t = TopologyExplorer(shp)
-            map_type_and_methods = {"Solid": t.solids, "Face": t.faces, "Shell": t.shells,
+            map_type_and_methods = {"Solid": t.solids, "Shell": t.shells,
                                     "Compound": t.compounds, "Compsolid": t.comp_solids}
             for subshape in map_type_and_methods[topo_level]():
                 result = self.AddShapeToScene(subshape, shape_color, render_edges, edge_color,
@@ -607,7 +658,7 @@ class JupyterRenderer:
         else:
             result = self.AddShapeToScene(shp, shape_color, render_edges,
                                           edge_color, vertex_color, quality,
-                                          transparency, opacity)
+                                          transparency, opacity, lod_levels=lod_levels)
             output.append(result)
 
         if selectable:# Add geometries to pickable or non pickable objects
@@ -680,37 +731,119 @@ class JupyterRenderer:
                         vertex_color=None,
                         quality=1.0,
                         transparency=False,
-                        opacity=1.):
+                        opacity=1.,
+                        face_picking=False,
+                        lod_levels=1):
         # first, compute the tesselation
-        tess = ShapeTesselator(shp)
-        tess.Compute(compute_edges=render_edges,
-                     mesh_quality=quality,
-                     parallel=True)
-        # get vertices and normals
-        vertices_position = tess.GetVerticesPositionAsTuple()
+        lod = None
+        if lod_levels > 1:
+            # only the coarsest level is computed now
+            lod = TesselatorLOD(shp, lod_levels,
+                                mesh_quality=quality,
+                                compute_edges=render_edges,
+                                parallel=True)
+            tess = lod.get_level(0)
+        else:
+            tess = get_tesselator(shp,
+                                  compute_edges=render_edges,
+                                  mesh_quality=quality,
+                                  parallel=True)
+        shape_geometry = self._buffer_geometry(tess)
 
-        number_of_triangles = tess.ObjGetTriangleCount()
-        number_of_vertices = len(vertices_position)
+        # then a default material
+        shp_material = self._material(shape_color, transparent=transparency, opacity=opacity)
 
-        # number of vertices should be a multiple of 3
-        if number_of_vertices % 3 != 0:
-            raise AssertionError("Wrong number of vertices")
-        if number_of_triangles * 9 != number_of_vertices:
-            raise AssertionError("Wrong number of triangles")
+        # and to the dict of shapes, to have a mapping between meshes and shapes
+        mesh_id = "%s" % uuid.uuid4().hex
+        self._shapes[mesh_id] = shp
+        if face_picking:
+            self._face_tables[mesh_id] = tess
+
+        # finally create the mesh
+        shape_mesh = Mesh(geometry=shape_geometry,
+                          material=shp_material,
+                          name=mesh_id)
+
+        # edge rendering, if set to True
+        edge_lines = None
+        lines = None
+        if render_edges:
+            lines = self._edges_geometry(tess)
+            mat = LineMaterial(linewidth=1, color=edge_color)
+            edge_lines = LineSegments2(lines, mat)
+            self._displayed_non_pickable_objects.add(edge_lines)
+
+        if lod is not None:
+            # the edges are switched with the mesh, so that they match its level
+            self._lods[mesh_id] = [lod, shape_mesh, edge_lines, {0: (shape_geometry, lines)}, 0]
+
+        return shape_mesh
+
+    def DisplayInstances(self,
+                         shp,
+                         locations,
+                         shape_color=None,
+                         quality=1.0,
+                         transparency=False,
+                         opacity=1.,
+                         update=False,
+                         selectable=True):
+        """ Displays the same shape at several locations. The shape is tesselated
+        once, and all the meshes share the same BufferGeometry, each one being
+        positioned by its own matrix.
+        shp: the TopoDS_Shape to render
+        locations: a list of gp_Trsf or TopLoc_Location, one for each instance
+        other parameters: see DisplayShape
+        """
+        if not locations:
+            raise AssertionError("At least one location must be provided.")
+        if shape_color is None:
+            shape_color = self._default_shape_color
+        tess = get_tesselator(shp, compute_edges=False, mesh_quality=quality, parallel=True)
+        shape_geometry = self._buffer_geometry(tess)
+        shp_material = self._material(shape_color, transparent=transparency, opacity=opacity)
+        for location in locations:
+            if isinstance(location, gp_Trsf):
+                location = TopLoc_Location(location)
+            # the located shape is stored, for picking and bounding box computation
+            mesh_id = "%s" % uuid.uuid4().hex
+            self._shapes[mesh_id] = shp.Moved(location)
+            # three.js matrices are column major
+            instance_mesh = Mesh(geometry=shape_geometry,
+                                 material=shp_material,
+                                 name=mesh_id,
+                                 matrix=trsf_to_matrix(location, column_major=True),
+                                 matrixAutoUpdate=False)
+            if selectable:
+                self._displayed_pickable_objects.add(instance_mesh)
+            else:
+                self._displayed_non_pickable_objects.add(instance_mesh)
 
-        # then we build the vertex and faces collections as numpy ndarrays
-        np_vertices = np.array(vertices_position, dtype='float32').reshape(int(number_of_vertices / 3), 3)
-        # Note: np_faces is just [0, 1, 2, 3, 4, 5, ...], thus arange is used
-        np_faces = np.arange(np_vertices.shape[0], dtype='uint32')
+        if update:
+            self.Display()
+
+    def _buffer_geometry(self, tess):
+        """ returns a BufferGeometry built from the indexed mesh of a computed tesselator
+        """
+        # get the indexed mesh as numpy ndarrays viewing the tesselator buffers (no copy)
+        # each triangulation node is sent once, triangles refer to nodes through np_faces
+        np_vertices = tess.GetIndexedVerticesPositionAsArray()
+        np_faces = tess.GetTriangleIndicesAsArray()
+
+        number_of_triangles = tess.ObjGetTriangleCount()
+        if number_of_triangles != np_faces.shape[0]:
+            raise AssertionError("Wrong number of triangles")
+        # pythreejs expects a flat index buffer
+        np_faces = np_faces.reshape(-1)
 
         # set geometry properties
         buffer_geometry_properties = {'position': BufferAttribute(np_vertices),
                                       'index': BufferAttribute(np_faces)}
         if self._compute_normals_mode == NORMAL.SERVER_SIDE:
-            # get the normal list, converts to a numpy ndarray. This should not raise
+            # get the normals as a numpy ndarray. This should not raise
             # any issue, since normals have been computed by the server, and are available
-            # as a list of floats
-            np_normals = np.array(tess.GetNormalsAsTuple(), dtype='float32').reshape(-1, 3)
+            # as a float32 buffer
+            np_normals = tess.GetIndexedNormalsAsArray()
             # quick check
             if np_normals.shape != np_vertices.shape:
                 raise AssertionError("Wrong number of normals/shapes")
@@ -723,28 +856,48 @@ class JupyterRenderer:
         if self._compute_normals_mode == NORMAL.CLIENT_SIDE:
             shape_geometry.exec_three_obj_method('computeVertexNormals')
 
-        # then a default material
-        shp_material = self._material(shape_color, transparent=transparency, opacity=opacity)
-
-        # and to the dict of shapes, to have a mapping between meshes and shapes
-        mesh_id = "%s" % uuid.uuid4().hex
-        self._shapes[mesh_id] = shp
-
-        # finally create the mesh
-        shape_mesh = Mesh(geometry=shape_geometry,
-                          material=shp_material,
-                          name=mesh_id)
+        return shape_geometry
 
-        # edge rendering, if set to True
-        if render_edges:
-            edges = list(map(lambda i_edge: [tess.GetEdgeVertex(i_edge, i_vert) for i_vert in range(tess.ObjEdgeGetVertexCount(i_edge))], range(tess.ObjGetEdgeCount())))
-            edge_list = _flatten(list(map(_explode, edges)))
-            lines = LineSegmentsGeometry(positions=edge_list)
-            mat = LineMaterial(linewidth=1, color=edge_color)
-            edge_lines = LineSegments2(lines, mat)
-            self._displayed_non_pickable_objects.add(edge_lines)
+    def _edges_geometry(self, tess):
+        """ returns a LineSegmentsGeometry built from the edges of a computed tesselator
+        """
+        # the line segments of all the edges, as a (n, 2, 3) float32 array
+        return LineSegmentsGeometry(positions=tess.GetEdgesSegmentsAsArray())
 
-        return shape_mesh
+    def _screen_fraction(self, center, radius):
+        """ returns an approximation of the fraction of the view height
+        covered by a sphere
+        """
+        camera = self._camera
+        if camera.mode == 'orthographic':
+            # the orthographic frustum is the perspective one at mid depth
+            depth = (camera.near + camera.far) / 2.
+        else:
+            depth = max(_distance(camera.position, center), 1e-9)
+        view_height = 2. * depth * math.tan(math.radians(camera.fov) / 2.) / camera.zoom
+        return 2. * radius / view_height
+
+    def _update_lods(self, change=None):
+        """ displays the level of detail matching the size on screen of
+        each shape displayed with several levels. Levels are computed the
+        first time they are displayed.
+        """
+        if self._camera is None:
+            return
+        for lod_entry in self._lods.values():
+            lod, mesh, edge_lines, geometries, displayed_level = lod_entry
+            center, radius = lod.bounding_sphere()
+            level = lod.select_level(self._screen_fraction(center, radius))
+            if level == displayed_level:
+                continue
+            if level not in geometries:
+                tess = lod.get_level(level)
+                lines = self._edges_geometry(tess) if edge_lines is not None else None
+                geometries[level] = (self._buffer_geometry(tess), lines)
+            mesh.geometry, lines = geometries[level]
+            if edge_lines is not None:
+                edge_lines.geometry = lines
+            lod_entry[4] = level
 
     def _scale(self, vec):
         r = self._bb._max_dist_from_center() * self._camera_distance_factor
@@ -769,6 +922,10 @@ class JupyterRenderer:
 
     def EraseAll(self):
         self._shapes = {}
+        self._face_tables = {}
+        self._lods = {}
+        self._face_highlight = None
+        self._current_face_selection = None
         self._displayed_pickable_objects = Group()
         self._current_shape_selection = None
         self._current_mesh_selection = None
@@ -798,6 +955,8 @@ class JupyterRenderer:
         self._camera.position = camera_position
         if rotation is not None:
             self._camera.rotation = rotation
+        # switch levels of detail when the view changes
+        self._camera.observe(self._update_lods, names=["position", "zoom"])
         # Set up lights in every of the 8 corners of the global bounding box
         positions = list(itertools.product(*[(-orbit_radius, orbit_radius)] * 3))
         key_lights = [DirectionalLight(color='white',
@@ -852,6 +1011,8 @@ class JupyterRenderer:
         # then display both 3d widgets and webui
         display(HBox([VBox([HBox(self._controls), self._renderer]),
                       self.html]))
+        # the coarsest levels are displayed, stream the finer ones
+        self._update_lods()
 
 
     def ExportToHTML(self, filename):
@@ -15,17 +15,22 @@
 ##You should have received a copy of the GNU Lesser General Public License
 ##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
 
+from concurrent.futures import ThreadPoolExecutor
 import os
 import sys
 import tempfile
-import uuid
+import threading
 import json
 
 from OCC.Core.gp import gp_Vec
-from OCC.Core.Tesselator import ShapeTesselator
+from OCC.Extend.TesselatorCache import get_tesselator
+from OCC.Extend.TesselatorLOD import TesselatorLOD
 from OCC import VERSION as OCC_VERSION
 
-from OCC.Extend.TopologyUtils import is_edge, is_wire, discretize_edge, discretize_wire
+from OCC.Extend.TopologyUtils import (is_edge, is_wire, discretize_edge, discretize_wire,
+                                      group_shapes_sharing_subshapes)
+from OCC.Extend.ShapeFactory import trsf_to_matrix
+from OCC.Extend.DataExchange import shape_content_hash
 from OCC.Display.WebGl.simple_server import start_server
 
 THREEJS_RELEASE = "r113"
@@ -146,6 +151,10 @@ BODY_PART0 = """
 
 """ % (THREEJS_RELEASE, THREEJS_RELEASE, THREEJS_RELEASE, THREEJS_RELEASE)
 
+# only included when the shapes are exported to binary glTF
+GLTF_LOADER_SCRIPT = """    <script src="https://rawcdn.githack.com/mrdoob/three.js/%s/examples/js/loaders/GLTFLoader.js"></script>
+""" % THREEJS_RELEASE
+
 BODY_PART1 = """
 
     @VertexShaderDefinition@
@@ -397,15 +406,25 @@ class HTMLBody_Part1:
 
 
 class ThreejsRenderer:
-    def __init__(self, path=None):
+    def __init__(self, path=None, mesh_format="json"):
+        """ path: optional, the directory where files are written. A temp dir by default.
+        mesh_format: optional, "json" by default. Can either be "glb", in that case
+        shapes are exported to binary glTF files, loaded by the three.js GLTFLoader.
+        """
         if not path:
             self._path = tempfile.mkdtemp()
         else:
             self._path = path
+        if mesh_format not in ["json", "glb"]:
+            raise AssertionError("mesh_format must be either json or glb")
+        self._mesh_format = mesh_format
         self._html_filename = os.path.join(self._path, "index.html")
         self._3js_shapes = {}
         self._3js_edges = {}
+        self._3js_instances = {}
+        self._3js_lods = {}
         self.spinning_cursor = spinning_cursor()
+        self._cursor_lock = threading.Lock()
         print("## threejs %s webgl renderer" % THREEJS_RELEASE)
 
     def DisplayShape(self,
@@ -417,74 +436,229 @@ class ThreejsRenderer:
                      transparency=0.,
                      line_color=(0, 0., 0.),
                      line_width=1.,
-                     mesh_quality=1.):
+                     mesh_quality=1.,
+                     lod_levels=1):
+        """ lod_levels: optional, 1 by default. If greater than 1, the shape is exported
+        at lod_levels levels of detail, the browser switching from one to another
+        depending on the size of the shape on screen. Finer levels are loaded after
+        the coarsest one is displayed.
+        """
         # if the shape is an edge or a wire, use the related functions
         if is_edge(shape):
-            print("discretize an edge")
-            pnts = discretize_edge(shape)
-            edge_hash = "edg%s" % uuid.uuid4().hex
-            str_to_write = export_edgedata_to_json(edge_hash, pnts)
+            edge_hash = "edg%s" % shape_content_hash(shape, color, line_width)
             edge_full_path = os.path.join(self._path, edge_hash + '.json')
-            with open(edge_full_path, "w") as edge_file:
-                edge_file.write(str_to_write)
+            if not os.path.isfile(edge_full_path):
+                print("discretize an edge")
+                pnts = discretize_edge(shape)
+                str_to_write = export_edgedata_to_json(edge_hash, pnts)
+                with open(edge_full_path, "w") as edge_file:
+                    edge_file.write(str_to_write)
             # store this edge hash
             self._3js_edges[edge_hash] = [color, line_width]
             return self._3js_shapes, self._3js_edges
         elif is_wire(shape):
-            print("discretize a wire")
-            pnts = discretize_wire(shape)
-            wire_hash = "wir%s" % uuid.uuid4().hex
-            str_to_write = export_edgedata_to_json(wire_hash, pnts)
+            wire_hash = "wir%s" % shape_content_hash(shape, color, line_width)
             wire_full_path = os.path.join(self._path, wire_hash + '.json')
-            with open(wire_full_path, "w") as wire_file:
-                wire_file.write(str_to_write)
+            if not os.path.isfile(wire_full_path):
+                print("discretize a wire")
+                pnts = discretize_wire(shape)
+                str_to_write = export_edgedata_to_json(wire_hash, pnts)
+                with open(wire_full_path, "w") as wire_file:
+                    wire_file.write(str_to_write)
             # store this edge hash
             self._3js_edges[wire_hash] = [color, line_width]
             return self._3js_shapes, self._3js_edges
-        shape_uuid = uuid.uuid4().hex
+        display_properties = [export_edges, color, specular_color, shininess, transparency, line_color, line_width]
+        shape_uuid = self._shape_uuid(shape, mesh_quality, lod_levels, display_properties)
+        self._export_shape_mesh(shape, shape_uuid, export_edges, mesh_quality, lod_levels)
+        self._add_shape(shape_uuid, display_properties)
+        return self._3js_shapes, self._3js_edges
+
+    def DisplayShapes(self,
+                      shapes,
+                      export_edges=False,
+                      color=(0.65, 0.65, 0.7),
+                      specular_color=(0.2, 0.2, 0.2),
+                      shininess=0.9,
+                      transparency=0.,
+                      line_color=(0, 0., 0.),
+                      line_width=1.,
+                      mesh_quality=1.,
+                      lod_levels=1,
+                      max_workers=None):
+        """ Adds a list of shapes, displayed with the same properties (see DisplayShape).
+        The shapes are tesselated and their files written by a pool of threads, the
+        tesselator releasing the GIL. Shapes sharing faces or edges are processed by the
+        same thread, and shapes with the same content are exported once.
+        max_workers: optional, the number of threads, see ThreadPoolExecutor.
+        The html file is generated once for all shapes, by render().
+        """
+        display_properties = [export_edges, color, specular_color, shininess, transparency, line_color, line_width]
+        shape_uuids = []
+        unique_shapes = {}  # the shape to tesselate, by uuid: each file is written once
+        for shape in shapes:
+            if is_edge(shape) or is_wire(shape):
+                self.DisplayShape(shape, color=color, line_width=line_width)
+            else:
+                shape_uuid = self._shape_uuid(shape, mesh_quality, lod_levels, display_properties)
+                unique_shapes.setdefault(shape_uuid, shape)
+                shape_uuids.append(shape_uuid)
+        jobs = [(shape, shape_uuid) for shape_uuid, shape in unique_shapes.items()]
+        groups = group_shapes_sharing_subshapes([shape for shape, _ in jobs])
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._export_shape_group,
+                                       [jobs[index] for index in group],
+                                       export_edges, mesh_quality, lod_levels)
+                       for group in groups]
+            # raises the exception of the first failed group, if any
+            for future in futures:
+                future.result()
+        # shapes are added in the order of the list
+        for shape_uuid in shape_uuids:
+            self._add_shape(shape_uuid, display_properties)
+        return self._3js_shapes, self._3js_edges
+
+    def DisplayInstances(self,
+                         shape,
+                         locations,
+                         color=(0.65, 0.65, 0.7),
+                         specular_color=(0.2, 0.2, 0.2),
+                         shininess=0.9,
+                         transparency=0.,
+                         mesh_quality=1.):
+        """ Displays the same shape at several locations. The shape is tesselated
+        and exported only once, the browser draws all the instances with a single
+        THREE.InstancedMesh.
+        locations: a list of gp_Trsf or TopLoc_Location, one for each instance
+        """
+        if not locations:
+            raise AssertionError("At least one location must be provided.")
+        matrices = [trsf_to_matrix(location) for location in locations]
+        shape_uuid = shape_content_hash(shape, mesh_quality, self._mesh_format,
+                                        color, specular_color, shininess, transparency, matrices)
         shape_hash = "shp%s" % shape_uuid
-        # tesselate
-        tess = ShapeTesselator(shape)
-        tess.Compute(compute_edges=export_edges,
-                     mesh_quality=mesh_quality,
-                     parallel=True)
-        # update spinning cursor
-        sys.stdout.write("\r%s mesh shape %s, %i triangles     " % (next(self.spinning_cursor),
-                                                                    shape_hash,
-                                                                    tess.ObjGetTriangleCount()))
-        sys.stdout.flush()
-        # export to 3JS
-        shape_full_path = os.path.join(self._path, shape_hash + '.json')
+        self._export_shape_mesh(shape, shape_uuid, False, mesh_quality)
+        self._3js_shapes[shape_hash] = [False, color, specular_color, shininess, transparency, (0, 0., 0.), 1.]
+        self._3js_instances[shape_hash] = matrices
+        return self._3js_shapes, self._3js_edges
+
+    def _shape_uuid(self, shape, mesh_quality, lod_levels, display_properties):
+        """ the files are named after the shape content and the parameters """
+        return shape_content_hash(shape, mesh_quality, lod_levels, self._mesh_format, *display_properties)
+
+    def _add_shape(self, shape_uuid, display_properties):
+        export_edges, line_width = display_properties[0], display_properties[-1]
         # add this shape to the shape dict, sotres everything related to it
-        self._3js_shapes[shape_hash] = [export_edges, color, specular_color, shininess, transparency, line_color, line_width]
-        # generate the mesh
-        #tess.ExportShapeToThreejs(shape_hash, shape_full_path)
-        # and also to JSON
-        with open(shape_full_path, 'w') as json_file:
-            json_file.write(tess.ExportShapeToThreejsJSONString(shape_uuid))
-        # draw edges if necessary
+        self._3js_shapes["shp%s" % shape_uuid] = display_properties
+        # draw edges if necessary, each edge is in a single json file
         if export_edges:
-            # export each edge to a single json
-            # get number of edges
-            nbr_edges = tess.ObjGetEdgeCount()
-            for i_edge in range(nbr_edges):
-                # after that, the file can be appended
-                str_to_write = ''
-                edge_point_set = []
-                nbr_vertices = tess.ObjEdgeGetVertexCount(i_edge)
-                for i_vert in range(nbr_vertices):
-                    edge_point_set.append(tess.GetEdgeVertex(i_edge, i_vert))
-                # write to file
-                edge_hash = "edg%s" % uuid.uuid4().hex
-                str_to_write += export_edgedata_to_json(edge_hash, edge_point_set)
-                # create the file
-                edge_full_path = os.path.join(self._path, edge_hash + '.json')
-                with open(edge_full_path, "w") as edge_file:
-                    edge_file.write(str_to_write)
+            for edge_hash in self._edge_hashes(shape_uuid):
                 # store this edge hash, with black color
                 self._3js_edges[edge_hash] = [(0, 0, 0), line_width]
-        return self._3js_shapes, self._3js_edges
 
+    def _mesh_full_path(self, file_hash):
+        return os.path.join(self._path, file_hash + '.' + self._mesh_format)
+
+    def _edge_hashes(self, shape_uuid):
+        """ returns the hashes of the edge files written for this shape """
+        edge_hashes = []
+        while os.path.isfile(os.path.join(self._path, "edg%s_%i.json" % (shape_uuid, len(edge_hashes)))):
+            edge_hashes.append("edg%s_%i" % (shape_uuid, len(edge_hashes)))
+        return edge_hashes
+
+    def _export_shape_mesh(self, shape, shape_uuid, export_edges, mesh_quality, lod_levels=1):
+        """ tesselates the shape and writes the edge files, then the mesh files. If
+        lod_levels is greater than 1, one mesh file is written for each level of
+        detail, the coarsest level being the shape_hash file. The mesh file of the
+        finest level is written last: if it already exists in the output directory,
+        the shape is neither tesselated nor written again.
+        """
+        shape_hash = "shp%s" % shape_uuid
+        lod = None
+        if lod_levels > 1:
+            lod = TesselatorLOD(shape, lod_levels,
+                                mesh_quality=mesh_quality,
+                                compute_edges=export_edges,
+                                parallel=True)
+            self._3js_lods[shape_hash] = lod.screen_fractions()
+            file_hashes = [shape_hash] + ["%s_lod%i" % (shape_hash, level) for level in range(1, lod_levels)]
+        else:
+            file_hashes = [shape_hash]
+        if os.path.isfile(self._mesh_full_path(file_hashes[-1])):
+            return
+        # tesselate
+        if lod is None:
+            tesselators = [get_tesselator(shape,
+                                          compute_edges=export_edges,
+                                          mesh_quality=mesh_quality,
+                                          parallel=True)]
+        else:
+            tesselators = [tess for _, tess in lod.iter_levels()]
+        if export_edges:
+            # the edges of the finest level
+            for i, edge_point_set in enumerate(tesselators[-1].GetEdgesPolylines()):
+                edge_hash = "edg%s_%i" % (shape_uuid, i)
+                with open(os.path.join(self._path, edge_hash + '.json'), "w") as edge_file:
+                    edge_file.write(export_edgedata_to_json(edge_hash, edge_point_set))
+        for tess, file_hash in zip(tesselators, file_hashes):
+            self._write_mesh_file(tess, file_hash, shape_uuid)
+
+    def _export_shape_group(self, jobs, export_edges, mesh_quality, lod_levels):
+        """ run by a DisplayShapes thread, exports the (shape, shape_uuid) jobs in sequence """
+        for shape, shape_uuid in jobs:
+            self._export_shape_mesh(shape, shape_uuid, export_edges, mesh_quality, lod_levels)
+
+    def _write_mesh_file(self, tess, file_hash, shape_uuid):
+        # update spinning cursor, shared by the DisplayShapes threads
+        with self._cursor_lock:
+            sys.stdout.write("\r%s mesh shape %s, %i triangles     " % (next(self.spinning_cursor),
+                                                                        file_hash,
+                                                                        tess.ObjGetTriangleCount()))
+            sys.stdout.flush()
+        # export to 3JS
+        shape_full_path = self._mesh_full_path(file_hash)
+        # generate the mesh
+        if self._mesh_format == "glb":
+            tess.ExportShapeToGLB(shape_full_path)
+        else:
+            with open(shape_full_path, 'w') as json_file:
+                tess.ExportShapeToThreejsJSON(json_file, shape_uuid)
+
+    def _load_geometry_js(self, file_hash, indent):
+        """ returns the js code loading a mesh file, the callback body
+        gets the loaded BufferGeometry as geometry
+        """
+        if self._mesh_format == "glb":
+            return ("%sgltf_loader.load('%s.glb', function(gltf) {\n" % (indent, file_hash) +
+                    "%s\tvar geometry;\n" % indent +
+                    "%s\tgltf.scene.traverse(function(child) {if (child.isMesh) {geometry = child.geometry;}});\n" % indent)
+        return "%sloader.load('%s.json', function(geometry) {\n" % (indent, file_hash)
+
+    def _lod_js(self, shape_hash):
+        """ returns the js code replacing the mesh of the coarsest level by a THREE.LOD,
+        and loading the finer levels. Level i is displayed when the bounding sphere
+        of the shape covers more than screen_fractions[i] of the view height.
+        """
+        screen_fractions = self._3js_lods[shape_hash]
+        lod_string_list = []
+        lod_string_list.append("\t\t\t\tvar screen_fractions = %s;\n" % json.dumps(screen_fractions))
+        lod_string_list.append("\t\t\t\tgeometry.computeBoundingSphere();\n")
+        # the camera distance from which the bounding sphere fills the view height
+        lod_string_list.append("\t\t\t\tvar fill_distance = geometry.boundingSphere.radius / Math.tan(camera.fov * Math.PI / 360.);\n")
+        lod_string_list.append("\t\t\t\tvar lod = new THREE.LOD();\n")
+        lod_string_list.append("\t\t\t\tfunction lod_distance(level) {\n")
+        lod_string_list.append("\t\t\t\t\treturn level == screen_fractions.length - 1 ? 0. : fill_distance / screen_fractions[level + 1];\n")
+        lod_string_list.append("\t\t\t\t}\n")
+        lod_string_list.append("\t\t\t\tlod.addLevel(mesh, lod_distance(0));\n")
+        for level in range(1, len(screen_fractions)):
+            lod_string_list.append(self._load_geometry_js("%s_lod%i" % (shape_hash, level), "\t\t\t\t"))
+            lod_string_list.append("\t\t\t\t\tvar level_mesh = new THREE.Mesh(geometry, %s_phong_material);\n" % shape_hash)
+            lod_string_list.append("\t\t\t\t\tlevel_mesh.castShadow = true;\n")
+            lod_string_list.append("\t\t\t\t\tlevel_mesh.receiveShadow = true;\n")
+            lod_string_list.append("\t\t\t\t\tlod.addLevel(level_mesh, lod_distance(%i));\n" % level)
+            lod_string_list.append("\t\t\t\t});\n")
+        lod_string_list.append("\t\t\t\tmesh = lod;\n")
+        return "".join(lod_string_list)
 
     def generate_html_file(self):
         """ Generate the HTML file to be rendered by the web browser
@@ -495,6 +669,8 @@ class ThreejsRenderer:
         # using "".join()
         shape_string_list = []
         shape_string_list.append("loader = new THREE.BufferGeometryLoader();\n")
+        if self._mesh_format == "glb":
+            shape_string_list.append("gltf_loader = new THREE.GLTFLoader();\n")
         shape_idx = 0
         for shape_hash in self._3js_shapes:
             # get properties for this shape
@@ -510,12 +686,24 @@ class ThreejsRenderer:
                 shape_string_list.append('transparent: true, premultipliedAlpha: true, opacity:%g,' % transparency)
             #var line_material = new THREE.LineBasicMaterial({color: 0x000000, linewidth: 2});
             shape_string_list.append('});\n')
-            # load json geometry files
-            shape_string_list.append("\t\t\tloader.load('%s.json', function(geometry) {\n" % shape_hash)
-            shape_string_list.append("\t\t\t\tmesh = new THREE.Mesh(geometry, %s_phong_material);\n" % shape_hash)
+            # load json or glb geometry files
+            shape_string_list.append(self._load_geometry_js(shape_hash, "\t\t\t"))
+            if shape_hash in self._3js_instances:
+                # one draw call for all the instances, matrices are row major
+                shape_string_list.append("\t\t\t\tvar matrices = %s;\n" % json.dumps(self._3js_instances[shape_hash]))
+                shape_string_list.append("\t\t\t\tmesh = new THREE.InstancedMesh(geometry, %s_phong_material, matrices.length);\n" % shape_hash)
+                shape_string_list.append("\t\t\t\tvar instance_matrix = new THREE.Matrix4();\n")
+                shape_string_list.append("\t\t\t\tfor (var i = 0; i < matrices.length; i++) {\n")
+                shape_string_list.append("\t\t\t\t\tinstance_matrix.set.apply(instance_matrix, matrices[i]);\n")
+                shape_string_list.append("\t\t\t\t\tmesh.setMatrixAt(i, instance_matrix);\n")
+                shape_string_list.append("\t\t\t\t}\n")
+            else:
+                shape_string_list.append("\t\t\t\tmesh = new THREE.Mesh(geometry, %s_phong_material);\n" % shape_hash)
             # enable shadows for object
             shape_string_list.append("\t\t\t\tmesh.castShadow = true;\n")
             shape_string_list.append("\t\t\t\tmesh.receiveShadow = true;\n")
+            if shape_hash in self._3js_lods:
+                shape_string_list.append(self._lod_js(shape_hash))
             # add mesh to scene
             shape_string_list.append("\t\t\t\tscene.add(mesh);\n")
             # last shape, we request for a fit_to_scene
@@ -543,6 +731,8 @@ class ThreejsRenderer:
             # body
             BODY_PART0 = BODY_PART0.replace('@VERSION@', OCC_VERSION)
             fp.write(BODY_PART0)
+            if self._mesh_format == "glb":
+                fp.write(GLTF_LOADER_SCRIPT)
             fp.write(HTMLBody_Part1().get_str())
             fp.write("".join(shape_string_list))
             fp.write("".join(edge_string_list))
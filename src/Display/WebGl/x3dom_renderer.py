@@ -15,16 +15,18 @@
 ##You should have received a copy of the GNU Lesser General Public License
 ##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
 
+from concurrent.futures import ThreadPoolExecutor
 import os
 import sys
 import tempfile
-import uuid
 from xml.etree import ElementTree
 
-from OCC.Core.Tesselator import ShapeTesselator
+from OCC.Extend.TesselatorCache import get_tesselator
 from OCC import VERSION as OCC_VERSION
 
-from OCC.Extend.TopologyUtils import is_edge, is_wire, discretize_edge, discretize_wire
+from OCC.Extend.TopologyUtils import (is_edge, is_wire, discretize_edge, discretize_wire,
+                                      group_shapes_sharing_subshapes)
+from OCC.Extend.DataExchange import shape_content_hash
 from OCC.Display.WebGl.simple_server import start_server
 
 def spinning_cursor():
@@ -284,20 +286,14 @@ class X3DExporter:
         self._x3d_string = ""  # the string that contains the x3d description
 
     def compute(self):
-        shape_tesselator = ShapeTesselator(self._shape)
-        shape_tesselator.Compute(compute_edges=self._export_edges,
-                                 mesh_quality=self._mesh_quality,
-                                 parallel=True)
+        shape_tesselator = get_tesselator(self._shape,
+                                          compute_edges=self._export_edges,
+                                          mesh_quality=self._mesh_quality,
+                                          parallel=True)
         self._triangle_sets.append(shape_tesselator.ExportShapeToX3DTriangleSet())
         # then process edges
         if self._export_edges:
-            # get number of edges
-            nbr_edges = shape_tesselator.ObjGetEdgeCount()
-            for i_edge in range(nbr_edges):
-                edge_point_set = []
-                nbr_vertices = shape_tesselator.ObjEdgeGetVertexCount(i_edge)
-                for i_vert in range(nbr_vertices):
-                    edge_point_set.append(shape_tesselator.GetEdgeVertex(i_edge, i_vert))
+            for edge_point_set in shape_tesselator.GetEdgesPolylines():
                 ils = export_edge_to_indexed_lineset(edge_point_set)
                 self._line_sets.append(ils)
 
@@ -383,47 +379,99 @@ class X3DomRenderer:
         """
         # if the shape is an edge or a wire, use the related functions
         if is_edge(shape):
-            print("X3D exporter, discretize an edge")
-            pnts = discretize_edge(shape)
-            edge_hash = "edg%s" % uuid.uuid4().hex
-            line_set = export_edge_to_indexed_lineset(pnts)
-            x3dfile_content = indexed_lineset_to_x3d_string([line_set], ils_id=edge_hash)
+            edge_hash = "edg%s" % shape_content_hash(shape, color, line_width)
             edge_full_path = os.path.join(self._path, edge_hash + '.x3d')
-            with open(edge_full_path, "w") as edge_file:
-                edge_file.write(x3dfile_content)
+            if not os.path.isfile(edge_full_path):
+                print("X3D exporter, discretize an edge")
+                pnts = discretize_edge(shape)
+                line_set = export_edge_to_indexed_lineset(pnts)
+                x3dfile_content = indexed_lineset_to_x3d_string([line_set], ils_id=edge_hash)
+                with open(edge_full_path, "w") as edge_file:
+                    edge_file.write(x3dfile_content)
             # store this edge hash
             self._x3d_edges[edge_hash] = [color, line_width]
             return self._x3d_shapes, self._x3d_edges
 
         if is_wire(shape):
-            print("X3D exporter, discretize a wire")
-            pnts = discretize_wire(shape)
-            wire_hash = "wir%s" % uuid.uuid4().hex
-            line_set = export_edge_to_indexed_lineset(pnts)
-            x3dfile_content = indexed_lineset_to_x3d_string([line_set], ils_id=wire_hash)
+            wire_hash = "wir%s" % shape_content_hash(shape, color, line_width)
             wire_full_path = os.path.join(self._path, wire_hash + '.x3d')
-            with open(wire_full_path, "w") as wire_file:
-                wire_file.write(x3dfile_content)
+            if not os.path.isfile(wire_full_path):
+                print("X3D exporter, discretize a wire")
+                pnts = discretize_wire(shape)
+                line_set = export_edge_to_indexed_lineset(pnts)
+                x3dfile_content = indexed_lineset_to_x3d_string([line_set], ils_id=wire_hash)
+                with open(wire_full_path, "w") as wire_file:
+                    wire_file.write(x3dfile_content)
             # store this edge hash
             self._x3d_edges[wire_hash] = [color, line_width]
             return self._x3d_shapes, self._x3d_edges
 
-        shape_uuid = uuid.uuid4().hex
-        shape_hash = "shp%s" % shape_uuid
-        x3d_exporter = X3DExporter(shape, vertex_shader, fragment_shader,
-                                   export_edges, color,
-                                   specular_color, shininess, transparency,
-                                   line_color, line_width, mesh_quality)
-        x3d_exporter.compute()
-        x3d_filename = os.path.join(self._path, "%s.x3d" % shape_hash)
-        # the x3d filename is computed from the shape hash
-        shape_id = len(self._x3d_shapes)
-        x3d_exporter.write_to_file(x3d_filename, shape_id)
-
+        exporter_args = (vertex_shader, fragment_shader, export_edges, color,
+                         specular_color, shininess, transparency,
+                         line_color, line_width, mesh_quality)
+        shape_hash = self._export_shape(shape, len(self._x3d_shapes), exporter_args)
         self._x3d_shapes[shape_hash] = [export_edges, color, specular_color, shininess,
                                         transparency, line_color, line_width]
         return self._x3d_shapes, self._x3d_edges
 
+    def DisplayShapes(self,
+                      shapes,
+                      vertex_shader=None,
+                      fragment_shader=None,
+                      export_edges=False,
+                      color=(0.65, 0.65, 0.7),
+                      specular_color=(0.2, 0.2, 0.2),
+                      shininess=0.9,
+                      transparency=0.,
+                      line_color=(0, 0., 0.),
+                      line_width=2.,
+                      mesh_quality=1.,
+                      max_workers=None):
+        """ Adds a list of shapes, displayed with the same properties (see DisplayShape).
+        The shapes are tesselated and their x3d files written by a pool of threads,
+        shapes sharing faces or edges being processed by the same thread.
+        max_workers: optional, the number of threads, see ThreadPoolExecutor.
+        """
+        exporter_args = (vertex_shader, fragment_shader, export_edges, color,
+                         specular_color, shininess, transparency,
+                         line_color, line_width, mesh_quality)
+        solids = []  # the shapes to tesselate
+        for shape in shapes:
+            if is_edge(shape) or is_wire(shape):
+                self.DisplayShape(shape, color=color, line_width=line_width)
+            else:
+                solids.append(shape)
+        first_shape_id = len(self._x3d_shapes)
+
+        def _export_group(group):
+            return [(index, self._export_shape(solids[index], first_shape_id + index, exporter_args))
+                    for index in group]
+
+        shape_hashes = [None] * len(solids)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for exported in executor.map(_export_group, group_shapes_sharing_subshapes(solids)):
+                for index, shape_hash in exported:
+                    shape_hashes[index] = shape_hash
+        # shapes are added in the order of the list
+        for shape_hash in shape_hashes:
+            self._x3d_shapes[shape_hash] = [export_edges, color, specular_color, shininess,
+                                            transparency, line_color, line_width]
+        return self._x3d_shapes, self._x3d_edges
+
+    def _export_shape(self, shape, shape_id, exporter_args):
+        """ tesselates the shape and writes its x3d file, returns the shape hash.
+        exporter_args: the X3DExporter arguments following the shape.
+        The x3d filename is computed from the shape content and from everything
+        written to the file, if it already exists it is reused.
+        """
+        shape_hash = "shp%s" % shape_content_hash(shape, shape_id, *exporter_args)
+        x3d_filename = os.path.join(self._path, "%s.x3d" % shape_hash)
+        if not os.path.isfile(x3d_filename):
+            x3d_exporter = X3DExporter(shape, *exporter_args)
+            x3d_exporter.compute()
+            x3d_exporter.write_to_file(x3d_filename, shape_id)
+        return shape_hash
+
     def render(self, addr="localhost", server_port=8080, open_webbrowser=False):
         """ Call the render() method to display the X3D scene.
         """
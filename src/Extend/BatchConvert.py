@@ -0,0 +1,365 @@
+##Copyright 2020 Thomas Paviot (tpaviot@gmail.com)
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+""" Batch conversion of CAD files, using a pool of processes.
+
+Each file goes through three stages: read, mesh (only for mesh based
+output formats) and write. The read stage and the mesh/write stages
+run as separate pool tasks: the shape is sent back from the reading
+worker to the converting one through the TopoDS_Shape pickle support
+(BRep serialization).
+
+Library usage:
+
+    from OCC.Extend.BatchConvert import batch_convert
+    summary = batch_convert(list_of_files, "out", "glb", processes=4, timeout=60)
+
+Command line usage:
+
+    python -m OCC.Extend.BatchConvert input_dir output_dir --format stl --processes 4
+"""
+
+import argparse
+from collections import deque
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
+from OCC.Core.BRepTools import breptools_Read, breptools_Write
+from OCC.Core.BRep import BRep_Builder
+from OCC.Core.TopoDS import TopoDS_Shape
+from OCC.Core.Tesselator import ShapeTesselator
+from OCC.Extend.DataExchange import (read_step_file, read_iges_file, read_stl_file,
+                                     write_step_file, write_iges_file, write_stl_file)
+
+# input file extensions
+INPUT_FORMATS = {".step": "step", ".stp": "step",
+                 ".iges": "iges", ".igs": "iges",
+                 ".stl": "stl",
+                 ".brep": "brep", ".brp": "brep"}
+# output formats, and the extension of the generated files
+OUTPUT_FORMATS = {"step": ".stp", "iges": ".igs", "stl": ".stl",
+                  "brep": ".brep", "glb": ".glb", "json": ".json"}
+STAGES = ["read", "mesh", "write"]
+
+
+def read_shape(filename):
+    """ reads a STEP, IGES, STL or BRep file, depending on the file
+    extension, and returns the shape
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in INPUT_FORMATS:
+        raise AssertionError("Unsupported file format: %s" % filename)
+    input_format = INPUT_FORMATS[extension]
+    if input_format == "step":
+        return read_step_file(filename, verbosity=False)
+    if input_format == "iges":
+        return read_iges_file(filename)
+    if input_format == "stl":
+        return read_stl_file(filename)
+    shape = TopoDS_Shape()
+    if not breptools_Read(shape, filename, BRep_Builder()):
+        raise AssertionError("Error: can't read file %s." % filename)
+    return shape
+
+
+def export_shape(shape, filename, output_format, mesh_quality=1.0):
+    """ exports the shape to filename. Returns a dict with the time spent
+    in the mesh and write stages, in seconds.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise AssertionError("Unsupported output format: %s" % output_format)
+    timings = {"mesh": 0., "write": 0.}
+    init_time = time.perf_counter()
+    if output_format in ["glb", "json"]:
+        tess = ShapeTesselator(shape)
+        tess.Compute(mesh_quality=mesh_quality, parallel=True)
+        timings["mesh"] = time.perf_counter() - init_time
+        init_time = time.perf_counter()
+        if output_format == "glb":
+            tess.ExportShapeToGLB(filename)
+        else:
+            with open(filename, "w") as json_file:
+                tess.ExportShapeToThreejsJSON(json_file, os.path.basename(filename))
+    elif output_format == "stl":
+        # same parameters as write_stl_file, which then reuses the triangulation
+        BRepMesh_IncrementalMesh(shape, 0.9 * mesh_quality, False, 0.5, True)
+        timings["mesh"] = time.perf_counter() - init_time
+        init_time = time.perf_counter()
+        write_stl_file(shape, filename, mode="binary", linear_deflection=0.9 * mesh_quality)
+    elif output_format == "step":
+        write_step_file(shape, filename)
+    elif output_format == "iges":
+        write_iges_file(shape, filename)
+    else:
+        if not breptools_Write(shape, filename):
+            raise IOError("Error while writing shape to BRep file.")
+    timings["write"] = time.perf_counter() - init_time
+    return timings
+
+
+def _read_task(filename):
+    """ the read stage, run by a pool worker. The shape is pickled
+    (BRep serialization) to be sent back to the parent process
+    """
+    init_time = time.perf_counter()
+    shape = read_shape(filename)
+    if shape.IsNull():
+        raise AssertionError("Shape read from %s is null." % filename)
+    return shape, time.perf_counter() - init_time
+
+
+def _export_task(shape, filename, output_format, mesh_quality):
+    """ the mesh and write stages, run by a pool worker """
+    return export_shape(shape, filename, output_format, mesh_quality)
+
+
+class _Job:
+    """ the conversion state of one file """
+    def __init__(self, input_filename, output_filename):
+        self.input_filename = input_filename
+        self.output_filename = output_filename
+        self.attempts = 0
+        self.stage = "read"
+        self.shape = None
+        self.async_result = None
+        self.start_time = 0.
+        self.timings = {}
+
+
+def output_filenames(input_files, output_directory, output_format):
+    """ returns the output filename of each input file. The path relative to
+    the common directory of the input files is kept, so that a/part.step and
+    b/part.step are converted to a/part.glb and b/part.glb. Input files that
+    still map to the same output keep their extension, part.step and
+    part.iges being converted to part.step.glb and part.iges.glb.
+    """
+    output_extension = OUTPUT_FORMATS[output_format]
+    input_paths = [os.path.abspath(f) for f in input_files]
+    if not input_paths:
+        return []
+    common_directory = os.path.commonpath([os.path.dirname(f) for f in input_paths])
+    relative_paths = [os.path.relpath(f, common_directory) for f in input_paths]
+    stems = [os.path.splitext(f)[0] for f in relative_paths]
+    stem_counts = {}
+    for stem in stems:
+        stem_counts[stem] = stem_counts.get(stem, 0) + 1
+    outputs = []
+    for stem, relative_path in zip(stems, relative_paths):
+        name = relative_path if stem_counts[stem] > 1 else stem
+        outputs.append(os.path.join(output_directory, name + output_extension))
+    if len(set(outputs)) < len(outputs):
+        raise AssertionError("Several input files are converted to the same output file.")
+    return outputs
+
+
+def batch_convert(input_files,
+                  output_directory,
+                  output_format,
+                  processes=None,
+                  timeout=None,
+                  retries=0,
+                  mesh_quality=1.0,
+                  summary_filename=None):
+    """ converts a list of files to output_format, using a pool of processes.
+    input_files: a list of STEP, IGES, STL or BRep filenames
+    output_directory: where the converted files are written, see output_filenames
+    output_format: one of "step", "iges", "stl", "brep", "glb", "json"
+    processes: optional, the number of worker processes, by default the number of cpus
+    timeout: optional, the maximum time allowed for a file (read, mesh and write
+             stages), in seconds. The pool is restarted when a file times out, the
+             other files being converted are resubmitted, and their clock restarted.
+    retries: optional, the number of times a failed or timed out file is retried
+    mesh_quality: optional, see ShapeTesselator.Compute
+    summary_filename: optional, if set the summary is dumped to this json file
+    Returns the summary, a dict with the per stage throughput and the failures.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise AssertionError("output_format must be one of %s." % ", ".join(OUTPUT_FORMATS))
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    outputs = output_filenames(input_files, output_directory, output_format)
+    for output_filename in outputs:
+        os.makedirs(os.path.dirname(output_filename), exist_ok=True)
+
+    stages = {stage: {"files": 0, "seconds": 0.} for stage in STAGES}
+    input_megabytes = 0.
+    failures = []
+    succeeded = 0
+
+    pending = deque(_Job(f, o) for f, o in zip(input_files, outputs))
+    running = []
+    # at most one task per process is submitted to the pool: a task starts
+    # as soon as it is submitted, its file clock is not running while it
+    # waits in the pool queue
+    max_running = processes
+
+    def _submit(pool, job):
+        if job.stage == "read":
+            job.async_result = pool.apply_async(_read_task, (job.input_filename,))
+            # the timeout applies to the whole file, the clock is started by its first stage
+            job.start_time = time.perf_counter()
+        else:
+            job.async_result = pool.apply_async(_export_task, (job.shape, job.output_filename,
+                                                               output_format, mesh_quality))
+
+    def _fail(job, error):
+        # retry from the beginning, or give up
+        if job.attempts <= retries:
+            job.stage = "read"
+            job.shape = None
+            job.timings = {}
+            pending.append(job)
+        else:
+            failures.append({"file": job.input_filename,
+                             "error": error,
+                             "attempts": job.attempts})
+
+    init_time = time.perf_counter()
+    pool = multiprocessing.Pool(processes)
+    try:
+        while pending or running:
+            while pending and len(running) < max_running:
+                job = pending.popleft()
+                job.attempts += 1
+                _submit(pool, job)
+                running.append(job)
+            timed_out = []
+            for job in list(running):
+                if job.async_result.ready():
+                    running.remove(job)
+                    try:
+                        result = job.async_result.get()
+                    except Exception as error:
+                        _fail(job, "%s: %s" % (type(error).__name__, error))
+                        continue
+                    if job.stage == "read":
+                        job.shape, job.timings["read"] = result
+                        job.stage = "export"
+                        _submit(pool, job)
+                        running.append(job)
+                    else:
+                        job.timings.update(result)
+                        for stage in STAGES:
+                            stages[stage]["seconds"] += job.timings[stage]
+                        stages["read"]["files"] += 1
+                        stages["write"]["files"] += 1
+                        if job.timings["mesh"] > 0.:
+                            stages["mesh"]["files"] += 1
+                        input_megabytes += os.path.getsize(job.input_filename) / (1024. * 1024.)
+                        job.shape = None
+                        succeeded += 1
+                elif timeout is not None and time.perf_counter() - job.start_time > timeout:
+                    timed_out.append(job)
+            if timed_out:
+                # a busy worker can't be interrupted, the whole pool is restarted
+                pool.terminate()
+                pool.join()
+                pool = multiprocessing.Pool(processes)
+                for job in timed_out:
+                    running.remove(job)
+                    _fail(job, "Timeout after %.1f s" % timeout)
+                for job in running:
+                    _submit(pool, job)
+                    # the work lost with the pool is not counted, only the read stage if done
+                    job.start_time = time.perf_counter() - job.timings.get("read", 0.)
+            else:
+                time.sleep(0.005)
+    finally:
+        pool.terminate()
+        pool.join()
+    elapsed = time.perf_counter() - init_time
+
+    for stage in STAGES:
+        seconds = stages[stage]["seconds"]
+        stages[stage]["files_per_second"] = stages[stage]["files"] / seconds if seconds > 0. else 0.
+    if stages["read"]["seconds"] > 0.:
+        stages["read"]["megabytes_per_second"] = input_megabytes / stages["read"]["seconds"]
+    summary = {"output_format": output_format,
+               "processes": processes,
+               "files": len(input_files),
+               "succeeded": succeeded,
+               "failed": len(failures),
+               "elapsed": elapsed,
+               "files_per_second": succeeded / elapsed if elapsed > 0. else 0.,
+               "stages": stages,
+               "failures": failures}
+    if summary_filename is not None:
+        with open(summary_filename, "w") as summary_file:
+            json.dump(summary, summary_file, indent=2)
+    return summary
+
+
+def _list_input_files(paths, recursive=False):
+    """ returns the list of the supported files found in paths, which
+    can be files or directories
+    """
+    input_files = []
+    for path in paths:
+        if os.path.isfile(path):
+            input_files.append(path)
+            continue
+        if not os.path.isdir(path):
+            raise FileNotFoundError("%s not found." % path)
+        for root, dirs, files in os.walk(path):
+            for filename in sorted(files):
+                if os.path.splitext(filename)[1].lower() in INPUT_FORMATS:
+                    input_files.append(os.path.join(root, filename))
+            if not recursive:
+                break
+    return input_files
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Converts CAD files using a pool of processes.")
+    parser.add_argument("inputs", nargs="+", help="input files or directories")
+    parser.add_argument("output_directory", help="the directory where converted files are written")
+    parser.add_argument("--format", default="glb", choices=sorted(OUTPUT_FORMATS),
+                        help="the output format (default: glb)")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="the number of worker processes (default: number of cpus)")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="maximum time allowed for one file, in seconds")
+    parser.add_argument("--retries", type=int, default=0,
+                        help="number of retries for a failed file (default: 0)")
+    parser.add_argument("--quality", type=float, default=1.0,
+                        help="mesh quality, lower is more precise (default: 1.0)")
+    parser.add_argument("--recursive", action="store_true",
+                        help="look for input files in subdirectories")
+    parser.add_argument("--summary", default=None,
+                        help="dump the json summary to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    input_files = _list_input_files(args.inputs, args.recursive)
+    summary = batch_convert(input_files,
+                            args.output_directory,
+                            args.format,
+                            processes=args.processes,
+                            timeout=args.timeout,
+                            retries=args.retries,
+                            mesh_quality=args.quality,
+                            summary_filename=args.summary)
+    if args.summary is None:
+        print(json.dumps(summary, indent=2))
+    return 0 if not summary["failures"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,7 +15,13 @@
 ##You should have received a copy of the GNU Lesser General Public License
 ##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import hashlib
+import mmap
 import os
+import re
+import threading
+import time
 
 from OCC.Core.TopoDS import TopoDS_Shape
 from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
@@ -23,7 +29,7 @@ from OCC.Core.StlAPI import stlapi_Read, StlAPI_Writer
 from OCC.Core.BRep import BRep_Builder
 from OCC.Core.gp import gp_Pnt, gp_Dir, gp_Pnt2d
 from OCC.Core.Bnd import Bnd_Box2d
-from OCC.Core.TopoDS import TopoDS_Compound
+from OCC.Core.TopoDS import TopoDS_Compound, TopoDS_Face
 from OCC.Core.IGESControl import IGESControl_Reader, IGESControl_Writer
 from OCC.Core.STEPControl import STEPControl_Reader, STEPControl_Writer, STEPControl_AsIs
 from OCC.Core.Interface import Interface_Static_SetCVal
@@ -37,9 +43,15 @@ from OCC.Core.TCollection import TCollection_ExtendedString
 from OCC.Core.Quantity import Quantity_Color, Quantity_TOC_RGB
 from OCC.Core.TopLoc import TopLoc_Location
 from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_Transform
+from OCC.Core.BRepTools import BRepTools_ShapeSet
+from OCC.Core.Poly import Poly_Triangulation, Poly_Triangle, Poly_Array1OfTriangle
+from OCC.Core.TColgp import TColgp_Array1OfPnt
+from OCC.Core.Tesselator import ShapeTesselator
 
 from OCC.Extend.TopologyUtils import (discretize_edge, get_sorted_hlr_edges,
-                                      list_of_shapes_to_compound)
+                                      list_of_shapes_to_compound,
+                                      group_shapes_sharing_subshapes)
+from OCC.Extend.TesselatorLOD import TesselatorLOD
 
 try:
     import svgwrite
@@ -47,21 +59,105 @@ try:
 except ImportError:
     HAVE_SVGWRITE = False
 
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except ImportError:
+    HAVE_NUMPY = False
+
+# The STEP and IGES file parsers use static buffers: ReadFile keeps the GIL,
+# and a file is parsed by one thread at a time. Transfers, which are the
+# longest part, release the GIL and run concurrently.
+_STEP_PARSER_LOCK = threading.Lock()
+_IGES_PARSER_LOCK = threading.Lock()
+
 ##########################
 # Step import and export #
 ##########################
-def read_step_file(filename, as_compound=True, verbosity=True):
+def _transfer_step_roots(filename, worker_index, nbr_workers, verbosity):
+    """ run by the read_step_file worker processes: reads the file and
+    transfers the roots k such that (k - 1) % nbr_workers == worker_index.
+    Returns the list of (root index, shapes, transfer time) of these roots.
+    """
+    step_reader = STEPControl_Reader()
+    with _STEP_PARSER_LOCK:
+        status = step_reader.ReadFile(filename)
+    if status != IFSelect_RetDone:
+        raise AssertionError("Error: can't read file.")
+    if verbosity and worker_index == 0:
+        step_reader.PrintCheckLoad(False, IFSelect_ItemsByEntity)
+
+    results = []
+    for k in range(worker_index + 1, step_reader.NbRootsForTransfer() + 1, nbr_workers):
+        init_time = time.perf_counter()
+        if not step_reader.TransferRoot(k):
+            print("Warning: transfer of root %i failed." % k)
+        shapes = [step_reader.Shape(i) for i in range(1, step_reader.NbShapes() + 1)]
+        results.append((k, [shp for shp in shapes if not shp.IsNull()],
+                        time.perf_counter() - init_time))
+        step_reader.ClearShapes()
+    if verbosity:
+        step_reader.PrintCheckTransfer(False, IFSelect_ItemsByEntity)
+    return results
+
+
+def _read_step_file_parallel(filename, verbosity, max_workers, timings):
+    """ transfers the roots of the STEP file from several processes, each
+    one reading the file, and returns the list of root shapes in the root order
+    """
+    nbr_workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=nbr_workers) as executor:
+        futures = [executor.submit(_transfer_step_roots, filename, worker_index, nbr_workers, verbosity)
+                   for worker_index in range(nbr_workers)]
+        root_results = sorted((result for future in futures for result in future.result()),
+                              key=lambda result: result[0])
+    if timings is not None:
+        for k, _, transfer_time in root_results:
+            timings[k] = transfer_time
+    return [shp for _, shapes, _ in root_results for shp in shapes]
+
+
+def _step_shapes_result(shps, as_compound):
+    """ the result of read_step_file, from the list of root shapes """
+    if not shps:
+        raise AssertionError("No shape to transfer.")
+    if len(shps) == 1:  # most cases
+        return shps[0]
+    print("Number of shapes:", len(shps))
+    if as_compound:
+        compound, result = list_of_shapes_to_compound(shps)
+        if not result:
+            print("Warning: all shapes were not added to the compound")
+        return compound
+    print("Warning, returns a list of shapes.")
+    return shps
+
+
+def read_step_file(filename, as_compound=True, verbosity=True, parallel=False,
+                   max_workers=None, timings=None):
     """ read the STEP file and returns a compound
     filename: the file path
     verbosity: optional, False by default.
     as_compound: True by default. If there are more than one shape at root,
     gather all shapes into one compound. Otherwise returns a list of shapes.
+    parallel: optional, False by default. If True, the roots are transferred
+    by max_workers processes (os.cpu_count() by default), each one reading the
+    file and transferring one root out of max_workers. Shapes are sent back
+    pickled: the geometry shared by several roots is no more shared, and
+    the shapes carry no triangulation.
+    timings: optional, a dict. In parallel mode, it is filled with the
+    transfer time in seconds of each root, by root index (starting from 1).
     """
     if not os.path.isfile(filename):
         raise FileNotFoundError("%s not found." % filename)
 
+    if parallel:
+        return _step_shapes_result(_read_step_file_parallel(filename, verbosity, max_workers, timings),
+                                   as_compound)
+
     step_reader = STEPControl_Reader()
-    status = step_reader.ReadFile(filename)
+    with _STEP_PARSER_LOCK:
+        status = step_reader.ReadFile(filename)
 
     if status == IFSelect_RetDone:  # check status
         if verbosity:
@@ -72,29 +168,51 @@ def read_step_file(filename, as_compound=True, verbosity=True):
         if not transfer_result:
             raise AssertionError("Transfer failed.")
         _nbs = step_reader.NbShapes()
-        if _nbs == 0:
-            raise AssertionError("No shape to transfer.")
-        elif _nbs == 1:  # most cases
+        if _nbs == 1:  # most cases
             return step_reader.Shape(1)
-        elif _nbs > 1:
-            print("Number of shapes:", _nbs)
-            shps = []
-            # loop over root shapes
-            for k in range(1, _nbs + 1):
-                new_shp = step_reader.Shape(k)
-                if not new_shp.IsNull():
-                    shps.append(new_shp)
-            if as_compound:
-                compound, result = list_of_shapes_to_compound(shps)
-                if not result:
-                    print("Warning: all shapes were not added to the compound")
-                return compound
-            else:
-                print("Warning, returns a list of shapes.")
-                return shps
-    else:
+        # loop over root shapes
+        shps = []
+        for k in range(1, _nbs + 1):
+            new_shp = step_reader.Shape(k)
+            if not new_shp.IsNull():
+                shps.append(new_shp)
+        return _step_shapes_result(shps, as_compound)
+    raise AssertionError("Error: can't read file.")
+
+
+def iter_step_roots(filename, verbosity=False):
+    """ Generator over the root shapes of a STEP file.
+    Roots are transferred one at a time (STEPControl_Reader.TransferRoot),
+    and each shape is yielded as soon as it is translated: the caller can
+    mesh, measure or export a part while the next ones are not yet
+    transferred. Shapes are removed from the reader once yielded, so that
+    they can be garbage collected as soon as the caller releases them.
+    """
+    if not os.path.isfile(filename):
+        raise FileNotFoundError("%s not found." % filename)
+
+    step_reader = STEPControl_Reader()
+    with _STEP_PARSER_LOCK:
+        status = step_reader.ReadFile(filename)
+    if status != IFSelect_RetDone:
         raise AssertionError("Error: can't read file.")
-    return None
+    if verbosity:
+        failsonly = False
+        step_reader.PrintCheckLoad(failsonly, IFSelect_ItemsByEntity)
+
+    nbr_roots = step_reader.NbRootsForTransfer()
+    for k in range(1, nbr_roots + 1):
+        if not step_reader.TransferRoot(k):
+            print("Warning: transfer of root %i failed." % k)
+            continue
+        # a root may result in several shapes
+        for i in range(1, step_reader.NbShapes() + 1):
+            shp = step_reader.Shape(i)
+            if not shp.IsNull():
+                yield shp
+        step_reader.ClearShapes()
+    if verbosity:
+        step_reader.PrintCheckTransfer(False, IFSelect_ItemsByEntity)
 
 
 def write_step_file(a_shape, filename, application_protocol="AP203"):
@@ -149,7 +267,8 @@ def read_step_file_with_names_colors(filename):
     step_reader.SetMatMode(True)
     step_reader.SetGDTMode(True)
 
-    status = step_reader.ReadFile(filename)
+    with _STEP_PARSER_LOCK:
+        status = step_reader.ReadFile(filename)
     if status == IFSelect_RetDone:
         step_reader.Transfer(doc)
 
@@ -317,6 +436,73 @@ def read_step_file_with_names_colors(filename):
     return output_shapes
 
 
+def read_step_assembly(filename):
+    """ Reads a STEP file with OCAF, and keeps the assembly structure.
+    Returns a tuple (prototypes, instances):
+    prototypes: a dict {topods_shape: [label_name, color]}, each part is
+                listed only once, whatever the number of times it is referenced
+    instances: a dict {prototype_shape: [(location, instance_name), ...]}, one
+               (TopLoc_Location, name) tuple for each placement of the prototype in
+               the assembly. The location is the product of all the locations
+               from the root to the component.
+    Tesselating each prototype once and displaying it at each instance location
+    makes the mesh time and memory scale with the number of unique parts.
+    """
+    if not os.path.isfile(filename):
+        raise FileNotFoundError("%s not found." % filename)
+
+    doc = TDocStd_Document(TCollection_ExtendedString("pythonocc-doc"))
+    shape_tool = XCAFDoc_DocumentTool_ShapeTool(doc.Main())
+    color_tool = XCAFDoc_DocumentTool_ColorTool(doc.Main())
+
+    step_reader = STEPCAFControl_Reader()
+    step_reader.SetColorMode(True)
+    step_reader.SetNameMode(True)
+
+    with _STEP_PARSER_LOCK:
+        status = step_reader.ReadFile(filename)
+    if status != IFSelect_RetDone:
+        raise AssertionError("Error: can't read file.")
+    step_reader.Transfer(doc)
+
+    prototypes = {}
+    instances = {}
+
+    def _get_color(lab, shape):
+        c = Quantity_Color(0.5, 0.5, 0.5, Quantity_TOC_RGB)  # default color
+        for color_type in range(3):
+            if color_tool.GetInstanceColor(shape, color_type, c) or color_tool.GetColor(lab, color_type, c):
+                break
+        return c
+
+    def _get_instances(lab, loc, instance_name):
+        if shape_tool.IsAssembly(lab):
+            l_c = TDF_LabelSequence()
+            shape_tool.GetComponents(lab, l_c)
+            for i in range(l_c.Length()):
+                label = l_c.Value(i + 1)
+                if shape_tool.IsReference(label):
+                    label_reference = TDF_Label()
+                    shape_tool.GetReferredShape(label, label_reference)
+                    component_loc = loc.Multiplied(shape_tool.GetLocation(label))
+                    _get_instances(label_reference, component_loc, label.GetLabelName())
+        elif shape_tool.IsSimpleShape(lab):
+            shape = shape_tool.GetShape(lab)
+            if shape.IsNull():
+                return
+            if shape not in prototypes:
+                prototypes[shape] = [lab.GetLabelName(), _get_color(lab, shape)]
+                instances[shape] = []
+            instances[shape].append((loc, instance_name))
+
+    labels = TDF_LabelSequence()
+    shape_tool.GetFreeShapes(labels)
+    for i in range(labels.Length()):
+        root_item = labels.Value(i + 1)
+        _get_instances(root_item, TopLoc_Location(), root_item.GetLabelName())
+    return prototypes, instances
+
+
 #########################
 # STL import and export #
 #########################
@@ -353,6 +539,51 @@ def write_stl_file(a_shape, filename, mode="ascii", linear_deflection=0.9, angul
         raise IOError("File not written to disk.")
 
 
+def write_stl_from_tesselator(tesselator, filename):
+    """ export an already computed tesselation to a binary STL file. The shape
+    is not meshed again: the file is built at once from the tesselator buffers.
+    tesselator: a ShapeTesselator, or a TesselatorLOD, whose finest computed
+                level is exported
+    filename: the filename
+    """
+    if isinstance(tesselator, TesselatorLOD):
+        computed_levels = [level for level in range(len(tesselator)) if tesselator.is_computed(level)]
+        tesselator = tesselator.get_level(computed_levels[-1] if computed_levels else len(tesselator) - 1)
+    if os.path.isfile(filename):
+        print("Warning: %s file already exists and will be replaced" % filename)
+    with open(filename, "wb") as stl_file:
+        tesselator.ExportShapeToBinarySTL(stl_file)
+
+
+def write_stl_files(shapes, filenames, mesh_quality=1.0, max_workers=None):
+    """ export each shape (the solids of an assembly for instance) to its own
+    binary STL file. The shapes are tesselated and written by a pool of threads,
+    the tesselator releasing the GIL. Shapes sharing faces or edges are
+    processed by the same thread.
+    shapes: a list of topods_shapes
+    filenames: the list of filenames, one for each shape
+    mesh_quality: optional, see ShapeTesselator.Compute
+    max_workers: optional, the number of threads, see ThreadPoolExecutor
+    """
+    if len(shapes) != len(filenames):
+        raise AssertionError("There must be one filename for each shape.")
+    for a_shape in shapes:
+        if a_shape.IsNull():
+            raise AssertionError("Shape is null.")
+
+    def _write_group(group):
+        for index in group:
+            tess = ShapeTesselator(shapes[index])
+            tess.Compute(mesh_quality=mesh_quality)
+            write_stl_from_tesselator(tess, filenames[index])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_write_group, group)
+                   for group in group_shapes_sharing_subshapes(shapes)]
+        for future in futures:
+            future.result()
+
+
 def read_stl_file(filename):
     """ opens a stl file, reads the content, and returns a BRep topods_shape object
     """
@@ -367,6 +598,128 @@ def read_stl_file(filename):
 
     return the_shape
 
+
+# a binary STL file: 80 bytes header, the number of triangles (uint32), then
+# for each triangle 50 bytes: normal, 3 vertices (float32) and an attribute
+_STL_BINARY_HEADER_SIZE = 84
+_STL_BINARY_RECORD_SIZE = 50
+# an ASCII STL facet, the 12 groups being the normal and vertex coordinates
+_STL_ASCII_FACET = re.compile(rb"facet\s+normal" + rb"\s+(\S+)" * 3 +
+                              rb"\s+outer\s+loop" + (rb"\s+vertex" + rb"\s+(\S+)" * 3) * 3 +
+                              rb"\s+endloop\s+endfacet", re.IGNORECASE)
+
+
+def _is_binary_stl(filename):
+    """ a binary STL file size matches the number of triangles of its
+    header. ASCII files may not be detected from their "solid" first word:
+    some binary exporters also start their header with "solid".
+    """
+    file_size = os.path.getsize(filename)
+    if file_size < _STL_BINARY_HEADER_SIZE:
+        return False
+    with open(filename, "rb") as stl_file:
+        stl_file.seek(80)
+        nbr_triangles = int.from_bytes(stl_file.read(4), "little")
+    return file_size == _STL_BINARY_HEADER_SIZE + _STL_BINARY_RECORD_SIZE * nbr_triangles
+
+
+def _read_binary_stl_arrays(filename):
+    with open(filename, "rb") as stl_file:
+        nbr_triangles = (os.path.getsize(filename) - _STL_BINARY_HEADER_SIZE) // _STL_BINARY_RECORD_SIZE
+        if nbr_triangles == 0:
+            return np.zeros((0, 3), np.float32), np.zeros((0, 3), np.float32)
+        record = np.dtype([("normal", "<f4", (3,)),
+                           ("vertices", "<f4", (3, 3)),
+                           ("attribute", "<u2")])
+        with mmap.mmap(stl_file.fileno(), 0, access=mmap.ACCESS_READ) as stl_map:
+            records = np.frombuffer(stl_map, dtype=record, count=nbr_triangles,
+                                    offset=_STL_BINARY_HEADER_SIZE)
+            # copies, the map can't be closed while records is a view of it
+            normals = np.array(records["normal"], dtype=np.float32)
+            vertices = np.array(records["vertices"], dtype=np.float32).reshape(-1, 3)
+            del records
+    return vertices, normals
+
+
+def _read_ascii_stl_arrays(filename):
+    with open(filename, "rb") as stl_file:
+        content = stl_file.read()
+    facets = _STL_ASCII_FACET.findall(content)
+    if not facets:
+        raise AssertionError("No facet found in %s." % filename)
+    # the numbers are converted at once by numpy, not one by one by python
+    values = np.array(facets, dtype=bytes).astype(np.float32)
+    return values[:, 3:].reshape(-1, 3), values[:, :3].copy()
+
+
+def weld_vertices(vertices, triangles, tolerance=0.):
+    """ merges the duplicated vertices of a mesh
+    vertices: a (n, 3) array of the vertex coordinates
+    triangles: a (t, 3) array of vertex indices
+    tolerance: optional, 0. by default, vertices are merged if they are
+               identical. Otherwise, vertices are merged if they are rounded
+               to the same multiple of tolerance.
+    returns the (vertices, triangles) arrays of the welded mesh
+    """
+    if tolerance > 0.:
+        keys = np.round(vertices / tolerance).astype(np.int64)
+    else:
+        # adding 0. turns -0. to 0., both must be merged
+        keys = vertices + 0.
+    _, first_indices, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    welded_triangles = inverse.reshape(-1)[triangles].astype(np.int32)
+    return vertices[first_indices], welded_triangles
+
+
+def read_stl_mesh(filename, weld=False, tolerance=0.):
+    """ reads a STL file to numpy arrays, without building any shape.
+    Binary files are memory mapped, ASCII files are parsed with a regular expression.
+    filename: the file path
+    weld: optional, False by default. If True, duplicated vertices are merged, see weld_vertices.
+          Otherwise each triangle has its own 3 vertices.
+    tolerance: optional, the weld tolerance, see weld_vertices
+    returns (vertices, normals, triangles):
+    vertices: a float32 array of shape (n, 3)
+    normals: a float32 array of shape (t, 3), the normals of the facets as stored in the file
+    triangles: an int32 array of shape (t, 3), the indices of the vertices of each facet
+    """
+    if not HAVE_NUMPY:
+        raise AssertionError("read_stl_mesh requires numpy.")
+    if not os.path.isfile(filename):
+        raise FileNotFoundError("%s not found." % filename)
+
+    if _is_binary_stl(filename):
+        vertices, normals = _read_binary_stl_arrays(filename)
+    else:
+        vertices, normals = _read_ascii_stl_arrays(filename)
+    triangles = np.arange(len(vertices), dtype=np.int32).reshape(-1, 3)
+    if weld:
+        vertices, triangles = weld_vertices(vertices, triangles, tolerance)
+    return vertices, normals, triangles
+
+
+def mesh_to_triangulated_face(vertices, triangles):
+    """ returns a TopoDS_Face without surface, holding a Poly_Triangulation of
+    the mesh. Much lighter than the shape returned by read_stl_file, which has
+    one face per triangle: it can be displayed, meshed shapes can be exported
+    from it, but it is not a solid for modeling operations.
+    vertices: a (n, 3) array of the vertex coordinates
+    triangles: a (t, 3) array of vertex indices, starting from 0
+    """
+    if len(vertices) == 0 or len(triangles) == 0:
+        raise AssertionError("The mesh is empty.")
+    nodes = TColgp_Array1OfPnt(1, len(vertices))
+    for i, (x, y, z) in enumerate(vertices.tolist(), 1):
+        nodes.SetValue(i, gp_Pnt(x, y, z))
+    poly_triangles = Poly_Array1OfTriangle(1, len(triangles))
+    # OCCT node indices start from 1
+    for i, (n1, n2, n3) in enumerate((triangles + 1).tolist(), 1):
+        poly_triangles.SetValue(i, Poly_Triangle(n1, n2, n3))
+    triangulation = Poly_Triangulation(nodes, poly_triangles)
+    face = TopoDS_Face()
+    BRep_Builder().MakeFace(face, triangulation)
+    return face
+
 ######################
 # IGES import/export #
 ######################
@@ -382,7 +735,8 @@ def read_iges_file(filename, return_as_shapes=False, verbosity=False, visible_on
 
     iges_reader = IGESControl_Reader()
     iges_reader.SetReadVisible(visible_only)
-    status = iges_reader.ReadFile(filename)
+    with _IGES_PARSER_LOCK:
+        status = iges_reader.ReadFile(filename)
 
     _shapes = []
 
@@ -544,3 +898,23 @@ def export_shape_to_svg(shape, filename=None,
         print("Shape successfully exported to %s" % filename)
         return True
     return dwg.tostring()
+
+
+#######################
+# Shape serialization #
+#######################
+def shape_content_hash(a_shape, *parameters):
+    """ returns a hex digest identifying the shape content, and the optional
+    parameters (mesh parameters for instance). The digest is computed from the
+    BRep serialization of the shape, without triangulations, its location and its
+    orientation. Unlike hash(a_shape), it does not depend on the process: two
+    identical shapes, built separately or read from the same file, get the same digest.
+    """
+    if a_shape.IsNull():
+        raise AssertionError("Shape is null.")
+    shape_set = BRepTools_ShapeSet(False)
+    shape_set.Add(a_shape)
+    digest = hashlib.sha1(shape_set.WriteToString().encode("utf-8"))
+    location_index = shape_set.Locations().Index(a_shape.Location())
+    digest.update(repr((location_index, a_shape.Orientation(), parameters)).encode("utf-8"))
+    return digest.hexdigest()
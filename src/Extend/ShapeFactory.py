@@ -322,6 +322,20 @@ def rotate_shp_3_axis(shape, rx, ry, rz, unity="deg"):
     return shp
 
 
+def trsf_to_matrix(trsf, column_major=False):
+    """ Returns the 4x4 homogeneous matrix of a gp_Trsf (or a TopLoc_Location)
+    as a flat list of 16 floats, row major by default. three.js Matrix4.elements
+    (and the pythreejs matrix attribute) expect a column major list.
+    """
+    if hasattr(trsf, "Transformation"):  # a TopLoc_Location
+        trsf = trsf.Transformation()
+    rows = [[trsf.Value(i, j) for j in range(1, 5)] for i in range(1, 4)]
+    rows.append([0., 0., 0., 1.])
+    if column_major:
+        return [rows[i][j] for j in range(4) for i in range(4)]
+    return [rows[i][j] for i in range(4) for j in range(4)]
+
+
 def scale_shape(shape, fx, fy, fz):
     """ Scale a shape along the 3 directions
     @param fx : scale factor in the x direction
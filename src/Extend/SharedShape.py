@@ -0,0 +1,269 @@
+##Copyright 2020 Thomas Paviot (tpaviot@gmail.com)
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+""" Shared memory transport of a shape to worker processes.
+
+A SharedShape serializes a shape once, in the binary BRep format, to a
+multiprocessing.shared_memory block or to a file that workers mmap. Each
+sub-shape of a given type (the faces for instance, indexed as by
+TopExp::MapShapes) is serialized on its own, so that a worker only
+deserializes the sub-shapes it works on.
+
+Pickling a SharedShape only sends the name of the block: workers receive
+an index range, not a copy of the model. The binary BRep format does not
+carry the triangulations: workers that need a mesh compute it again.
+
+    def _face_areas(shared, first, last):
+        return [face_area(shared.sub_shape(i)) for i in range(first, last)]
+
+    with SharedShape(shape, TopAbs_FACE) as shared:
+        with multiprocessing.Pool() as pool:
+            areas = pool.starmap(_face_areas, [(shared, first, last)
+                                               for first, last in shared.index_ranges(32)])
+
+The process that creates the SharedShape owns the block: it is released
+by close() (or when leaving the with statement), after the workers are done.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    from multiprocessing import shared_memory
+    HAVE_SHARED_MEMORY = True
+except ImportError:  # python < 3.8
+    HAVE_SHARED_MEMORY = False
+# attaching to a block without registering it to the resource tracker
+_HAVE_UNTRACKED_SHARED_MEMORY = sys.version_info >= (3, 13)
+
+from OCC.Core.BinTools import BinTools_ShapeSet
+from OCC.Core.TopAbs import TopAbs_ShapeEnum
+from OCC.Core.TopExp import topexp_MapShapes
+from OCC.Core.TopTools import TopTools_IndexedMapOfShape
+from OCC.Core.TopoDS import TopoDS_Shape
+
+# magic, number of entries
+_HEADER = struct.Struct("<8sQ")
+_MAGIC = b"OCCSHP01"
+# for each entry: offset, size, location index, orientation
+_ENTRY = struct.Struct("<QQqq")
+
+
+def _resource_tracker_pid() -> Optional[int]:
+    """ the pid of the resource tracker started by this process (or by the
+    parent process it was forked from), None if the tracker fd was inherited
+    (spawn and forkserver workers) or if there is no tracker
+    """
+    try:
+        from multiprocessing import resource_tracker
+        return resource_tracker._resource_tracker._pid
+    except (ImportError, AttributeError):
+        return None
+
+
+def _serialize(shape: TopoDS_Shape) -> Tuple[bytes, int, int]:
+    shape_set = BinTools_ShapeSet()
+    shape_set.Add(shape)
+    return (shape_set.WriteToBytes(),
+            shape_set.Locations().Index(shape.Location()),
+            int(shape.Orientation()))
+
+
+def _deserialize(data, location_index: int, orientation: int) -> TopoDS_Shape:
+    shape_set = BinTools_ShapeSet()
+    shape_set.ReadFromBytes(data)
+    shape = shape_set.Shape(shape_set.NbShapes())
+    shape.Location(shape_set.Locations().Location(location_index))
+    shape.Orientation(orientation)
+    return shape
+
+
+class SharedShape:
+    """ a shape serialized once to shared memory, deserialized on demand
+    by the processes it is sent to
+    shape: the TopoDS_Shape to share
+    sub_shape_type: optional, a TopAbs_ShapeEnum. If set, each sub-shape of
+                    this type is serialized on its own, see sub_shape
+    filename: optional, if set the shape is written to this file, mmapped by
+              the workers, instead of a multiprocessing.shared_memory block
+    """
+    def __init__(self,
+                 shape: TopoDS_Shape,
+                 sub_shape_type: Optional[TopAbs_ShapeEnum] = None,
+                 filename: Optional[str] = None) -> None:
+        if shape.IsNull():
+            raise AssertionError("Shape is null.")
+        if filename is None and not HAVE_SHARED_MEMORY:
+            raise AssertionError("multiprocessing.shared_memory requires python 3.8, use a filename.")
+        # entry 0 is the whole shape, entry i the i-th sub-shape
+        shapes = [shape]
+        if sub_shape_type is not None:
+            sub_shapes_map = TopTools_IndexedMapOfShape()
+            topexp_MapShapes(shape, sub_shape_type, sub_shapes_map)
+            shapes += [sub_shapes_map.FindKey(i) for i in range(1, sub_shapes_map.Size() + 1)]
+        serialized = [_serialize(a_shape) for a_shape in shapes]
+        offset = _HEADER.size + len(serialized) * _ENTRY.size
+        entries = []
+        for data, location_index, orientation in serialized:
+            entries.append((offset, len(data), location_index, orientation))
+            offset += len(data)
+        total_size = offset
+
+        self._filename = filename
+        self._owner = True
+        if filename is None:
+            self._memory = shared_memory.SharedMemory(create=True, size=total_size)
+            self._name = self._memory.name
+            self._tracker_pid = _resource_tracker_pid()
+            buffer = self._memory.buf
+        else:
+            self._name = os.path.abspath(filename)
+            self._tracker_pid = None
+            with open(self._name, "wb") as shape_file:
+                shape_file.truncate(total_size)
+            self._open_file_mapping(access=mmap.ACCESS_WRITE)
+            buffer = self._memory
+        _HEADER.pack_into(buffer, 0, _MAGIC, len(entries))
+        for i, entry in enumerate(entries):
+            _ENTRY.pack_into(buffer, _HEADER.size + i * _ENTRY.size, *entry)
+        for (entry_offset, size, _, _), (data, _, _) in zip(entries, serialized):
+            buffer[entry_offset:entry_offset + size] = data
+        self._entries = entries
+        self._shapes = {0: shape}  # the deserialized shapes, by entry index
+
+    def _open_file_mapping(self, access) -> None:
+        with open(self._name, "r+b" if access == mmap.ACCESS_WRITE else "rb") as shape_file:
+            self._memory = mmap.mmap(shape_file.fileno(), 0, access=access)
+
+    def _attach(self) -> None:
+        """ attaches to the shared block, in a worker """
+        if self._filename is None:
+            if _HAVE_UNTRACKED_SHARED_MEMORY:
+                self._memory = shared_memory.SharedMemory(name=self._name, track=False)
+            else:
+                self._memory = shared_memory.SharedMemory(name=self._name)
+                # the block is registered to the resource tracker of this process.
+                # Workers usually share the tracker of the creating process, which
+                # keeps the registration until the block is unlinked. A tracker of
+                # this process would unlink the block when this process exits.
+                tracker_pid = _resource_tracker_pid()
+                if tracker_pid is not None and tracker_pid != self._tracker_pid:
+                    from multiprocessing import resource_tracker
+                    resource_tracker.unregister(self._memory._name, "shared_memory")
+            buffer = self._memory.buf
+        else:
+            self._open_file_mapping(access=mmap.ACCESS_READ)
+            buffer = self._memory
+        magic, nbr_entries = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC:
+            raise AssertionError("%s is not a shared shape." % self._name)
+        self._entries = [_ENTRY.unpack_from(buffer, _HEADER.size + i * _ENTRY.size)
+                         for i in range(nbr_entries)]
+
+    def __getstate__(self) -> Dict:
+        # only the name is sent to the workers
+        return {"name": self._name, "filename": self._filename, "tracker_pid": self._tracker_pid}
+
+    def __setstate__(self, state: Dict) -> None:
+        self._name = state["name"]
+        self._filename = state["filename"]
+        self._tracker_pid = state["tracker_pid"]
+        self._owner = False
+        self._memory = None
+        self._entries = None
+        self._shapes = {}
+
+    def __enter__(self) -> "SharedShape":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def name(self) -> str:
+        """ the name of the shared memory block, or the path of the file """
+        return self._name
+
+    def _get(self, index: int) -> TopoDS_Shape:
+        if index not in self._shapes:
+            if self._memory is None:
+                self._attach()
+            if not 0 <= index < len(self._entries):
+                raise IndexError("index must be between 0 and %i." % (len(self._entries) - 1))
+            offset, size, location_index, orientation = self._entries[index]
+            buffer = self._memory.buf if self._filename is None else memoryview(self._memory)
+            data = buffer[offset:offset + size]
+            try:
+                self._shapes[index] = _deserialize(data, location_index, orientation)
+            finally:
+                data.release()
+                if self._filename is not None:
+                    buffer.release()
+        return self._shapes[index]
+
+    def __len__(self) -> int:
+        """ the number of sub-shapes """
+        if self._entries is None:
+            self._attach()
+        return len(self._entries) - 1
+
+    def shape(self) -> TopoDS_Shape:
+        """ returns the whole shape, deserialized on the first call """
+        return self._get(0)
+
+    def sub_shape(self, index: int) -> TopoDS_Shape:
+        """ returns the sub-shape of this index, from 1 to len(self), in the
+        TopExp::MapShapes order. Only this sub-shape is deserialized.
+        """
+        if index < 1:
+            raise IndexError("sub-shape indices start at 1.")
+        return self._get(index)
+
+    def sub_shapes(self, first: int, last: int) -> Iterator[TopoDS_Shape]:
+        """ yields the sub-shapes from index first to last, excluded """
+        for index in range(first, last):
+            yield self.sub_shape(index)
+
+    def index_ranges(self, nbr_chunks: int) -> List[Tuple[int, int]]:
+        """ splits the sub-shape indices in at most nbr_chunks (first, last)
+        ranges of the same size, last being excluded
+        """
+        nbr_sub_shapes = len(self)
+        nbr_chunks = max(1, min(nbr_chunks, nbr_sub_shapes))
+        bounds = [1 + (nbr_sub_shapes * k) // nbr_chunks for k in range(nbr_chunks + 1)]
+        return [(bounds[k], bounds[k + 1]) for k in range(nbr_chunks) if bounds[k] < bounds[k + 1]]
+
+    def forget(self) -> None:
+        """ releases the deserialized shapes of this process """
+        self._shapes = {}
+
+    def close(self) -> None:
+        """ detaches from the shared block. In the creating process, the
+        shared memory block (or the file) is also removed.
+        """
+        self._shapes = {}
+        if self._memory is not None:
+            if self._owner and self._filename is None:
+                self._memory.unlink()
+            self._memory.close()
+            self._memory = None
+        if self._owner and self._filename is not None and os.path.isfile(self._name):
+            os.remove(self._name)
+        self._owner = False
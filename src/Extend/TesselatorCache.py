@@ -0,0 +1,237 @@
+##Copyright 2020 Thomas Paviot (tpaviot@gmail.com)
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+""" A process wide LRU cache of computed ShapeTesselator instances.
+
+Tesselating a shape is expensive. Renderers displaying the same shape twice
+(or a shape already displayed by another renderer) can get the tesselator
+from the cache instead of meshing the shape again.
+
+Shapes are identified by their hash (TShape and Location) and checked with
+IsEqual: the tesselator output is expressed in the global coordinate system,
+two shapes sharing the same TShape with different locations (IsPartner)
+result in different meshes.
+
+BRepMesh stores the triangulation in the shape. A miss replaces it by the
+mesh at the requested mesh_quality, so that an entry never holds a mesh of
+another quality. Shapes sharing faces or edges (a solid and one of its
+faces, two compounds of the same solids, or the same shape at two
+locations) are meshed one at a time. Threads missing the same entry at the
+same time wait for the tesselator computed by the first one.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import Future
+import threading
+from typing import Dict, Optional
+
+from OCC.Core.TopAbs import TopAbs_FACE, TopAbs_EDGE
+from OCC.Core.TopExp import TopExp_Explorer
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.TopoDS import TopoDS_Shape
+from OCC.Core.Tesselator import ShapeTesselator
+
+# default memory cap, in bytes
+DEFAULT_MAX_MEMORY = 512 * 1024 * 1024
+
+
+def estimate_tesselator_memory(tess: ShapeTesselator) -> int:
+    """ returns an estimation of the memory used by a computed tesselator, in bytes:
+    nodes and normals (double and float32), indices (int and uint32), unrolled
+    float32 vertices and normals, and edge polylines.
+    """
+    nbr_vertices = tess.ObjGetVertexCount()
+    nbr_triangles = tess.ObjGetTriangleCount()
+    nbr_edge_vertices = sum(tess.ObjEdgeGetVertexCount(i) for i in range(tess.ObjGetEdgeCount()))
+    return nbr_vertices * 72 + nbr_triangles * 96 + nbr_edge_vertices * 24
+
+
+def _mesh_keys(shape):
+    """ returns the hashes of the shape, its faces and its edges, whatever
+    their location: BRepMesh writes the triangulation of the faces and the
+    polygons of the edges, shared by all the shapes that contain them.
+    """
+    no_location = TopLoc_Location()
+    keys = {hash(shape.Located(no_location))}
+    for shape_type in (TopAbs_FACE, TopAbs_EDGE):
+        explorer = TopExp_Explorer(shape, shape_type)
+        while explorer.More():
+            keys.add(hash(explorer.Current().Located(no_location)))
+            explorer.Next()
+    return keys
+
+
+class TesselatorCache:
+    """ LRU cache of computed tesselators, keyed by the shape identity
+    and the mesh parameters. When the memory estimation of all cached
+    tesselators exceeds max_memory, the least recently used ones are evicted.
+    If max_memory is None, the cache is not bounded.
+    """
+    def __init__(self, max_memory: Optional[int] = DEFAULT_MAX_MEMORY) -> None:
+        self._max_memory = max_memory
+        self._entries = OrderedDict()  # key: [shape, tesselator, memory]
+        self._memory = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.RLock()
+        # the (shape, future) of the tesselators being computed, by key
+        self._computing = {}
+        # the mesh keys of the shapes being meshed, a shape is meshed once
+        # none of its faces and edges is being meshed by another thread
+        self._meshing = set()
+        self._meshing_done = threading.Condition(self._lock)
+
+    @property
+    def max_memory(self) -> Optional[int]:
+        return self._max_memory
+
+    @max_memory.setter
+    def max_memory(self, value: Optional[int]) -> None:
+        with self._lock:
+            self._max_memory = value
+            self._evict()
+
+    def _find(self, shape, compute_edges, mesh_quality):
+        # an entry computed with edges can be used if edges are not required
+        edges_flags = [True] if compute_edges else [False, True]
+        for edges_flag in edges_flags:
+            key = (hash(shape), edges_flag, mesh_quality)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0].IsEqual(shape):
+                return key, entry[1]
+        return None, None
+
+    def _forget_computing(self, key, future) -> None:
+        if self._computing.get(key, (None, None))[1] is future:
+            del self._computing[key]
+
+    def _evict(self) -> None:
+        if self._max_memory is None:
+            return
+        while self._entries and self._memory > self._max_memory:
+            _, (_, _, memory) = self._entries.popitem(last=False)
+            self._memory -= memory
+            self._evictions += 1
+
+    def get(self,
+            shape: TopoDS_Shape,
+            compute_edges: Optional[bool] = False,
+            mesh_quality: Optional[float] = 1.0,
+            parallel: Optional[bool] = False) -> ShapeTesselator:
+        """ returns a computed tesselator for this shape and these mesh
+        parameters. The tesselator is computed only if not found in the cache.
+        The returned tesselator is shared, it must not be modified.
+        """
+        if shape.IsNull():
+            raise AssertionError("Shape is null.")
+        with self._lock:
+            key, tess = self._find(shape, compute_edges, mesh_quality)
+            if tess is not None:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return tess
+            key = (hash(shape), bool(compute_edges), mesh_quality)
+            computing_shape, future = self._computing.get(key, (None, None))
+            if future is not None and computing_shape.IsEqual(shape):
+                # being computed by another thread, not computed twice
+                self._hits += 1
+                computing = False
+            else:
+                self._misses += 1
+                computing = True
+                future = Future()
+                if computing_shape is None:
+                    self._computing[key] = (shape, future)
+        if not computing:
+            return future.result()
+        # tesselate outside the cache lock, so that other threads are not blocked
+        try:
+            mesh_keys = _mesh_keys(shape)
+            with self._meshing_done:
+                self._meshing_done.wait_for(lambda: self._meshing.isdisjoint(mesh_keys))
+                self._meshing |= mesh_keys
+            try:
+                tess = ShapeTesselator(shape)
+                tess.Compute(compute_edges=compute_edges,
+                             mesh_quality=mesh_quality,
+                             parallel=parallel)
+            finally:
+                with self._meshing_done:
+                    self._meshing -= mesh_keys
+                    self._meshing_done.notify_all()
+            memory = estimate_tesselator_memory(tess)
+        except BaseException as error:
+            with self._lock:
+                self._forget_computing(key, future)
+            future.set_exception(error)
+            raise
+        with self._lock:
+            self._forget_computing(key, future)
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._memory -= previous[2]
+            # a tesselator bigger than the cache is returned, but not stored
+            if self._max_memory is None or memory <= self._max_memory:
+                self._entries[key] = [shape, tess, memory]
+                self._memory += memory
+                self._evict()
+        future.set_result(tess)
+        return tess
+
+    def clear(self) -> None:
+        """ removes all tesselators from the cache, and resets statistics
+        """
+        with self._lock:
+            self._entries.clear()
+            self._memory = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """ returns a dict with the number of hits, misses, evictions,
+        the number of cached tesselators and their estimated memory
+        """
+        with self._lock:
+            return {"hits": self._hits,
+                    "misses": self._misses,
+                    "evictions": self._evictions,
+                    "entries": len(self._entries),
+                    "memory": self._memory,
+                    "max_memory": self._max_memory}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# the process wide cache
+_tesselator_cache = TesselatorCache()
+
+
+def get_tesselator_cache() -> TesselatorCache:
+    """ returns the process wide tesselator cache """
+    return _tesselator_cache
+
+
+def get_tesselator(shape: TopoDS_Shape,
+                   compute_edges: Optional[bool] = False,
+                   mesh_quality: Optional[float] = 1.0,
+                   parallel: Optional[bool] = False) -> ShapeTesselator:
+    """ returns a computed tesselator for the shape, from the process wide cache
+    """
+    return _tesselator_cache.get(shape, compute_edges, mesh_quality, parallel)
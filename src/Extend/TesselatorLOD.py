@@ -0,0 +1,147 @@
+##Copyright 2020 Thomas Paviot (tpaviot@gmail.com)
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+""" Level of detail (LOD) tesselation.
+
+A TesselatorLOD is a pyramid of tesselations of the same shape, at
+geometrically spaced deflections: level 0 is the coarsest one, each level
+being ratio times finer than the previous one, the last level being
+tesselated at mesh_quality. Levels are computed on demand, from the coarsest
+to the finest: each level reuses the faces of the previous one whose
+triangulation does not depend on the deflection (see ShapeTesselator.Refine).
+
+Renderers display the coarsest level first, which is cheap, and switch to
+finer levels when the shape gets bigger on screen.
+"""
+
+import math
+from typing import Iterator, List, Optional, Tuple
+
+from OCC.Core.Bnd import Bnd_Box
+from OCC.Core.BRepBndLib import brepbndlib_Add
+from OCC.Core.TopoDS import TopoDS_Shape
+from OCC.Core.Tesselator import ShapeTesselator
+
+DEFAULT_NBR_LEVELS = 3
+DEFAULT_RATIO = 4.
+
+
+def lod_mesh_qualities(nbr_levels: int,
+                       ratio: Optional[float] = DEFAULT_RATIO,
+                       mesh_quality: Optional[float] = 1.0) -> List[float]:
+    """ returns the mesh_quality of each level, from the coarsest to the finest
+    """
+    if nbr_levels < 1:
+        raise AssertionError("nbr_levels must be at least 1.")
+    if ratio <= 1.:
+        raise AssertionError("ratio must be greater than 1.")
+    return [mesh_quality * ratio ** (nbr_levels - 1 - level) for level in range(nbr_levels)]
+
+
+class TesselatorLOD:
+    """ a pyramid of tesselators of the same shape, level 0 being the coarsest
+    shape: the TopoDS_Shape to tesselate
+    nbr_levels: optional, the number of levels
+    ratio: optional, the deflection ratio between two consecutive levels
+    mesh_quality: optional, the mesh_quality of the finest level, see ShapeTesselator.Compute
+    compute_edges, parallel: optional, see ShapeTesselator.Compute
+    """
+    def __init__(self,
+                 shape: TopoDS_Shape,
+                 nbr_levels: Optional[int] = DEFAULT_NBR_LEVELS,
+                 ratio: Optional[float] = DEFAULT_RATIO,
+                 mesh_quality: Optional[float] = 1.0,
+                 compute_edges: Optional[bool] = False,
+                 parallel: Optional[bool] = False) -> None:
+        if shape.IsNull():
+            raise AssertionError("Shape is null.")
+        self._shape = shape
+        self._ratio = ratio
+        self._mesh_qualities = lod_mesh_qualities(nbr_levels, ratio, mesh_quality)
+        self._compute_edges = compute_edges
+        self._parallel = parallel
+        self._levels = []  # the computed tesselators, from the coarsest
+        self._bounding_sphere = None
+
+    def __len__(self) -> int:
+        return len(self._mesh_qualities)
+
+    @property
+    def mesh_qualities(self) -> List[float]:
+        return list(self._mesh_qualities)
+
+    def is_computed(self, level: int) -> bool:
+        return level < len(self._levels)
+
+    def get_level(self, level: int) -> ShapeTesselator:
+        """ returns the computed tesselator of this level. The coarser levels
+        are computed first if required.
+        """
+        if not 0 <= level < len(self):
+            raise IndexError("level must be between 0 and %i." % (len(self) - 1))
+        while len(self._levels) <= level:
+            mesh_quality = self._mesh_qualities[len(self._levels)]
+            tess = ShapeTesselator(self._shape)
+            if not self._levels:
+                tess.Compute(compute_edges=self._compute_edges,
+                             mesh_quality=mesh_quality,
+                             parallel=self._parallel)
+            else:
+                tess.Refine(self._levels[-1],
+                            compute_edges=self._compute_edges,
+                            mesh_quality=mesh_quality,
+                            parallel=self._parallel)
+            self._levels.append(tess)
+        return self._levels[level]
+
+    def iter_levels(self) -> Iterator[Tuple[int, ShapeTesselator]]:
+        """ yields the (level, tesselator) tuples, from the coarsest level.
+        Each level is computed when requested, so that the coarser ones can
+        be used while the finer ones are not computed yet.
+        """
+        for level in range(len(self)):
+            yield level, self.get_level(level)
+
+    def screen_fractions(self) -> List[float]:
+        """ returns, for each level, the fraction of the view height covered by
+        the bounding sphere of the shape from which this level is used. The
+        finest level is used from 1 / ratio, each coarser level from a ratio
+        times smaller fraction, the coarsest level being used down to 0.
+        """
+        nbr_levels = len(self)
+        return [0.] + [self._ratio ** (level - nbr_levels) for level in range(1, nbr_levels)]
+
+    def select_level(self, screen_fraction: float) -> int:
+        """ returns the level to display when the bounding sphere of the shape
+        covers screen_fraction of the view height
+        """
+        selected_level = 0
+        for level, fraction in enumerate(self.screen_fractions()):
+            if screen_fraction >= fraction:
+                selected_level = level
+        return selected_level
+
+    def bounding_sphere(self) -> Tuple[Tuple[float, float, float], float]:
+        """ returns the (center, radius) of the sphere bounding the shape """
+        if self._bounding_sphere is None:
+            bbox = Bnd_Box()
+            brepbndlib_Add(self._shape, bbox)
+            xmin, ymin, zmin, xmax, ymax, zmax = bbox.Get()
+            center = ((xmin + xmax) / 2., (ymin + ymax) / 2., (zmin + zmax) / 2.)
+            radius = math.sqrt((xmax - xmin) ** 2 + (ymax - ymin) ** 2 + (zmax - zmin) ** 2) / 2.
+            self._bounding_sphere = (center, radius)
+        return self._bounding_sphere
@@ -17,7 +17,7 @@
 ##You should have received a copy of the GNU Lesser General Public License
 ##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from OCC.Core.BRep import BRep_Tool, BRep_Builder
 from OCC.Core.BRepTools import BRepTools_WireExplorer
@@ -28,16 +28,14 @@ from OCC.Core.TopAbs import (TopAbs_VERTEX, TopAbs_EDGE, TopAbs_FACE, TopAbs_WIR
                              TopAbs_SHELL, TopAbs_SOLID, TopAbs_COMPOUND,
                              TopAbs_COMPSOLID, TopAbs_ShapeEnum)
 from OCC.Core.TopExp import TopExp_Explorer, topexp_MapShapesAndAncestors
+from OCC.Core.TopLoc import TopLoc_Location
 from OCC.Core.TopTools import (TopTools_ListIteratorOfListOfShape,
                                TopTools_IndexedDataMapOfShapeListOfShape)
 from OCC.Core.TopoDS import (topods, TopoDS_Wire, TopoDS_Vertex, TopoDS_Edge,
                              TopoDS_Face, TopoDS_Shell, TopoDS_Solid, TopoDS_Shape,
                              TopoDS_Compound, TopoDS_CompSolid, topods_Edge,
                              topods_Vertex, TopoDS_Iterator)
-from OCC.Core.GCPnts import (GCPnts_UniformAbscissa,
-                             GCPnts_QuasiUniformDeflection,
-                             GCPnts_UniformDeflection)
-from OCC.Core.BRepAdaptor import BRepAdaptor_Curve
+from OCC.Core.Tesselator import TopologyGraph, EdgeDiscretizer
 
 
 class WireExplorer:
@@ -115,6 +113,11 @@ class TopologyExplorer:
         """
         self.myShape = myShape
         self.ignore_orientation = ignore_orientation
+        # the (topoTypeA, topoTypeB) ancestors maps, computed on demand
+        self._ancestors_maps: Dict[Tuple[TopAbs_ShapeEnum, TopAbs_ShapeEnum],
+                                   TopTools_IndexedDataMapOfShapeListOfShape] = {}
+        # the TopologyGraph, computed on demand
+        self._graph: Optional[TopologyGraph] = None
 
         # the topoFactory dicts maps topology types and functions that can
         # create this topology
@@ -161,29 +164,32 @@ class TopologyExplorer:
             topExp.Init(topologicalEntity,
                         topologyType,
                         topologyTypeToAvoid)
-        seq = []
+        return self._iter_explorer(topExp, self.topoFactory[topologyType])
+
+    def _iter_explorer(self, topExp: TopExp_Explorer, topo_factory) -> Iterator[Any]:
+        '''
+        lazily yields the shapes found by the explorer, so that
+        callers breaking early don't pay for the full walk
+        '''
+        if not self.ignore_orientation:
+            while topExp.More():
+                yield topo_factory(topExp.Current())
+                topExp.Next()
+            return
+        # filter out those entities that share the same TShape
+        # but do *not* share the same orientation.
+        # shapes are bucketed by their hash (TShape and Location, which is
+        # what IsSame compares), so that each shape is only compared to
+        # the few shapes with the same hash: O(n) instead of O(n^2)
+        already_yielded: Dict[int, List] = {}
         while topExp.More():
             current_item = topExp.Current()
-            topo_to_add = self.topoFactory[topologyType](current_item)
-            seq.append(topo_to_add)
             topExp.Next()
-
-        if self.ignore_orientation:
-            # filter out those entities that share the same TShape
-            # but do *not* share the same orientation
-            #filter_orientation_seq = []
-            filter_orientation_seq: List = []
-            for i in seq:
-                _present = False
-                for j in filter_orientation_seq:
-                    if i.IsSame(j):
-                        _present = True
-                        break
-                if _present is False:
-                    filter_orientation_seq.append(i)
-            return iter(filter_orientation_seq)
-        else:
-            return iter(seq)
+            bucket = already_yielded.setdefault(hash(current_item), [])
+            if any(current_item.IsSame(shape) for shape in bucket):
+                continue
+            bucket.append(current_item)
+            yield topo_factory(current_item)
 
     def faces(self) -> Iterator[TopoDS_Face]:
         '''
@@ -283,6 +289,44 @@ class TopologyExplorer:
     def number_of_ordered_edges_from_wire(self, wire: TopoDS_Wire) -> int:
         return self._number_of_topo(self.ordered_edges_from_wire(wire))
 
+    def _ancestors_map(self, topoTypeA, topoTypeB) -> TopTools_IndexedDataMapOfShapeListOfShape:
+        '''
+        returns the map of the topoTypeB ancestors of each topoTypeA sub-shape.
+        The map is computed the first time it is required, then reused
+        until invalidate() is called
+        '''
+        key = (topoTypeA, topoTypeB)
+        if key not in self._ancestors_maps:
+            _map = TopTools_IndexedDataMapOfShapeListOfShape()
+            topexp_MapShapesAndAncestors(self.myShape, topoTypeA, topoTypeB, _map)
+            self._ancestors_maps[key] = _map
+        return self._ancestors_maps[key]
+
+    def invalidate(self) -> None:
+        '''
+        clears the cached ancestors maps and topology graph. Must be called if
+        the shape (or self.myShape) is modified after the first *_from_* query
+        '''
+        self._ancestors_maps = {}
+        self._graph = None
+
+    def to_graph(self) -> TopologyGraph:
+        '''
+        returns the face/edge/vertex adjacency of the shape as a TopologyGraph,
+        computed in one pass in C++. The graph provides CSR (offsets, indices)
+        int32 numpy arrays:
+            GetFaceEdgesAsArrays(), GetEdgeFacesAsArrays(),
+            GetEdgeVerticesAsArrays(), GetVertexEdgesAsArrays(),
+            GetFaceAdjacencyAsArrays()
+        and the index <-> shape lookups Face(i), Edge(i), Vertex(i),
+        FaceIndex(face), EdgeIndex(edge), VertexIndex(vertex).
+        Faces, edges and vertices are numbered in the order they are returned
+        by faces(), edges() and vertices() with ignore_orientation=True
+        '''
+        if self._graph is None:
+            self._graph = TopologyGraph(self.myShape)
+        return self._graph
+
     def _map_shapes_and_ancestors(self, topoTypeA, topoTypeB, topologicalEntity):
         '''
         using the same method
@@ -291,9 +335,7 @@ class TopologyExplorer:
         @param topologicalEntity:
         '''
         topo_set = set()
-        _map = TopTools_IndexedDataMapOfShapeListOfShape()
-        topexp_MapShapesAndAncestors(self.myShape, topoTypeA, topoTypeB, _map)
-        results = _map.FindFromKey(topologicalEntity)
+        results = self._ancestors_map(topoTypeA, topoTypeB).FindFromKey(topologicalEntity)
         if results.Size() == 0:
             yield None
 
@@ -328,9 +370,7 @@ class TopologyExplorer:
         @param topologicalEntity:
         '''
         topo_set = set()
-        _map = TopTools_IndexedDataMapOfShapeListOfShape()
-        topexp_MapShapesAndAncestors(self.myShape, topoTypeA, topoTypeB, _map)
-        results = _map.FindFromKey(topologicalEntity)
+        results = self._ancestors_map(topoTypeA, topoTypeB).FindFromKey(topologicalEntity)
         if results.Size() == 0:
             return None
         topology_iterator = TopTools_ListIteratorOfListOfShape(results)
@@ -490,17 +530,46 @@ def dump_topology_to_string(shape: TopoDS_Shape,
 # Edge and wire discretizers
 #
 
+DISCRETIZER_ALGORITHMS = {"QuasiUniformDeflection": EdgeDiscretizer.QuasiUniformDeflection,
+                          "UniformAbscissa": EdgeDiscretizer.UniformAbscissa,
+                          "UniformDeflection": EdgeDiscretizer.UniformDeflection}
+
+
+def _compute_edge_discretizer(shapes, deflection, algorithm) -> EdgeDiscretizer:
+    if algorithm not in DISCRETIZER_ALGORITHMS:
+        raise AssertionError("Unknown algorithm")
+    if isinstance(shapes, TopoDS_Shape):
+        shapes = [shapes]
+    discretizer = EdgeDiscretizer()
+    for shape in shapes:
+        discretizer.AddShape(shape)
+    discretizer.Compute(deflection, DISCRETIZER_ALGORITHMS[algorithm])
+    return discretizer
+
+
+def discretize_edges(shapes, deflection=0.2, algorithm="QuasiUniformDeflection"):
+    """ Discretizes a batch of edges, the sampling loop running in C++.
+    shapes: a TopoDS_Shape or a list of TopoDS_Shape. Edges are taken as is,
+            wires are explored in connection order, other shapes contribute
+            all their edges.
+    Returns (points, offsets): a float64 numpy array of shape (N, 3), and an int32
+    array of n_edges + 1 offsets. The points of the i-th edge are
+    points[offsets[i]:offsets[i + 1]]. Degenerated edges have no points.
+    """
+    discretizer = _compute_edge_discretizer(shapes, deflection, algorithm)
+    return discretizer.GetPointsAsArray(), discretizer.GetOffsetsAsArray()
+
+
 def discretize_wire(a_topods_wire: TopoDS_Wire, deflection: Optional[int]=0.5) -> List[gp_Pnt]:
     """ Returns a set of points
     """
     if not is_wire(a_topods_wire):
         raise AssertionError("You must provide a TopoDS_Wire to the discretize_wire function.")
-    wire_explorer = WireExplorer(a_topods_wire)
+    discretizer = _compute_edge_discretizer(a_topods_wire, deflection, "QuasiUniformDeflection")
     wire_pnts = []
     # loop over ordered edges
-    for edg in wire_explorer.ordered_edges():
-        edg_pnts = discretize_edge(edg, deflection)
-        wire_pnts += edg_pnts
+    for i in range(discretizer.NbEdges()):
+        wire_pnts += discretizer.GetEdgePoints(i)
     return wire_pnts
 
 
@@ -515,30 +584,10 @@ def discretize_edge(a_topods_edge: TopoDS_Edge, deflection=0.2, algorithm="Quasi
     if a_topods_edge.IsNull():
         print("Warning : TopoDS_Edge is null. discretize_edge will return an empty list of points.")
         return []
-    curve_adaptator = BRepAdaptor_Curve(a_topods_edge)
-    first = curve_adaptator.FirstParameter()
-    last = curve_adaptator.LastParameter()
-
-    if algorithm == "QuasiUniformDeflection":
-        discretizer = GCPnts_QuasiUniformDeflection()
-    elif algorithm == "UniformAbscissa":
-        discretizer = GCPnts_UniformAbscissa()
-    elif algorithm == "UniformDeflection":
-        discretizer = GCPnts_UniformDeflection()
-    else:
-        raise AssertionError("Unknown algorithm")
-    discretizer.Initialize(curve_adaptator, deflection, first, last)
-
-    if not discretizer.IsDone():
-        raise AssertionError("Discretizer not done.")
+    discretizer = _compute_edge_discretizer(a_topods_edge, deflection, algorithm)
     if not discretizer.NbPoints() > 0:
         raise AssertionError("Discretizer nb points not > 0.")
-
-    points = []
-    for i in range(1, discretizer.NbPoints() + 1):
-        p = curve_adaptator.Value(discretizer.Parameter(i))
-        points.append(p.Coord())
-    return points
+    return discretizer.GetEdgePoints(0)
 
 #
 # TopoDS_Shape type utils
@@ -664,3 +713,35 @@ def list_of_shapes_to_compound(list_of_shapes: List[TopoDS_Shape]) -> Tuple[Topo
         else:
             the_builder.Add(the_compound, shp)
     return the_compound, all_shapes_converted
+
+
+def group_shapes_sharing_subshapes(list_of_shapes: List[TopoDS_Shape]) -> List[List[int]]:
+    """ returns the indices of the shapes of list_of_shapes, gathered in groups:
+    two shapes sharing a face or an edge (the same TShape, whatever the location)
+    are in the same group. BRepMesh stores the triangulation in the faces and the
+    polygons in the edges, and the edge curves are discretized: shapes of
+    different groups can safely be meshed from different threads.
+    """
+    parents = list(range(len(list_of_shapes)))
+
+    def _root(index):
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    # the index of the first shape that contains each face or edge
+    owners = {}
+    null_location = TopLoc_Location()
+    for index, shape in enumerate(list_of_shapes):
+        for shape_type in (TopAbs_FACE, TopAbs_EDGE):
+            explorer = TopExp_Explorer(shape, shape_type)
+            while explorer.More():
+                # the hash of an unlocated sub-shape only depends on its TShape
+                owner = owners.setdefault(hash(explorer.Current().Located(null_location)), index)
+                parents[_root(owner)] = _root(index)
+                explorer.Next()
+    groups = {}
+    for index in range(len(list_of_shapes)):
+        groups.setdefault(_root(index), []).append(index)
+    return list(groups.values())
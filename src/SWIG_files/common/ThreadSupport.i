@@ -0,0 +1,36 @@
+/*
+
+Copyright 2008-2020 Thomas Paviot (tpaviot@gmail.com)
+
+This file is part of pythonOCC.
+
+pythonOCC is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+pythonOCC is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+*/
+
+/*
+Python threads support. It only applies to the modules built with the
+-threads SWIG option (see CMakeLists.txt), the other modules hold the GIL.
+
+The GIL is held by default. It is only released by the long running
+translators, which do not use the Python API. The STEP and IGES file
+parsers (ReadFile, and STEPCAFControl_Reader::Perform which calls it) use
+static buffers and are not reentrant: they keep the GIL, so that files are
+parsed by one thread at a time.
+*/
+%nothread;
+%thread XSControl_Reader::TransferOneRoot;
+%thread XSControl_Reader::TransferRoots;
+%thread STEPControl_Reader::TransferRoot;
+%thread STEPCAFControl_Reader::Transfer;
@@ -679,6 +679,27 @@ TopoDS_Shape
 	}
 };
 
+/* binary content as python bytes: the std::string typemaps decode strings as utf-8 */
+%extend BinTools_ShapeSet {
+	PyObject* WriteToBytes() {
+		std::ostringstream s(std::ios::out | std::ios::binary);
+		self->Write(s);
+		const std::string data = s.str();
+		return PyBytes_FromStringAndSize(data.data(), data.size());
+	}
+	PyObject* ReadFromBytes(PyObject* src) {
+		Py_buffer view;
+		if (PyObject_GetBuffer(src, &view, PyBUF_SIMPLE) != 0) {
+			return NULL;
+		}
+		std::istringstream s(std::string((const char*)view.buf, view.len),
+		                     std::ios::in | std::ios::binary);
+		PyBuffer_Release(&view);
+		self->Read(s);
+		Py_RETURN_NONE;
+	}
+};
+
 /****************************
 * class BinTools_SurfaceSet *
 ****************************/
@@ -60,6 +60,26 @@ from enum import IntEnum
 from OCC.Core.Exception import *
 };
 
+%pythoncode {
+# TopoDS_Shape pickling. Version 1 is the text BRep format, version 2 the
+# binary BRep format (BinTools), optionally compressed with zlib.
+# The OCCT 7.4 binary format does not carry the triangulations, which the
+# text format did: an unpickled shape has to be meshed again.
+_PICKLE_VERSION = 2
+_pickle_compression_level = 0
+
+def set_pickle_compression_level(level):
+	""" sets the zlib compression level of pickled shapes, from 0 (no
+	compression, the default) to 9. Compressed pickles are smaller, which
+	is faster to send between processes on slow links, but take longer to
+	dump and load.
+	"""
+	global _pickle_compression_level
+	if not 0 <= level <= 9:
+		raise AssertionError("The compression level must be between 0 and 9.")
+	_pickle_compression_level = level
+};
+
 /* public enums */
 /* end public enums declaration */
 
@@ -1274,17 +1294,40 @@ None
 %extend TopoDS_Shape {
 %pythoncode {
 	def __getstate__(self):
-		from .BRepTools import BRepTools_ShapeSet
-		ss = BRepTools_ShapeSet()
+		from .BinTools import BinTools_ShapeSet
+		ss = BinTools_ShapeSet()
 		ss.Add(self)
-		str_shape = ss.WriteToString()
+		data = ss.WriteToBytes()
+		if _pickle_compression_level > 0:
+			import zlib
+			data = zlib.compress(data, _pickle_compression_level)
 		indx = ss.Locations().Index(self.Location())
-		return str_shape, indx
+		return _PICKLE_VERSION, data, indx, _pickle_compression_level > 0
+	def __reduce_ex__(self, protocol):
+		# with protocol 5, the BRep data can be sent out-of-band
+		version, data, indx, compressed = self.__getstate__()
+		if protocol >= 5:
+			import pickle
+			data = pickle.PickleBuffer(data)
+		import copyreg
+		return copyreg.__newobj__, (type(self),), (version, data, indx, compressed)
 	def __setstate__(self, state):
-		from .BRepTools import BRepTools_ShapeSet
-		topods_str, indx = state
-		ss = BRepTools_ShapeSet()
-		ss.ReadFromString(topods_str)
+		if len(state) == 2:
+			# version 1, text BRep
+			from .BRepTools import BRepTools_ShapeSet
+			topods_str, indx = state
+			ss = BRepTools_ShapeSet()
+			ss.ReadFromString(topods_str)
+		else:
+			from .BinTools import BinTools_ShapeSet
+			version, data, indx, compressed = state
+			if version != _PICKLE_VERSION:
+				raise AssertionError("Unsupported TopoDS_Shape pickle version %s." % version)
+			if compressed:
+				import zlib
+				data = zlib.decompress(data)
+			ss = BinTools_ShapeSet()
+			ss.ReadFromBytes(data)
 		the_shape = ss.Shape(ss.NbShapes())
 		location = ss.Locations().Location(indx)
 		the_shape.Location(location)
@@ -0,0 +1,131 @@
+// Copyright 2020 Thomas Paviot (tpaviot@gmail.com)
+//
+//This file is part of pythonOCC.
+//
+//pythonOCC is free software: you can redistribute it and/or modify
+//it under the terms of the GNU Lesser General Public License as published by
+//the Free Software Foundation, either version 3 of the License, or
+//(at your option) any later version.
+//
+//pythonOCC is distributed in the hope that it will be useful,
+//but WITHOUT ANY WARRANTY; without even the implied warranty of
+//MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+//GNU Lesser General Public License for more details.
+//
+//You should have received a copy of the GNU Lesser General Public License
+//along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+//---------------------------------------------------------------------------
+#include "EdgeDiscretizer.h"
+//---------------------------------------------------------------------------
+#include <BRep_Tool.hxx>
+#include <BRepAdaptor_Curve.hxx>
+#include <BRepTools_WireExplorer.hxx>
+#include <GCPnts_QuasiUniformDeflection.hxx>
+#include <GCPnts_UniformAbscissa.hxx>
+#include <GCPnts_UniformDeflection.hxx>
+#include <Standard_Failure.hxx>
+#include <Standard_OutOfRange.hxx>
+#include <TopExp.hxx>
+#include <TopoDS.hxx>
+#include <TopTools_IndexedMapOfShape.hxx>
+
+//---------------------------------------------------------------------------
+EdgeDiscretizer::EdgeDiscretizer():
+  myPoints(std::make_shared<std::vector<double> >()),
+  myOffsets(std::make_shared<std::vector<int> >(1, 0))
+{
+}
+
+//---------------------------------------------------------------------------
+void EdgeDiscretizer::AddShape(const TopoDS_Shape& aShape)
+{
+    if (aShape.IsNull()) {
+      return;
+    }
+    if (aShape.ShapeType() == TopAbs_EDGE) {
+      myEdges.push_back(TopoDS::Edge(aShape));
+    }
+    else if (aShape.ShapeType() == TopAbs_WIRE) {
+      for (BRepTools_WireExplorer ex(TopoDS::Wire(aShape)); ex.More(); ex.Next()) {
+        myEdges.push_back(ex.Current());
+      }
+    }
+    else {
+      TopTools_IndexedMapOfShape edges;
+      TopExp::MapShapes(aShape, TopAbs_EDGE, edges);
+      for (int i = 1; i <= edges.Extent(); i++) {
+        myEdges.push_back(TopoDS::Edge(edges(i)));
+      }
+    }
+}
+
+//---------------------------------------------------------------------------
+// samples the curve at the parameters computed by the discretizer
+template <typename Discretizer>
+static void SampleCurve(const BRepAdaptor_Curve& aCurve, const Discretizer& aDiscretizer,
+                        std::vector<double>& aPoints)
+{
+    if (!aDiscretizer.IsDone()) {
+      return;
+    }
+    for (int i = 1; i <= aDiscretizer.NbPoints(); i++) {
+      gp_Pnt p = aCurve.Value(aDiscretizer.Parameter(i));
+      aPoints.push_back(p.X());
+      aPoints.push_back(p.Y());
+      aPoints.push_back(p.Z());
+    }
+}
+
+void EdgeDiscretizer::Compute(double aDeflection, int anAlgorithm)
+{
+    std::shared_ptr<std::vector<double> > points = std::make_shared<std::vector<double> >();
+    std::shared_ptr<std::vector<int> > offsets = std::make_shared<std::vector<int> >(1, 0);
+    offsets->reserve(myEdges.size() + 1);
+    for (size_t i = 0; i < myEdges.size(); i++) {
+      const TopoDS_Edge& edge = myEdges[i];
+      if (!BRep_Tool::Degenerated(edge)) {
+        try {
+          BRepAdaptor_Curve curve(edge);
+          double first = curve.FirstParameter();
+          double last = curve.LastParameter();
+          switch (anAlgorithm) {
+            case UniformAbscissa:
+              SampleCurve(curve, GCPnts_UniformAbscissa(curve, aDeflection, first, last), *points);
+              break;
+            case UniformDeflection:
+              SampleCurve(curve, GCPnts_UniformDeflection(curve, aDeflection, first, last), *points);
+              break;
+            default:
+              SampleCurve(curve, GCPnts_QuasiUniformDeflection(curve, aDeflection, first, last), *points);
+          }
+        }
+        catch (Standard_Failure const&) {
+          // drop the points of this edge that were already added
+          points->resize(offsets->back() * 3);
+        }
+      }
+      offsets->push_back((int)(points->size() / 3));
+    }
+    myPoints = points;
+    myOffsets = offsets;
+}
+
+//---------------------------------------------------------------------------
+int EdgeDiscretizer::NbEdges() const
+{
+    return (int)myEdges.size();
+}
+
+int EdgeDiscretizer::NbPoints() const
+{
+    return (int)(myPoints->size() / 3);
+}
+
+TopoDS_Edge EdgeDiscretizer::Edge(int anIndex) const
+{
+    if (anIndex < 0 || anIndex >= (int)myEdges.size()) {
+      throw Standard_OutOfRange("EdgeDiscretizer::Edge, index out of range");
+    }
+    return myEdges[anIndex];
+}
@@ -0,0 +1,57 @@
+// Copyright 2020 Thomas Paviot (tpaviot@gmail.com)
+//
+//This file is part of pythonOCC.
+//
+//pythonOCC is free software: you can redistribute it and/or modify
+//it under the terms of the GNU Lesser General Public License as published by
+//the Free Software Foundation, either version 3 of the License, or
+//(at your option) any later version.
+//
+//pythonOCC is distributed in the hope that it will be useful,
+//but WITHOUT ANY WARRANTY; without even the implied warranty of
+//MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+//GNU Lesser General Public License for more details.
+//
+//You should have received a copy of the GNU Lesser General Public License
+//along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+//---------------------------------------------------------------------------
+#ifndef EdgeDiscretizerH
+#define EdgeDiscretizerH
+//---------------------------------------------------------------------------
+#include <memory>
+#include <vector>
+//---------------------------------------------------------------------------
+#include <TopoDS_Shape.hxx>
+#include <TopoDS_Edge.hxx>
+//---------------------------------------------------------------------------
+// Discretizes a set of edges in one batch. All the points are stored in
+// a single float64 buffer (x, y, z for each point), the points of edge i
+// are the points Offsets()[i] to Offsets()[i + 1] - 1.
+// The buffers are shared, Compute replaces them instead of modifying them:
+// the python arrays viewing a previous result stay valid.
+class EdgeDiscretizer
+{
+  protected:
+      std::vector<TopoDS_Edge> myEdges;
+      std::shared_ptr<std::vector<double> > myPoints;
+      std::shared_ptr<std::vector<int> > myOffsets;
+
+  public:
+      // algorithms
+      enum {QuasiUniformDeflection = 0, UniformAbscissa = 1, UniformDeflection = 2};
+      EdgeDiscretizer();
+      // adds the edges of the shape: the edge itself, the edges of a wire
+      // in connection order, or all the edges of any other shape
+      void AddShape(const TopoDS_Shape& aShape);
+      // discretizes all the edges. Degenerated edges, and edges that can't be
+      // discretized, have no points
+      void Compute(double aDeflection, int anAlgorithm);
+      int NbEdges() const;
+      int NbPoints() const;
+      TopoDS_Edge Edge(int anIndex) const;
+      std::shared_ptr<const std::vector<double> > Points() const {return myPoints;}
+      std::shared_ptr<const std::vector<int> > Offsets() const {return myOffsets;}
+};
+
+#endif
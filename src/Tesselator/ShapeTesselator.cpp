@@ -20,6 +20,9 @@
 #include <sstream>
 #include <algorithm>
 #include <cmath>
+#include <cstdio>
+#include <cstdint>
+#include <cstring>
 #include <iomanip>
 //---------------------------------------------------------------------------
 #include <TopExp_Explorer.hxx>
@@ -37,7 +40,17 @@
 #include <BRepTools.hxx>
 #include <BRepBndLib.hxx>
 #include <BRep_Tool.hxx>
+#include <gp.hxx>
+#include <gp_Vec.hxx>
 #include <TopoDS_Face.hxx>
+#include <TopTools_DataMapOfShapeInteger.hxx>
+#include <Standard_OutOfRange.hxx>
+#include <Standard_DomainError.hxx>
+#include <BRep_Builder.hxx>
+#include <BRepAdaptor_Curve.hxx>
+#include <BRepAdaptor_Surface.hxx>
+#include <TopoDS_Compound.hxx>
+#include <TopoDS_Edge.hxx>
 
 //---------------------------------------------------------------------------
 ShapeTesselator::ShapeTesselator(TopoDS_Shape aShape):
@@ -47,13 +60,15 @@ ShapeTesselator::ShapeTesselator(TopoDS_Shape aShape):
   locTriIndices(NULL),
   computed(false)
 {
+    myFaceRanges = std::make_shared<std::vector<int> >();
+    ClearBuffers();
     ComputeDefaultDeviation();
 }
 
-void ShapeTesselator::Compute(bool compute_edges, float mesh_quality, bool parallel)
+void ShapeTesselator::Compute(bool compute_edges, float mesh_quality, bool parallel, bool keep_triangulation)
 {
     if (!computed) {
-      Tesselate(compute_edges, mesh_quality, parallel);
+      Tesselate(compute_edges, mesh_quality, parallel, keep_triangulation);
     }
     computed=true;
 }
@@ -90,19 +105,209 @@ void ShapeTesselator::SetDeviation(Standard_Real aDeviation)
 
 
 //---------------------------------------------------------------------------
-void ShapeTesselator::Tesselate(bool compute_edges, float mesh_quality, bool parallel)
+void ShapeTesselator::Tesselate(bool compute_edges, float mesh_quality, bool parallel, bool keep_triangulation)
 {
-    TopExp_Explorer ExpFace;
-    // clean shape to remove any previous tringulation
-    BRepTools::Clean(myShape);
-    //Triangulate
+    // by default, clean shape to remove any previous triangulation, so that
+    // the mesh matches mesh_quality. Otherwise BRepMesh keeps the existing
+    // triangulations that satisfy the deflection, even finer ones, and only
+    // meshes the faces that have none or a coarser one
+    if (!keep_triangulation) {
+      BRepTools::Clean(myShape);
+    }
     BRepMesh_IncrementalMesh(myShape, myDeviation*mesh_quality, false, 0.5*mesh_quality, parallel);
 
+    ComputeFaces(NULL);
+
+    JoinPrimitives();
+
+    if (compute_edges) ComputeEdges();
+}
+
+//---------------------------------------------------------------------------
+void ShapeTesselator::Update(TopoDS_Shape aShape, bool compute_edges, float mesh_quality, bool parallel)
+{
+    // keep the previous mesh, its faces are reused if their triangulation
+    // has not been changed. If nothing was computed yet, all faces are computed
+    Standard_Real *prevVertexcoord = locVertexcoord;
+    Standard_Real *prevNormalcoord = locNormalcoord;
+    Standard_Integer *prevTriIndices = locTriIndices;
+    locVertexcoord = NULL;
+    locNormalcoord = NULL;
+    locTriIndices = NULL;
+    // the face ranges are replaced by JoinPrimitives, the previous ones are kept
+    std::shared_ptr<const std::vector<int> > prevFaceRanges = myFaceRanges;
+    std::vector<int> prevFaceNormalRanges;
+    std::vector<TopoDS_Face> prevFaces;
+    std::vector<Handle(Poly_Triangulation)> prevTriangulations;
+    prevFaceNormalRanges.swap(myFaceNormalRanges);
+    prevFaces.swap(myTriangulatedFaces);
+    prevTriangulations.swap(myFaceTriangulations);
+    ClearBuffers();
+
+    myShape = aShape;
+    // BRepTools::Clean is not called: BRepMesh keeps the triangulations that
+    // satisfy the deflection, and only meshes the other faces. The deviation
+    // computed for the first shape is kept, so that deflections match.
+    BRepMesh_IncrementalMesh(myShape, myDeviation*mesh_quality, false, 0.5*mesh_quality, parallel);
+
+    ComputeFacesFrom(prevVertexcoord, prevNormalcoord, prevTriIndices,
+                     *prevFaceRanges, prevFaceNormalRanges, prevFaces, prevTriangulations);
+
+    delete [] prevVertexcoord;
+    delete [] prevNormalcoord;
+    delete [] prevTriIndices;
+
+    JoinPrimitives();
+
+    if (compute_edges) {
+      ComputeEdges();
+    }
+    else {
+      ClearEdges();
+    }
+    computed = true;
+}
+
+//---------------------------------------------------------------------------
+void ShapeTesselator::Refine(ShapeTesselator* aCoarserLevel, bool compute_edges, float mesh_quality, bool parallel)
+{
+    if (aCoarserLevel == this || !aCoarserLevel->myShape.IsSame(myShape)) {
+      throw Standard_DomainError("ShapeTesselator::Refine, the coarser level must be another tesselator of the same shape");
+    }
+    aCoarserLevel->EnsureMeshIsComputed();
+    // same deviation, so that mesh_quality values of both levels can be compared
+    myDeviation = aCoarserLevel->myDeviation;
+    delete [] locVertexcoord;
+    delete [] locNormalcoord;
+    delete [] locTriIndices;
+    locVertexcoord = NULL;
+    locNormalcoord = NULL;
+    locTriIndices = NULL;
+    ClearBuffers();
+
+    // the triangulation of a planar face bounded by straight edges does not
+    // depend on the deflection, these faces keep the coarser triangulation.
+    // Only the other ones are meshed again.
+    TopoDS_Compound aFacesToMesh;
+    BRep_Builder aBuilder;
+    aBuilder.MakeCompound(aFacesToMesh);
+    for (size_t i = 0; i < aCoarserLevel->myTriangulatedFaces.size(); i++) {
+      const TopoDS_Face& aFace = aCoarserLevel->myTriangulatedFaces[i];
+      if (!IsPlanarPolygon(aFace)) {
+        aBuilder.Add(aFacesToMesh, aFace);
+      }
+    }
+    BRepMesh_IncrementalMesh(aFacesToMesh, myDeviation*mesh_quality, false, 0.5*mesh_quality, parallel);
+
+    ComputeFacesFrom(aCoarserLevel->locVertexcoord, aCoarserLevel->locNormalcoord, aCoarserLevel->locTriIndices,
+                     *aCoarserLevel->myFaceRanges, aCoarserLevel->myFaceNormalRanges,
+                     aCoarserLevel->myTriangulatedFaces, aCoarserLevel->myFaceTriangulations);
+
+    JoinPrimitives();
+
+    if (compute_edges) {
+      ComputeEdges();
+    }
+    else {
+      ClearEdges();
+    }
+    computed = true;
+}
+
+//---------------------------------------------------------------------------
+bool ShapeTesselator::IsPlanarPolygon(const TopoDS_Face& aFace)
+{
+    BRepAdaptor_Surface aSurface(aFace, Standard_False);
+    if (aSurface.GetType() != GeomAbs_Plane) {
+      return false;
+    }
+    for (TopExp_Explorer anExp(aFace, TopAbs_EDGE); anExp.More(); anExp.Next()) {
+      const TopoDS_Edge& anEdge = TopoDS::Edge(anExp.Current());
+      if (BRep_Tool::Degenerated(anEdge)) {
+        continue;
+      }
+      BRepAdaptor_Curve aCurve(anEdge);
+      if (aCurve.GetType() != GeomAbs_Line) {
+        return false;
+      }
+    }
+    return true;
+}
+
+//---------------------------------------------------------------------------
+void ShapeTesselator::ComputeFacesFrom(const Standard_Real* prevVertexcoord,
+                                       const Standard_Real* prevNormalcoord,
+                                       const Standard_Integer* prevTriIndices,
+                                       const std::vector<int>& prevFaceRanges,
+                                       const std::vector<int>& prevFaceNormalRanges,
+                                       const std::vector<TopoDS_Face>& prevFaces,
+                                       const std::vector<Handle(Poly_Triangulation)>& prevTriangulations)
+{
+    // a face is reused if it was part of the previous mesh, with the same
+    // orientation and the same triangulation. Otherwise it is computed
+    TopTools_DataMapOfShapeInteger prevFaceIndices;
+    for (size_t i = 0; i < prevFaces.size(); i++) {
+      prevFaceIndices.Bind(prevFaces[i], (int)i);
+    }
+    ComputeFaces([&](const TopoDS_Face& aFace, const Handle(Poly_Triangulation)& aTriangulation) -> aface* {
+      if (!prevFaceIndices.IsBound(aFace)) {
+        return NULL;
+      }
+      int i = prevFaceIndices.Find(aFace);
+      if (prevFaces[i].Orientation() != aFace.Orientation() || prevTriangulations[i] != aTriangulation) {
+        return NULL;
+      }
+      // copy the face range of the previous joined buffers
+      int firstTriangle = prevFaceRanges[i * 5];
+      int nbTriangles = prevFaceRanges[i * 5 + 1];
+      int firstVertex = prevFaceRanges[i * 5 + 2];
+      int nbVertices = prevFaceRanges[i * 5 + 3];
+      int firstNormal = prevFaceNormalRanges[i * 2];
+      int nbNormals = prevFaceNormalRanges[i * 2 + 1];
+      aface *reused_face = new aface;
+      reused_face->vertex_coord = new Standard_Real[nbVertices * 3];
+      std::copy(prevVertexcoord + firstVertex * 3, prevVertexcoord + (firstVertex + nbVertices) * 3,
+                reused_face->vertex_coord);
+      reused_face->number_of_coords = nbVertices;
+      reused_face->normal_coord = NULL;
+      if (nbNormals > 0) {
+        reused_face->normal_coord = new Standard_Real[nbNormals * 3];
+        std::copy(prevNormalcoord + firstNormal * 3, prevNormalcoord + (firstNormal + nbNormals) * 3,
+                  reused_face->normal_coord);
+      }
+      reused_face->number_of_normals = nbNormals;
+      reused_face->number_of_invalid_normals = nbNormals > 0 ? 0 : 1;
+      // back to the 1-based indices of the face triangulation
+      reused_face->tri_indexes = new Standard_Integer[nbTriangles * 3];
+      for (int j = 0; j < nbTriangles * 3; j++) {
+        reused_face->tri_indexes[j] = prevTriIndices[firstTriangle * 3 + j] - firstVertex + 1;
+      }
+      reused_face->number_of_triangles = nbTriangles;
+      reused_face->number_of_invalid_triangles = 0;
+      return reused_face;
+    });
+}
+
+//---------------------------------------------------------------------------
+void ShapeTesselator::ComputeFaces(const std::function<aface*(const TopoDS_Face&, const Handle(Poly_Triangulation)&)>& aReusedFace)
+{
+    TopExp_Explorer ExpFace;
+    // facelist items have been deleted by JoinPrimitives
+    facelist.clear();
+    myTriangulatedFaces.clear();
+    myFaceTriangulations.clear();
+    myReusedFaceCount = 0;
+    myComputedFaceCount = 0;
+
+    // map each face to its parent solid, so that the output can be split by solid
+    TopTools_IndexedMapOfShape solidMap;
+    TopExp::MapShapes(myShape, TopAbs_SOLID, solidMap);
+    TopTools_IndexedDataMapOfShapeListOfShape faceSolidMap;
+    if (solidMap.Extent() > 0) {
+      TopExp::MapShapesAndAncestors(myShape, TopAbs_FACE, TopAbs_SOLID, faceSolidMap);
+    }
 
     for (ExpFace.Init(myShape, TopAbs_FACE); ExpFace.More(); ExpFace.Next()) {
-        Standard_Integer validFaceTriCount = 0;
-        Standard_Integer invalidFaceTriCount = 0;
-        Standard_Integer invalidNormalCount = 0;
         TopLoc_Location aLocation;
 
         const TopoDS_Face& myFace = TopoDS::Face(ExpFace.Current());
@@ -110,81 +315,128 @@ void ShapeTesselator::Tesselate(bool compute_edges, float mesh_quality, bool par
         
         
         if (myT.IsNull()) {
-            invalidFaceTriCount++;
             continue;
         }
 
-        aface *this_face = new aface;
-
-        //write vertex buffer
-        const TColgp_Array1OfPnt& Nodes = myT->Nodes();
-        this_face->vertex_coord = new double[Nodes.Length() * 3];
-        this_face->number_of_coords = Nodes.Length();
-        for (Standard_Integer i = Nodes.Lower(); i <= Nodes.Upper(); i++) {
-          gp_Pnt p = Nodes(i).Transformed(aLocation.Transformation());
-          this_face->vertex_coord[((i-1) * 3)+ 0] = p.X();
-          this_face->vertex_coord[((i-1) * 3)+ 1] = p.Y();
-          this_face->vertex_coord[((i-1) * 3)+ 2] = p.Z();
+        aface *this_face = NULL;
+        if (aReusedFace) {
+            this_face = aReusedFace(myFace, myT);
         }
-
-        // compute normals and write normal buffer, using the uv nodes
-        if (myT->HasUVNodes()) {
-            BRepGProp_Face prop(myFace);
-            
-            const TColgp_Array1OfPnt2d& uvnodes = myT->UVNodes();
-            Standard_Integer ilower = uvnodes.Lower();
-            Standard_Integer iBufferSize = uvnodes.Upper()-uvnodes.Lower()+1;
-            this_face->normal_coord = new Standard_Real[iBufferSize * 3];
-            this_face->number_of_normals = iBufferSize;
-
-            for (int i = uvnodes.Lower(); i <= uvnodes.Upper(); ++i) {
-                const gp_Pnt2d& uv_pnt = uvnodes(i);
-                gp_Pnt p; gp_Vec n;
-                prop.Normal(uv_pnt.X(),uv_pnt.Y(),p,n);
-                if (n.SquareMagnitude() > 0.) {
-                    n.Normalize();
-                }
-                if (myFace.Orientation() == TopAbs_INTERNAL) {
-                    n.Reverse();
-                }
-                this_face->normal_coord[((i-1) * 3)+ 0] = n.X();
-                this_face->normal_coord[((i-1) * 3)+ 1] = n.Y();
-                this_face->normal_coord[((i-1) * 3)+ 2] = n.Z();
-            }
+        if (this_face) {
+            myReusedFaceCount++;
         }
         else {
-            invalidNormalCount++;
-        }         
-        //write triangle buffer
-        TopAbs_Orientation orient = myFace.Orientation();
-        const Poly_Array1OfTriangle&   triangles   = myT->Triangles();
-        this_face->tri_indexes  = new int  [triangles.Length()* 3];
-        for (Standard_Integer nt = 1; nt <= myT->NbTriangles(); nt++) {
-            Standard_Integer n0 , n1 , n2;
-            triangles(nt).Get(n0, n1, n2);
-            if (orient == TopAbs_REVERSED) {
-                Standard_Integer tmp=n1;
-                n1 = n2;
-                n2 = tmp;
+            this_face = ComputeFace(myFace, myT, aLocation);
+            myComputedFaceCount++;
+        }
+
+        this_face->solid_index = -1;
+        Standard_Integer iFaceInMap = faceSolidMap.FindIndex(myFace);
+        if (iFaceInMap > 0 && !faceSolidMap.FindFromIndex(iFaceInMap).IsEmpty()) {
+          this_face->solid_index = solidMap.FindIndex(faceSolidMap.FindFromIndex(iFaceInMap).First()) - 1;
+        }
+
+        facelist.push_back(this_face);
+        myTriangulatedFaces.push_back(myFace);
+        myFaceTriangulations.push_back(myT);
+    }
+}
+
+//---------------------------------------------------------------------------
+aface* ShapeTesselator::ComputeFace(const TopoDS_Face& myFace,
+                                    const Handle(Poly_Triangulation)& myT,
+                                    const TopLoc_Location& aLocation)
+{
+    Standard_Integer validFaceTriCount = 0;
+    Standard_Integer invalidFaceTriCount = 0;
+    Standard_Integer invalidNormalCount = 0;
+
+    aface *this_face = new aface;
+
+    //write vertex buffer
+    const TColgp_Array1OfPnt& Nodes = myT->Nodes();
+    this_face->vertex_coord = new double[Nodes.Length() * 3];
+    this_face->number_of_coords = Nodes.Length();
+    for (Standard_Integer i = Nodes.Lower(); i <= Nodes.Upper(); i++) {
+      gp_Pnt p = Nodes(i).Transformed(aLocation.Transformation());
+      this_face->vertex_coord[((i-1) * 3)+ 0] = p.X();
+      this_face->vertex_coord[((i-1) * 3)+ 1] = p.Y();
+      this_face->vertex_coord[((i-1) * 3)+ 2] = p.Z();
+    }
+
+    // compute normals and write normal buffer, using the uv nodes. There is
+    // one normal per node, so that normals and positions stay aligned
+    this_face->normal_coord = new Standard_Real[Nodes.Length() * 3];
+    this_face->number_of_normals = Nodes.Length();
+    if (myT->HasUVNodes() && myT->UVNodes().Length() == Nodes.Length()) {
+        BRepGProp_Face prop(myFace);
+        
+        const TColgp_Array1OfPnt2d& uvnodes = myT->UVNodes();
+
+        for (int i = uvnodes.Lower(); i <= uvnodes.Upper(); ++i) {
+            const gp_Pnt2d& uv_pnt = uvnodes(i);
+            gp_Pnt p; gp_Vec n;
+            prop.Normal(uv_pnt.X(),uv_pnt.Y(),p,n);
+            if (n.SquareMagnitude() > 0.) {
+                n.Normalize();
+            }
+            if (myFace.Orientation() == TopAbs_INTERNAL) {
+                n.Reverse();
             }
-            this_face->tri_indexes[validFaceTriCount * 3 + 0] = n0;
-            this_face->tri_indexes[validFaceTriCount * 3 + 1] = n1;
-            this_face->tri_indexes[validFaceTriCount * 3 + 2] = n2;
-            validFaceTriCount++;
+            this_face->normal_coord[((i-1) * 3)+ 0] = n.X();
+            this_face->normal_coord[((i-1) * 3)+ 1] = n.Y();
+            this_face->normal_coord[((i-1) * 3)+ 2] = n.Z();
+        }
+    }
+    else {
+        invalidNormalCount++;
+    }
+    //write triangle buffer
+    TopAbs_Orientation orient = myFace.Orientation();
+    const Poly_Array1OfTriangle&   triangles   = myT->Triangles();
+    this_face->tri_indexes  = new int  [triangles.Length()* 3];
+    for (Standard_Integer nt = 1; nt <= myT->NbTriangles(); nt++) {
+        Standard_Integer n0 , n1 , n2;
+        triangles(nt).Get(n0, n1, n2);
+        if (orient == TopAbs_REVERSED) {
+            Standard_Integer tmp=n1;
+            n1 = n2;
+            n2 = tmp;
         }
+        this_face->tri_indexes[validFaceTriCount * 3 + 0] = n0;
+        this_face->tri_indexes[validFaceTriCount * 3 + 1] = n1;
+        this_face->tri_indexes[validFaceTriCount * 3 + 2] = n2;
+        validFaceTriCount++;
+    }
 
-        this_face->number_of_triangles = validFaceTriCount;
-        this_face->number_of_invalid_triangles = invalidFaceTriCount;
-        this_face->number_of_invalid_normals = invalidNormalCount;
-        facelist.push_back(this_face);  
+    if (invalidNormalCount > 0) {
+        // no uv nodes: each node gets the face normal, the sum of the
+        // triangle normals (weighted by their area)
+        gp_Vec faceNormal;
+        for (Standard_Integer nt = 0; nt < validFaceTriCount; nt++) {
+            const double* p0 = this_face->vertex_coord + (this_face->tri_indexes[nt * 3 + 0] - 1) * 3;
+            const double* p1 = this_face->vertex_coord + (this_face->tri_indexes[nt * 3 + 1] - 1) * 3;
+            const double* p2 = this_face->vertex_coord + (this_face->tri_indexes[nt * 3 + 2] - 1) * 3;
+            gp_Vec v1(p1[0] - p0[0], p1[1] - p0[1], p1[2] - p0[2]);
+            gp_Vec v2(p2[0] - p0[0], p2[1] - p0[1], p2[2] - p0[2]);
+            faceNormal += v1.Crossed(v2);
+        }
+        if (faceNormal.SquareMagnitude() > 0.) {
+            faceNormal.Normalize();
+        }
+        for (Standard_Integer i = 0; i < Nodes.Length(); i++) {
+            this_face->normal_coord[(i * 3) + 0] = faceNormal.X();
+            this_face->normal_coord[(i * 3) + 1] = faceNormal.Y();
+            this_face->normal_coord[(i * 3) + 2] = faceNormal.Z();
+        }
     }
-  
-    JoinPrimitives();
 
-    if (compute_edges) ComputeEdges();
+    this_face->number_of_triangles = validFaceTriCount;
+    this_face->number_of_invalid_triangles = invalidFaceTriCount;
+    this_face->number_of_invalid_normals = invalidNormalCount;
+    return this_face;
 }
 
-
 //---------------------------INTERFACE---------------------------------------
 void ShapeTesselator::ComputeDefaultDeviation()
 {
@@ -200,11 +452,8 @@ void ShapeTesselator::ComputeDefaultDeviation()
     myDeviation = adeviation;
 }
 
-void ShapeTesselator::ComputeEdges()
+void ShapeTesselator::ClearEdges()
 {
-  TopLoc_Location aTrsf;
-
-  // clear current data
   std::vector<aedge*>::iterator it;
   for (it = edgelist.begin(); it != edgelist.end(); ++it) {
     if (*it) {
@@ -216,6 +465,28 @@ void ShapeTesselator::ComputeEdges()
     }
   }
   edgelist.clear();
+}
+
+void ShapeTesselator::ClearBuffers()
+{
+  // the buffers built on demand from the joined mesh. They are replaced by
+  // empty ones, not cleared: the previous ones may still be viewed by python
+  myVerticesPosition = std::make_shared<std::vector<float> >();
+  myNormals = std::make_shared<std::vector<float> >();
+  myIndexedVerticesPosition = std::make_shared<std::vector<float> >();
+  myIndexedNormals = std::make_shared<std::vector<float> >();
+  myTriangleIndices = std::make_shared<std::vector<unsigned int> >();
+  myEdgesPosition = std::make_shared<std::vector<float> >();
+  myEdgesOffsets = std::make_shared<std::vector<int> >();
+  myEdgesSegments = std::make_shared<std::vector<float> >();
+}
+
+void ShapeTesselator::ComputeEdges()
+{
+  TopLoc_Location aTrsf;
+
+  // clear current data
+  ClearEdges();
   // get indexed map of edges
   TopTools_IndexedMapOfShape M;
   TopExp::MapShapes(myShape, TopAbs_EDGE, M);
@@ -311,69 +582,239 @@ void ShapeTesselator::EnsureMeshIsComputed()
   }
 }
 
-std::string formatFloatNumber(float f) 
+static int formatFloat(char* aBuffer, float f)
 {
-  // returns string representation of the float number f.
+  // writes the representation of the float number f to aBuffer (at least 32
+  // chars), the same as a default std::ostream would (%g, 6 significant
+  // digits), without a stringstream per number. Returns the number of chars.
   // set epsilon to 1e-3
   float epsilon = 1e-3;
-  std::stringstream formatted_float;
   if (std::abs(f) < epsilon) {
     f = 0.;
   }
-  formatted_float << f;
-  return formatted_float.str();
+  return snprintf(aBuffer, 32, "%g", f);
 }
 
-std::vector<float> ShapeTesselator::GetVerticesPositionAsTuple()
+std::string formatFloatNumber(float f) 
 {
-  EnsureMeshIsComputed();
-  // create the vector and allocate memory
-  std::vector<float> vertices_position;
-  vertices_position.reserve(tot_triangle_count);
-  // loop over tertices
+  // returns string representation of the float number f.
+  char buffer[32];
+  return std::string(buffer, formatFloat(buffer, f));
+}
+
+void ShapeTesselator::ComputeFlatBuffers()
+{
+  // unroll the indexed triangles into two float buffers (positions and
+  // normals), three vertices per triangle. These buffers are kept alive
+  // as long as the tesselator, so that python can view them without copy.
+  if (!myVerticesPosition->empty()) {
+    return;
+  }
+  std::shared_ptr<std::vector<float> > positions = std::make_shared<std::vector<float> >(tot_triangle_count * 9);
+  std::shared_ptr<std::vector<float> > normals = std::make_shared<std::vector<float> >(tot_triangle_count * 9);
+  float *pos = positions->data();
+  float *nrm = normals->data();
   for (int i=0;i<tot_triangle_count;i++) {
-      int pID = locTriIndices[(i * 3) + 0] * 3;
-      vertices_position.push_back(locVertexcoord[pID]);
-      vertices_position.push_back(locVertexcoord[pID+1]);
-      vertices_position.push_back(locVertexcoord[pID+2]);
-      // Second vertex
-      int qID = locTriIndices[(i * 3) + 1] * 3;
-      vertices_position.push_back(locVertexcoord[qID]);
-      vertices_position.push_back(locVertexcoord[qID+1]);
-      vertices_position.push_back(locVertexcoord[qID+2]);
-      // Third vertex
-      int rID = locTriIndices[(i * 3) + 2] * 3;
-      vertices_position.push_back(locVertexcoord[rID]);
-      vertices_position.push_back(locVertexcoord[rID+1]);
-      vertices_position.push_back(locVertexcoord[rID+2]);
+    for (int j=0;j<3;j++) {
+      int pID = locTriIndices[(i * 3) + j] * 3;
+      *pos++ = locVertexcoord[pID];
+      *pos++ = locVertexcoord[pID+1];
+      *pos++ = locVertexcoord[pID+2];
+      *nrm++ = locNormalcoord[pID];
+      *nrm++ = locNormalcoord[pID+1];
+      *nrm++ = locNormalcoord[pID+2];
     }
-  return vertices_position;
+  }
+  myVerticesPosition = positions;
+  myNormals = normals;
 }
 
-std::vector<float> ShapeTesselator::GetNormalsAsTuple()
+std::shared_ptr<const std::vector<float> > ShapeTesselator::VerticesPositionBuffer()
 {
   EnsureMeshIsComputed();
-  // create the vector and allocate memory
-  std::vector<float> normals;
-  normals.reserve(tot_triangle_count);
-  // loop over normals
-  for (int i=0;i<tot_triangle_count;i++) {
-      int pID = locTriIndices[(i * 3) + 0] * 3;
-      normals.push_back(locNormalcoord[pID]);
-      normals.push_back(locNormalcoord[pID+1]);
-      normals.push_back(locNormalcoord[pID+2]);
-      // Second normal
-      int qID = locTriIndices[(i * 3) + 1] * 3;
-      normals.push_back(locNormalcoord[qID]);
-      normals.push_back(locNormalcoord[qID+1]);
-      normals.push_back(locNormalcoord[qID+2]);
-      // Third normal
-      int rID = locTriIndices[(i * 3) + 2] * 3;
-      normals.push_back(locNormalcoord[rID]);
-      normals.push_back(locNormalcoord[rID+1]);
-      normals.push_back(locNormalcoord[rID+2]);
+  ComputeFlatBuffers();
+  return myVerticesPosition;
+}
+
+std::shared_ptr<const std::vector<float> > ShapeTesselator::NormalsBuffer()
+{
+  EnsureMeshIsComputed();
+  ComputeFlatBuffers();
+  return myNormals;
+}
+
+void ShapeTesselator::ComputeIndexedBuffers()
+{
+  // convert the joined node buffers to float32, and the triangle
+  // indices to unsigned int. Each triangulation node is stored only
+  // once, whatever the number of triangles sharing it. Each face has
+  // one normal per node (see ComputeFace), normals and positions are aligned.
+  if (!myTriangleIndices->empty()) {
+    return;
+  }
+  myIndexedVerticesPosition = std::make_shared<std::vector<float> >(locVertexcoord, locVertexcoord + tot_vertex_count * 3);
+  myIndexedNormals = std::make_shared<std::vector<float> >(locNormalcoord, locNormalcoord + tot_normal_count * 3);
+  myTriangleIndices = std::make_shared<std::vector<unsigned int> >(locTriIndices, locTriIndices + tot_triangle_count * 3);
+}
+
+std::shared_ptr<const std::vector<float> > ShapeTesselator::IndexedVerticesPositionBuffer()
+{
+  EnsureMeshIsComputed();
+  ComputeIndexedBuffers();
+  return myIndexedVerticesPosition;
+}
+
+std::shared_ptr<const std::vector<float> > ShapeTesselator::IndexedNormalsBuffer()
+{
+  EnsureMeshIsComputed();
+  ComputeIndexedBuffers();
+  return myIndexedNormals;
+}
+
+std::shared_ptr<const std::vector<unsigned int> > ShapeTesselator::TriangleIndicesBuffer()
+{
+  EnsureMeshIsComputed();
+  ComputeIndexedBuffers();
+  return myTriangleIndices;
+}
+
+std::shared_ptr<const std::vector<int> > ShapeTesselator::FaceRangesBuffer()
+{
+  EnsureMeshIsComputed();
+  return myFaceRanges;
+}
+
+Standard_Integer ShapeTesselator::ObjGetFaceCount()
+{
+  EnsureMeshIsComputed();
+  return (Standard_Integer)myTriangulatedFaces.size();
+}
+
+TopoDS_Face ShapeTesselator::ObjGetFace(int iFace)
+{
+  EnsureMeshIsComputed();
+  if (iFace < 0 || iFace >= (int)myTriangulatedFaces.size()) {
+    throw Standard_OutOfRange("ShapeTesselator::ObjGetFace, index out of range");
+  }
+  return myTriangulatedFaces[iFace];
+}
+
+Standard_Integer ShapeTesselator::ObjGetTriangleFaceIndex(int triangleIdx)
+{
+  // the face ranges are sorted by first triangle: binary search of the
+  // last face starting at or before triangleIdx. A face without triangles
+  // starts where the next one starts, so it is never the one found
+  EnsureMeshIsComputed();
+  if (triangleIdx < 0 || triangleIdx >= tot_triangle_count) {
+    throw Standard_OutOfRange("ShapeTesselator::ObjGetTriangleFaceIndex, index out of range");
+  }
+  int lower = 0;
+  int upper = (int)myTriangulatedFaces.size() - 1;
+  while (lower < upper) {
+    int middle = (lower + upper + 1) / 2;
+    if ((*myFaceRanges)[middle * 5] <= triangleIdx) {
+      lower = middle;
     }
-  return normals;
+    else {
+      upper = middle - 1;
+    }
+  }
+  return lower;
+}
+
+void ShapeTesselator::ComputeEdgeBuffers()
+{
+  // join the edge polylines into a single float32 buffer, and build the
+  // line segments buffer (each polyline of n points gives n - 1 segments)
+  if (!myEdgesOffsets->empty()) {
+    return;
+  }
+  std::shared_ptr<std::vector<float> > positions = std::make_shared<std::vector<float> >();
+  std::shared_ptr<std::vector<int> > offsets = std::make_shared<std::vector<int> >();
+  std::shared_ptr<std::vector<float> > segments = std::make_shared<std::vector<float> >();
+  offsets->reserve(edgelist.size() + 1);
+  offsets->push_back(0);
+  int nbr_points = 0;
+  int nbr_segments = 0;
+  for (std::vector<aedge*>::iterator it = edgelist.begin(); it != edgelist.end(); ++it) {
+    int nbr_edge_points = *it ? (*it)->number_of_coords : 0;
+    nbr_points += nbr_edge_points;
+    if (nbr_edge_points > 1) {
+      nbr_segments += nbr_edge_points - 1;
+    }
+    offsets->push_back(nbr_points);
+  }
+  positions->reserve(nbr_points * 3);
+  segments->reserve(nbr_segments * 6);
+  for (std::vector<aedge*>::iterator it = edgelist.begin(); it != edgelist.end(); ++it) {
+    if (!*it) {
+      continue;
+    }
+    Standard_Real *coords = (*it)->vertex_coord;
+    for (int i = 0; i < (*it)->number_of_coords * 3; i++) {
+      positions->push_back((float)coords[i]);
+    }
+    for (int i = 0; i < ((*it)->number_of_coords - 1) * 3; i += 3) {
+      for (int j = 0; j < 6; j++) {
+        segments->push_back((float)coords[i + j]);
+      }
+    }
+  }
+  myEdgesPosition = positions;
+  myEdgesOffsets = offsets;
+  myEdgesSegments = segments;
+}
+
+std::shared_ptr<const std::vector<float> > ShapeTesselator::EdgesPositionBuffer()
+{
+  EnsureMeshIsComputed();
+  ComputeEdgeBuffers();
+  return myEdgesPosition;
+}
+
+std::shared_ptr<const std::vector<int> > ShapeTesselator::EdgesOffsetsBuffer()
+{
+  EnsureMeshIsComputed();
+  ComputeEdgeBuffers();
+  return myEdgesOffsets;
+}
+
+std::shared_ptr<const std::vector<float> > ShapeTesselator::EdgesSegmentsBuffer()
+{
+  EnsureMeshIsComputed();
+  ComputeEdgeBuffers();
+  return myEdgesSegments;
+}
+
+std::vector<float> ShapeTesselator::GetVerticesBoundingBox()
+{
+  // returns xmin, ymin, zmin, xmax, ymax, zmax of the float32 vertices
+  // or an empty vector if there is no vertex
+  EnsureMeshIsComputed();
+  std::vector<float> bbox;
+  if (tot_vertex_count == 0) {
+    return bbox;
+  }
+  bbox.assign(locVertexcoord, locVertexcoord + 3);
+  bbox.insert(bbox.end(), locVertexcoord, locVertexcoord + 3);
+  for (int i=1;i<tot_vertex_count;i++) {
+    for (int j=0;j<3;j++) {
+      float coord = locVertexcoord[i * 3 + j];
+      bbox[j] = std::min(bbox[j], coord);
+      bbox[j + 3] = std::max(bbox[j + 3], coord);
+    }
+  }
+  return bbox;
+}
+
+std::vector<float> ShapeTesselator::GetVerticesPositionAsTuple()
+{
+  return *VerticesPositionBuffer();
+}
+
+std::vector<float> ShapeTesselator::GetNormalsAsTuple()
+{
+  return *NormalsBuffer();
 }
 
 std::string ShapeTesselator::ExportShapeToX3DTriangleSet()
@@ -453,84 +894,133 @@ void ShapeTesselator::ExportShapeToX3D(char * filename, int diffR, int diffG, in
 
 std::string ShapeTesselator::ExportShapeToThreejsJSONString(char *shape_function_name)
 {
-    EnsureMeshIsComputed();
-    // a method that export a shape to a JSON BufferGeometry object
-    std::stringstream str_3js, str_vertices, str_normals;
-    int *vertices_idx = new int[3];
-    int *normals_idx = new int[3];
-    // loop over triangles and write vertices and normals
+    std::ostringstream str_3js;
+    ExportShapeToThreejsJSON(str_3js, shape_function_name);
+    return str_3js.str();
+}
+
+void ShapeTesselator::WriteTriangleCoordinates(std::ostream& aStream, bool aNormals)
+{
+    // writes the comma separated coordinates of the three vertices (or normals)
+    // of each triangle. Numbers are formatted in a local buffer, written to the
+    // stream when it is almost full.
+    const Standard_Real* coords = aNormals ? locNormalcoord : locVertexcoord;
+    char buffer[4096];
+    size_t used = 0;
+    int vertices_idx[3];
+    int normals_idx[3];
     for (int i=0;i<tot_triangle_count;i++) {
         ObjGetTriangle(i, vertices_idx, normals_idx);
-        // write vertex coordinates
-        // First vertex
-        str_vertices << formatFloatNumber(locVertexcoord[vertices_idx[0]]) << ",";
-        str_vertices << formatFloatNumber(locVertexcoord[vertices_idx[0]+1]) << ",";
-        str_vertices << formatFloatNumber(locVertexcoord[vertices_idx[0]+2]) << ",";
-        // Second vertex
-        str_vertices << formatFloatNumber(locVertexcoord[vertices_idx[1]]) << ",";
-        str_vertices << formatFloatNumber(locVertexcoord[vertices_idx[1]+1]) << ",";
-        str_vertices << formatFloatNumber(locVertexcoord[vertices_idx[1]+2]) << ",";
-        // Third vertex
-        str_vertices << formatFloatNumber(locVertexcoord[vertices_idx[2]]) << ",";
-        str_vertices << formatFloatNumber(locVertexcoord[vertices_idx[2]+1]) << ",";
-        str_vertices << formatFloatNumber(locVertexcoord[vertices_idx[2]+2]);
-        // Be careful, JSON parsers don't like trailing commas !!!
-        if (i != tot_triangle_count-1) {
-          str_vertices << ",";
-        }
-        // NORMALS
-          // First normal
-        str_normals << formatFloatNumber(locNormalcoord[normals_idx[0]]) << ",";
-        str_normals << formatFloatNumber(locNormalcoord[normals_idx[0]+1]) << ",";
-        str_normals << formatFloatNumber(locNormalcoord[normals_idx[0]+2]) << ",";
-        // Second normal
-        str_normals << formatFloatNumber(locNormalcoord[normals_idx[1]]) << ",";
-        str_normals << formatFloatNumber(locNormalcoord[normals_idx[1]+1]) << ",";
-        str_normals << formatFloatNumber(locNormalcoord[normals_idx[1]+2]) << ",";
-        // Third normal
-        str_normals << formatFloatNumber(locNormalcoord[normals_idx[2]]) << ",";
-        str_normals << formatFloatNumber(locNormalcoord[normals_idx[2]+1]) << ",";
-        str_normals << formatFloatNumber(locNormalcoord[normals_idx[2]+2]);
-        // Be careful, JSON parsers don't like trailing commas !!!
-        if (i != tot_triangle_count-1) {
-          str_normals << ",";
+        const int* idx = aNormals ? normals_idx : vertices_idx;
+        for (int j=0;j<3;j++) {
+            for (int k=0;k<3;k++) {
+                if (used + 40 > sizeof(buffer)) {
+                    aStream.write(buffer, used);
+                    used = 0;
+                }
+                // Be careful, JSON parsers don't like trailing commas !!!
+                if (i > 0 || j > 0 || k > 0) {
+                    buffer[used++] = ',';
+                }
+                used += formatFloat(buffer + used, (float)coords[idx[j]+k]);
+            }
         }
     }
-    str_3js << "{\n";
-    str_3js << "\t\"metadata\": {\n";
-    str_3js << "\t\t\"version\": 4.4,\n";
-    str_3js << "\t\t\"type\": \"BufferGeometry\",\n";
-    str_3js << "\t\t\"generator\": \"pythonOCC\"\n";
-    str_3js << "\t},\n";
-    str_3js << "\t\"uuid\": \"" << shape_function_name << "\",\n";
-    str_3js << "\t\"type\": \"BufferGeometry\",\n";
-    str_3js << "\t\"data\": {\n";
-    str_3js << "\t\"attributes\": {\n";
-    str_3js << "\t\t\t\"position\": {\n";
-    str_3js << "\t\t\t\t\"itemSize\": 3,\n";
-    str_3js << "\t\t\t\t\"type\": \"Float32Array\",\n";
-    str_3js << "\t\t\t\t\"array\": [";
+    aStream.write(buffer, used);
+}
+
+void ShapeTesselator::ExportShapeToThreejsJSON(std::ostream& aStream, char *shape_function_name)
+{
+    EnsureMeshIsComputed();
+    // a method that export a shape to a JSON BufferGeometry object. Vertices
+    // and normals are written to the stream as they are formatted.
+    aStream << "{\n";
+    aStream << "\t\"metadata\": {\n";
+    aStream << "\t\t\"version\": 4.4,\n";
+    aStream << "\t\t\"type\": \"BufferGeometry\",\n";
+    aStream << "\t\t\"generator\": \"pythonOCC\"\n";
+    aStream << "\t},\n";
+    aStream << "\t\"uuid\": \"" << shape_function_name << "\",\n";
+    aStream << "\t\"type\": \"BufferGeometry\",\n";
+    aStream << "\t\"data\": {\n";
+    aStream << "\t\"attributes\": {\n";
+    aStream << "\t\t\t\"position\": {\n";
+    aStream << "\t\t\t\t\"itemSize\": 3,\n";
+    aStream << "\t\t\t\t\"type\": \"Float32Array\",\n";
+    aStream << "\t\t\t\t\"array\": [";
     // write vertices
-    str_3js << str_vertices.str();
-    str_3js << "]\n";
-    str_3js << "\t\t\t},\n";
-    str_3js << "\t\t\t\"normal\": {\n";
-    str_3js << "\t\t\t\t\"itemSize\": 3,\n";
-    str_3js << "\t\t\t\t\"type\": \"Float32Array\",\n";
-    str_3js << "\t\t\t\t\"array\": [";
+    WriteTriangleCoordinates(aStream, false);
+    aStream << "]\n";
+    aStream << "\t\t\t},\n";
+    aStream << "\t\t\t\"normal\": {\n";
+    aStream << "\t\t\t\t\"itemSize\": 3,\n";
+    aStream << "\t\t\t\t\"type\": \"Float32Array\",\n";
+    aStream << "\t\t\t\t\"array\": [";
     // write normals
-    str_3js << str_normals.str();
-    str_3js << "]\n";
-    str_3js << "\t\t\t}\n";
+    WriteTriangleCoordinates(aStream, true);
+    aStream << "]\n";
+    aStream << "\t\t\t}\n";
     // close all brackets
-    str_3js << "\t\t}\n";
-    str_3js << "\t}\n";
-    str_3js << "}\n";
+    aStream << "\t\t}\n";
+    aStream << "\t}\n";
+    aStream << "}\n";
+}
 
-    delete [] vertices_idx;
-    delete [] normals_idx;
+static char* writeLittleEndianFloat(char* aBuffer, float f)
+{
+  // STL binary files are little endian, whatever the platform
+  uint32_t bits;
+  memcpy(&bits, &f, sizeof(bits));
+  aBuffer[0] = (char)(bits & 0xFF);
+  aBuffer[1] = (char)((bits >> 8) & 0xFF);
+  aBuffer[2] = (char)((bits >> 16) & 0xFF);
+  aBuffer[3] = (char)((bits >> 24) & 0xFF);
+  return aBuffer + 4;
+}
 
-    return str_3js.str();
+void ShapeTesselator::ExportShapeToBinarySTL(std::ostream& aStream)
+{
+    EnsureMeshIsComputed();
+    // the whole file is built in one buffer from the triangulation nodes,
+    // and written at once: 80 bytes header, the number of triangles, then
+    // 50 bytes per triangle (facet normal, 3 vertices, attribute)
+    std::vector<char> buffer(84 + 50 * (size_t)tot_triangle_count, 0);
+    const char header[] = "binary STL exported by pythonOCC";
+    memcpy(buffer.data(), header, sizeof(header) - 1);
+    uint32_t count = (uint32_t)tot_triangle_count;
+    for (int b=0;b<4;b++) {
+      buffer[80 + b] = (char)((count >> (8 * b)) & 0xFF);
+    }
+    char* record = buffer.data() + 84;
+    for (int i=0;i<tot_triangle_count;i++) {
+      const Standard_Real* p[3];
+      for (int j=0;j<3;j++) {
+        p[j] = locVertexcoord + locTriIndices[(i * 3) + j] * 3;
+      }
+      // the facet normal, computed from the vertices as the
+      // triangulation normals are smoothed at the nodes
+      gp_Vec u(p[1][0] - p[0][0], p[1][1] - p[0][1], p[1][2] - p[0][2]);
+      gp_Vec v(p[2][0] - p[0][0], p[2][1] - p[0][1], p[2][2] - p[0][2]);
+      gp_Vec n = u.Crossed(v);
+      Standard_Real norm = n.Magnitude();
+      if (norm > gp::Resolution()) {
+        n.Divide(norm);
+      } else {
+        n.SetCoord(0., 0., 0.);
+      }
+      char* pos = record;
+      pos = writeLittleEndianFloat(pos, (float)n.X());
+      pos = writeLittleEndianFloat(pos, (float)n.Y());
+      pos = writeLittleEndianFloat(pos, (float)n.Z());
+      for (int j=0;j<3;j++) {
+        for (int k=0;k<3;k++) {
+          pos = writeLittleEndianFloat(pos, (float)p[j][k]);
+        }
+      }
+      // the 2 bytes attribute is left to 0
+      record += 50;
+    }
+    aStream.write(buffer.data(), buffer.size());
 }
 
 //---------------------------------------------------------------------------
@@ -576,6 +1066,18 @@ Standard_Integer ShapeTesselator::ObjGetInvalidNormalCount()
   return tot_invalid_normal_count;
 }
 //---------------------------------------------------------------------------
+Standard_Integer ShapeTesselator::ObjGetReusedFaceCount()
+{
+  EnsureMeshIsComputed();
+  return myReusedFaceCount;
+}
+//---------------------------------------------------------------------------
+Standard_Integer ShapeTesselator::ObjGetComputedFaceCount()
+{
+  EnsureMeshIsComputed();
+  return myComputedFaceCount;
+}
+//---------------------------------------------------------------------------
 Standard_Integer ShapeTesselator::ObjGetEdgeCount()
 {
   EnsureMeshIsComputed();
@@ -676,6 +1178,12 @@ void ShapeTesselator::JoinPrimitives()
     ++anIterator;
   }
 
+  // a new vector, the previous one may be viewed by python or used by Update
+  std::shared_ptr<std::vector<int> > faceRanges = std::make_shared<std::vector<int> >();
+  faceRanges->reserve(facelist.size() * 5);
+  myFaceNormalRanges.clear();
+  myFaceNormalRanges.reserve(facelist.size() * 2);
+
   locTriIndices= new Standard_Integer[tot_triangle_count * 3 ];
   locVertexcoord = new Standard_Real[tot_vertex_count * 3 ];
   locNormalcoord = new Standard_Real[tot_normal_count * 3 ];
@@ -683,6 +1191,14 @@ void ShapeTesselator::JoinPrimitives()
   anIterator = facelist.begin();
   while (anIterator != facelist.end()) {
     aface* myface = *anIterator;
+    faceRanges->push_back(obTR);
+    faceRanges->push_back(myface->number_of_triangles);
+    faceRanges->push_back(obP);
+    faceRanges->push_back(myface->number_of_coords);
+    faceRanges->push_back(myface->solid_index);
+    myFaceNormalRanges.push_back(obN);
+    myFaceNormalRanges.push_back(myface->number_of_normals);
+
     for (int x = 0; x < myface->number_of_coords; x++) {
       locVertexcoord[(obP * 3) + 0] = myface->vertex_coord[(x * 3) + 0];
       locVertexcoord[(obP * 3) + 1] = myface->vertex_coord[(x * 3) + 1];
@@ -720,4 +1236,5 @@ void ShapeTesselator::JoinPrimitives()
 
     ++anIterator;
   }
+  myFaceRanges = faceRanges;
 }
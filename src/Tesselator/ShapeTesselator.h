@@ -21,9 +21,15 @@
 //---------------------------------------------------------------------------
 #include <vector>
 #include <string>
+#include <functional>
+#include <memory>
+#include <ostream>
 //---------------------------------------------------------------------------
 #include <gp_Pnt.hxx>
 #include <TopoDS_Shape.hxx>
+#include <TopoDS_Face.hxx>
+#include <TopLoc_Location.hxx>
+#include <Poly_Triangulation.hxx>
 #include <TCollection_AsciiString.hxx>
 //---------------------------------------------------------------------------
 struct aface {
@@ -35,6 +41,7 @@ struct aface {
   Standard_Integer number_of_invalid_normals;
   Standard_Integer number_of_triangles;
   Standard_Integer number_of_invalid_triangles;
+  Standard_Integer solid_index;
 };
 
 struct aedge {
@@ -60,16 +67,62 @@ class ShapeTesselator
       TopoDS_Shape myShape;
       Standard_Real aXmin, aYmin ,aZmin ,aXmax ,aYmax ,aZmax;
       Standard_Real aBndBoxSz;
+      // the buffers viewed by python are shared with the exported views: once
+      // built, they are never modified, but replaced by new ones, so that a
+      // view stays valid after Update, Refine or the tesselator deletion
+      // flat float32 buffers, three vertices per triangle, built on demand
+      std::shared_ptr<std::vector<float> > myVerticesPosition;
+      std::shared_ptr<std::vector<float> > myNormals;
+      // indexed float32 buffers, one vertex per triangulation node, built on demand
+      std::shared_ptr<std::vector<float> > myIndexedVerticesPosition;
+      std::shared_ptr<std::vector<float> > myIndexedNormals;
+      std::shared_ptr<std::vector<unsigned int> > myTriangleIndices;
+      // for each triangulated face: first triangle, number of triangles,
+      // first vertex, number of vertices, index of the parent solid (-1 if none)
+      std::shared_ptr<std::vector<int> > myFaceRanges;
+      // for each triangulated face: first normal, number of normals
+      std::vector<int> myFaceNormalRanges;
+      // the triangulated faces and their triangulation, in the myFaceRanges
+      // order. Used by Update to find the faces that were not remeshed
+      std::vector<TopoDS_Face> myTriangulatedFaces;
+      std::vector<Handle(Poly_Triangulation)> myFaceTriangulations;
+      Standard_Integer myReusedFaceCount=0;
+      Standard_Integer myComputedFaceCount=0;
+      // edge polylines, built on demand: all the points of all the edges, the
+      // offset of the first point of each edge (plus the total number of points),
+      // and the line segments (two points each) of all the polylines
+      std::shared_ptr<std::vector<float> > myEdgesPosition;
+      std::shared_ptr<std::vector<int> > myEdgesOffsets;
+      std::shared_ptr<std::vector<float> > myEdgesSegments;
 
       void ComputeDefaultDeviation();
       void ComputeEdges();
+      void ClearEdges();
+      void ClearBuffers();
+      void ComputeFaces(const std::function<aface*(const TopoDS_Face&, const Handle(Poly_Triangulation)&)>& aReusedFace);
+      aface* ComputeFace(const TopoDS_Face& aFace, const Handle(Poly_Triangulation)& aTriangulation,
+                         const TopLoc_Location& aLocation);
+      void ComputeFacesFrom(const Standard_Real* prevVertexcoord,
+                            const Standard_Real* prevNormalcoord,
+                            const Standard_Integer* prevTriIndices,
+                            const std::vector<int>& prevFaceRanges,
+                            const std::vector<int>& prevFaceNormalRanges,
+                            const std::vector<TopoDS_Face>& prevFaces,
+                            const std::vector<Handle(Poly_Triangulation)>& prevTriangulations);
+      static bool IsPlanarPolygon(const TopoDS_Face& aFace);
       void EnsureMeshIsComputed();
+      void ComputeFlatBuffers();
+      void ComputeIndexedBuffers();
+      void ComputeEdgeBuffers();
+      void WriteTriangleCoordinates(std::ostream& aStream, bool aNormals);
 
   public:
       ShapeTesselator(TopoDS_Shape aShape);
       ~ShapeTesselator();
-      void Compute(bool compute_edges=false, float mesh_quality=1.0, bool parallel=false);
-      void Tesselate(bool compute_edges, float mesh_quality, bool parallel);
+      void Compute(bool compute_edges=false, float mesh_quality=1.0, bool parallel=false, bool keep_triangulation=false);
+      void Tesselate(bool compute_edges, float mesh_quality, bool parallel, bool keep_triangulation=false);
+      void Update(TopoDS_Shape aShape, bool compute_edges=false, float mesh_quality=1.0, bool parallel=false);
+      void Refine(ShapeTesselator* aCoarserLevel, bool compute_edges=false, float mesh_quality=1.0, bool parallel=false);
       void JoinPrimitives();
       void SetDeviation(Standard_Real aDeviation);
       void GetVertex(int ivert, float& x, float& y, float& z);
@@ -79,6 +132,8 @@ class ShapeTesselator
       Standard_Real* VerticesList();
       Standard_Real* NormalsList();
       std::string ExportShapeToThreejsJSONString(char *shape_function_name);
+      void ExportShapeToThreejsJSON(std::ostream& aStream, char *shape_function_name);
+      void ExportShapeToBinarySTL(std::ostream& aStream);
       std::string ExportShapeToX3DTriangleSet();
       void ExportShapeToX3D(char *filename, int diffR=1, int diffG=0, int diffB=0);
       Standard_Integer ObjGetTriangleCount();
@@ -86,10 +141,25 @@ class ShapeTesselator
       Standard_Integer ObjGetVertexCount();
       Standard_Integer ObjGetNormalCount();
       Standard_Integer ObjGetInvalidNormalCount();
+      Standard_Integer ObjGetReusedFaceCount();
+      Standard_Integer ObjGetComputedFaceCount();
       Standard_Integer ObjGetEdgeCount();
       Standard_Integer ObjEdgeGetVertexCount(int iEdge);
       void ObjGetTriangle(int trianglenum, int *vertices, int *normals);
       std::vector<float> GetVerticesPositionAsTuple();
       std::vector<float> GetNormalsAsTuple();
+      std::shared_ptr<const std::vector<float> > VerticesPositionBuffer();
+      std::shared_ptr<const std::vector<float> > NormalsBuffer();
+      std::shared_ptr<const std::vector<float> > IndexedVerticesPositionBuffer();
+      std::shared_ptr<const std::vector<float> > IndexedNormalsBuffer();
+      std::shared_ptr<const std::vector<unsigned int> > TriangleIndicesBuffer();
+      std::shared_ptr<const std::vector<int> > FaceRangesBuffer();
+      Standard_Integer ObjGetFaceCount();
+      TopoDS_Face ObjGetFace(int iFace);
+      Standard_Integer ObjGetTriangleFaceIndex(int triangleIdx);
+      std::shared_ptr<const std::vector<float> > EdgesPositionBuffer();
+      std::shared_ptr<const std::vector<int> > EdgesOffsetsBuffer();
+      std::shared_ptr<const std::vector<float> > EdgesSegmentsBuffer();
+      std::vector<float> GetVerticesBoundingBox();
 };
 #endif
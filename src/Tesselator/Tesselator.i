@@ -16,14 +16,141 @@
 ##You should have received a copy of the GNU Lesser General Public License
 ##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
 */
-%module Tesselator;
+%module(threads="1") Tesselator;
 
 %{
 #include <ShapeTesselator.h>
+#include <TopologyGraph.h>
+#include <EdgeDiscretizer.h>
 #include <Standard.hxx>
+
+// a read-only buffer over a shared std::vector, that owns a reference to
+// the vector: the memoryviews (and numpy arrays) of the tesselator, edge
+// discretizer and topology graph buffers stay valid after the object
+// computes new buffers (Update, Refine, Compute) or is deleted
+struct _SharedBufferObject {
+    PyObject_HEAD
+    std::shared_ptr<const void>* owner;
+    const void* data;
+    Py_ssize_t nbytes;
+};
+
+static void _SharedBuffer_dealloc(PyObject* self)
+{
+    delete ((_SharedBufferObject*)self)->owner;
+    PyObject_Del(self);
+}
+
+static int _SharedBuffer_getbuffer(PyObject* self, Py_buffer* view, int flags)
+{
+    _SharedBufferObject* buffer = (_SharedBufferObject*)self;
+    return PyBuffer_FillInfo(view, self, const_cast<void*>(buffer->data), buffer->nbytes, 1, flags);
+}
+
+static PyBufferProcs _SharedBuffer_as_buffer;
+static PyTypeObject _SharedBufferType = {PyVarObject_HEAD_INIT(NULL, 0)};
+
+template <typename T>
+static PyObject* _shared_vector_as_memoryview(const std::shared_ptr<const std::vector<T> >& v)
+{
+    static T empty_buffer[1];
+    _SharedBufferObject* buffer = PyObject_New(_SharedBufferObject, &_SharedBufferType);
+    if (!buffer) {
+        return NULL;
+    }
+    buffer->owner = new std::shared_ptr<const void>(v);
+    buffer->data = v->empty() ? (const void*)empty_buffer : (const void*)v->data();
+    buffer->nbytes = (Py_ssize_t)(v->size() * sizeof(T));
+    PyObject* view = PyMemoryView_FromObject((PyObject*)buffer);
+    Py_DECREF(buffer);
+    return view;
+}
+
+#include <streambuf>
+#include <memory>
+#include <algorithm>
+#include <cstring>
+#include <errno.h>
+#ifdef _WIN32
+#include <io.h>
+#define _fd_write _write
+#else
+#include <unistd.h>
+#define _fd_write write
+#endif
+
+// an output stream buffer writing to a file descriptor, so that the
+// exporters stream to a python file without building the whole string
+class _FileDescriptorBuffer : public std::streambuf {
+  public:
+    explicit _FileDescriptorBuffer(int aFd) : myFd(aFd) {
+        setp(myBuffer, myBuffer + sizeof(myBuffer));
+    }
+    ~_FileDescriptorBuffer() { sync(); }
+  protected:
+    int_type overflow(int_type c) override {
+        if (sync() != 0) {
+            return traits_type::eof();
+        }
+        if (!traits_type::eq_int_type(c, traits_type::eof())) {
+            *pptr() = traits_type::to_char_type(c);
+            pbump(1);
+        }
+        return traits_type::not_eof(c);
+    }
+    int sync() override {
+        if (!writeAll(pbase(), pptr() - pbase())) {
+            return -1;
+        }
+        setp(myBuffer, myBuffer + sizeof(myBuffer));
+        return 0;
+    }
+    std::streamsize xsputn(const char* s, std::streamsize n) override {
+        // the blocks larger than the buffer (a whole binary STL file for
+        // instance) are written at once, not copied 64 kB at a time
+        if (n < epptr() - pptr()) {
+            memcpy(pptr(), s, (size_t)n);
+            pbump((int)n);
+            return n;
+        }
+        if (sync() != 0 || !writeAll(s, (size_t)n)) {
+            return 0;
+        }
+        return n;
+    }
+  private:
+    bool writeAll(const char* data, size_t size) {
+        const char* end = data + size;
+        while (data < end) {
+            int written = _fd_write(myFd, data, (unsigned int)std::min<size_t>(end - data, 1 << 30));
+            if (written < 0 && errno == EINTR) {
+                continue;
+            }
+            if (written <= 0) {
+                return false;
+            }
+            data += written;
+        }
+        return true;
+    }
+    int myFd;
+    char myBuffer[65536];
+};
 %}
 
 %include ../SWIG_files/common/ExceptionCatcher.i
+
+%init %{
+    _SharedBuffer_as_buffer.bf_getbuffer = _SharedBuffer_getbuffer;
+    _SharedBufferType.tp_name = "Tesselator._SharedBuffer";
+    _SharedBufferType.tp_basicsize = sizeof(_SharedBufferObject);
+    _SharedBufferType.tp_dealloc = _SharedBuffer_dealloc;
+    _SharedBufferType.tp_as_buffer = &_SharedBuffer_as_buffer;
+    _SharedBufferType.tp_flags = Py_TPFLAGS_DEFAULT;
+    if (PyType_Ready(&_SharedBufferType) < 0) {
+        return NULL;
+    }
+%}
 %include ../SWIG_files/common/OccHandle.i
 %include "python/std_string.i"
 %include "std_vector.i"
@@ -31,6 +158,26 @@
 
 %template(vector_float) std::vector<float>;
 
+// a python file object (flushed first), or a file descriptor
+%typemap(in) std::ostream& (std::unique_ptr<_FileDescriptorBuffer> buffer, std::unique_ptr<std::ostream> stream) {
+    if (!PyLong_Check($input)) {
+        PyObject *flush_result = PyObject_CallMethod($input, const_cast<char*>("flush"), nullptr);
+        if (!flush_result) SWIG_fail;
+        Py_DECREF(flush_result);
+    }
+    int fd = PyObject_AsFileDescriptor($input);
+    if (fd < 0) { SWIG_Error(SWIG_TypeError, "File object or file descriptor expected."); SWIG_fail; }
+    buffer.reset(new _FileDescriptorBuffer(fd));
+    stream.reset(new std::ostream(buffer.get()));
+    $1 = stream.get();
+}
+%typemap(argout) std::ostream& {
+    if (!$1->flush()) {
+        PyErr_SetFromErrno(PyExc_IOError);
+        SWIG_fail;
+    }
+}
+
 %typemap(out) float [ANY] {
   int i;
   $result = PyList_New($1_dim0);
@@ -43,6 +190,20 @@
 %apply int& OUTPUT {int& v1, int& v2, int& v3}
 %apply float& OUTPUT {float& x, float& y, float& z}
 
+// the GIL is held by default, it is only released by the long running
+// methods that do not use the Python API, so that shapes can be tesselated
+// and exported from several python threads at the same time
+%nothread;
+%thread ShapeTesselator::Compute;
+%thread ShapeTesselator::Update;
+%thread ShapeTesselator::Refine;
+%thread ShapeTesselator::ExportShapeToX3DTriangleSet;
+%thread ShapeTesselator::ExportShapeToThreejsJSONString;
+%thread ShapeTesselator::ExportShapeToThreejsJSON;
+%thread ShapeTesselator::ExportShapeToBinarySTL;
+%thread ShapeTesselator::ExportShapeToX3D;
+%thread EdgeDiscretizer::Compute;
+
 class ShapeTesselator {
     public:
         %feature("autodoc", "1");
@@ -50,7 +211,14 @@ class ShapeTesselator {
         %feature("autodoc", "1");
         ~ShapeTesselator();
         %feature("kwargs") Compute;
-        void Compute(bool compute_edges=false, float mesh_quality=1.0, bool parallel=false);
+        %feature("autodoc", "Tesselates the shape. The triangulation already stored in the shape is removed first, so that the mesh matches mesh_quality.\nWith keep_triangulation=True, the existing triangulation of a face is reused if it satisfies the deflection, even if it is finer.") Compute;
+        void Compute(bool compute_edges=false, float mesh_quality=1.0, bool parallel=false, bool keep_triangulation=false);
+        %feature("kwargs") Update;
+        %feature("autodoc", "Tesselates aShape, a modified version of the tesselated shape, only meshing the faces that were modified.\nThe triangulation of the other faces is reused from the previous mesh. Buffers and arrays obtained before the update keep the previous mesh.") Update;
+        void Update(TopoDS_Shape aShape, bool compute_edges=false, float mesh_quality=1.0, bool parallel=false);
+        %feature("kwargs") Refine;
+        %feature("autodoc", "Tesselates the shape at mesh_quality, aCoarserLevel being a computed tesselator of the same shape at a higher mesh_quality.\nThe planar faces bounded by straight edges are not meshed again, they are copied from aCoarserLevel.") Refine;
+        void Refine(ShapeTesselator* aCoarserLevel, bool compute_edges=false, float mesh_quality=1.0, bool parallel=false);
         void GetVertex(int ivert, float& x, float& y, float& z);
         void GetNormal(int inorm, float& x, float& y, float& z);
         void GetTriangleIndex(int triangleIdx, int& v1, int& v2, int& v3);
@@ -60,12 +228,423 @@ class ShapeTesselator {
         int ObjGetInvalidTriangleCount();
         int ObjGetVertexCount();
         int ObjGetNormalCount();
+        int ObjGetReusedFaceCount();
+        int ObjGetFaceCount();
+        TopoDS_Face ObjGetFace(int iFace);
+        int ObjGetTriangleFaceIndex(int triangleIdx);
+        int ObjGetComputedFaceCount();
         int ObjGetEdgeCount();
         int ObjEdgeGetVertexCount(int iEdge);
         std::string ExportShapeToX3DTriangleSet();
         std::string ExportShapeToThreejsJSONString(char *shape_function_name);
+        %feature("autodoc", "Writes the three.js JSON BufferGeometry to aStream, a python file object open for writing or a file descriptor.\nThe JSON is written as it is formatted, the whole string is never built in memory.") ExportShapeToThreejsJSON;
+        void ExportShapeToThreejsJSON(std::ostream& aStream, char *shape_function_name);
+        %feature("autodoc", "Writes the triangles to aStream as a binary STL file, a python file object open for writing or a file descriptor.\nThe file is built in one buffer from the triangulation nodes, and written at once.") ExportShapeToBinarySTL;
+        void ExportShapeToBinarySTL(std::ostream& aStream);
         %feature("kwargs") ExportShapeToX3D;
         void ExportShapeToX3D(char *filename, int diffR=1, int diffG=0, int diffB=0);
         std::vector<float> GetVerticesPositionAsTuple();
         std::vector<float> GetNormalsAsTuple();
+        std::vector<float> GetVerticesBoundingBox();
+};
+
+%pythoncode {
+class _TesselatorBuffer:
+    """ exposes a C++ buffer through the numpy array interface. It holds a
+    reference to the memoryview and to its owner (a TopologyGraph, an
+    EdgeDiscretizer), so that the C++ storage is not released while an array
+    is still viewing it. The ShapeTesselator memoryviews own their storage.
+    """
+    def __init__(self, tesselator, memory_view, typestr, shape):
+        self._tesselator = tesselator
+        self.__array_interface__ = {"version": 3,
+                                    "typestr": typestr,
+                                    "shape": shape,
+                                    "data": memory_view}
+
+def _buffer_as_array(tesselator, memory_view, dtype, item_size):
+    import numpy as np
+    dtype = np.dtype(dtype)
+    nbr_items = memory_view.nbytes // (dtype.itemsize * item_size)
+    return np.asarray(_TesselatorBuffer(tesselator, memory_view, dtype.str,
+                                        (nbr_items, item_size)))
+
+# glTF constants
+_GLTF_ARRAY_BUFFER = 34962
+_GLTF_ELEMENT_ARRAY_BUFFER = 34963
+_GLTF_FLOAT = 5126
+_GLTF_UNSIGNED_INT = 5125
+_GLB_MAGIC = 0x46546C67
+_GLB_CHUNK_JSON = 0x4E4F534A
+_GLB_CHUNK_BIN = 0x004E4942
+
+def _glb_chunks(gltf, binary_chunks, bin_length):
+    """ returns the GLB header and chunks, the binary chunk being omitted if
+    bin_length is 0
+    """
+    import json
+    import struct
+    json_chunk = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+    json_chunk += b" " * (-len(json_chunk) % 4)
+    total_length = 12 + 8 + len(json_chunk)
+    if bin_length > 0:
+        total_length += 8 + bin_length
+    chunks = [struct.pack("<III", _GLB_MAGIC, 2, total_length),
+              struct.pack("<II", len(json_chunk), _GLB_CHUNK_JSON), json_chunk]
+    if bin_length > 0:
+        chunks.append(struct.pack("<II", bin_length, _GLB_CHUNK_BIN))
+        chunks += binary_chunks
+    return chunks
+
+def _tesselator_to_glb_bytes(tesselator, node_per="shape"):
+    """ packs the indexed mesh of a computed tesselator into a binary glTF 2.0 (GLB).
+    node_per: "shape" (one node for the whole mesh), "solid" (one node per solid)
+    or "face" (one node per face). All nodes share the same position/normal
+    accessors, each face has its own slice of the index buffer. A shape without
+    triangles (a wire or a failed mesh) results in a scene without any mesh.
+    """
+    import struct
+    if node_per not in ["shape", "solid", "face"]:
+        raise AssertionError("node_per must be either shape, solid or face")
+    positions = tesselator._IndexedVerticesPositionBuffer()
+    normals = tesselator._IndexedNormalsBuffer()
+    indices = tesselator._TriangleIndicesBuffer()
+    face_ranges = tesselator._FaceRangesBuffer().cast("i")
+    if struct.pack("=I", 1) != struct.pack("<I", 1):
+        raise AssertionError("GLB export is only available on little-endian platforms")
+    asset = {"version": "2.0", "generator": "pythonocc"}
+    if indices.nbytes == 0:
+        # empty accessors and buffer views are not valid glTF
+        return _glb_chunks({"asset": asset, "scene": 0, "scenes": [{}]}, [], 0)
+    has_normals = normals.nbytes == positions.nbytes
+    nbr_vertices = positions.nbytes // 12
+
+    buffer_views = [{"buffer": 0, "byteOffset": 0, "byteLength": positions.nbytes,
+                     "target": _GLTF_ARRAY_BUFFER}]
+    accessors = [{"bufferView": 0, "componentType": _GLTF_FLOAT, "count": nbr_vertices,
+                  "type": "VEC3"}]
+    bbox = tesselator.GetVerticesBoundingBox()
+    if bbox:
+        accessors[0]["min"] = list(bbox[:3])
+        accessors[0]["max"] = list(bbox[3:])
+    attributes = {"POSITION": 0}
+    byte_offset = positions.nbytes
+    if has_normals:
+        buffer_views.append({"buffer": 0, "byteOffset": byte_offset, "byteLength": normals.nbytes,
+                             "target": _GLTF_ARRAY_BUFFER})
+        accessors.append({"bufferView": 1, "componentType": _GLTF_FLOAT, "count": nbr_vertices,
+                          "type": "VEC3"})
+        attributes["NORMAL"] = 1
+        byte_offset += normals.nbytes
+    indices_view = len(buffer_views)
+    buffer_views.append({"buffer": 0, "byteOffset": byte_offset, "byteLength": indices.nbytes,
+                         "target": _GLTF_ELEMENT_ARRAY_BUFFER})
+
+    def _primitive(first_triangle, nbr_triangles):
+        accessors.append({"bufferView": indices_view, "byteOffset": first_triangle * 12,
+                          "componentType": _GLTF_UNSIGNED_INT, "count": nbr_triangles * 3,
+                          "type": "SCALAR"})
+        return {"attributes": attributes, "indices": len(accessors) - 1}
+
+    # group the faces according to the node granularity
+    groups = {}
+    if node_per == "shape":
+        groups["shape"] = [(0, indices.nbytes // 12)]
+    else:
+        for i in range(0, len(face_ranges), 5):
+            first_triangle, nbr_triangles, _, _, solid_index = face_ranges[i:i + 5]
+            if nbr_triangles == 0:
+                continue
+            if node_per == "face":
+                key = "face%i" % (i // 5)
+            elif solid_index < 0:
+                key = "free_faces"
+            else:
+                key = "solid%i" % solid_index
+            groups.setdefault(key, []).append((first_triangle, nbr_triangles))
+    meshes = []
+    nodes = []
+    for name, triangle_ranges in groups.items():
+        primitives = [_primitive(first, count) for first, count in triangle_ranges if count > 0]
+        if not primitives:
+            continue
+        meshes.append({"name": name, "primitives": primitives})
+        nodes.append({"name": name, "mesh": len(meshes) - 1})
+
+    bin_length = byte_offset + indices.nbytes
+    gltf = {"asset": asset,
+            "scene": 0,
+            "scenes": [{"nodes": list(range(len(nodes)))}],
+            "nodes": nodes,
+            "meshes": meshes,
+            "accessors": accessors,
+            "bufferViews": buffer_views,
+            "buffers": [{"byteLength": bin_length}]}
+    # float32 and uint32 buffers, the binary chunk is always 4 bytes aligned
+    binary_chunks = [positions, normals, indices] if has_normals else [positions, indices]
+    return _glb_chunks(gltf, binary_chunks, bin_length)
+};
+
+class TopologyGraph {
+    public:
+        %feature("autodoc", "1");
+        TopologyGraph(TopoDS_Shape aShape);
+        int NbFaces();
+        int NbEdges();
+        int NbVertices();
+        TopoDS_Face Face(int anIndex);
+        TopoDS_Edge Edge(int anIndex);
+        TopoDS_Vertex Vertex(int anIndex);
+        int FaceIndex(const TopoDS_Shape& aShape);
+        int EdgeIndex(const TopoDS_Shape& aShape);
+        int VertexIndex(const TopoDS_Shape& aShape);
+};
+
+%extend TopologyGraph {
+    PyObject* _CSRBuffers(int aGraph) {
+        std::shared_ptr<const std::vector<int> > offsets;
+        std::shared_ptr<const std::vector<int> > indices;
+        switch (aGraph) {
+          case 0: offsets = $self->FaceEdgesOffsets(); indices = $self->FaceEdges(); break;
+          case 1: offsets = $self->EdgeFacesOffsets(); indices = $self->EdgeFaces(); break;
+          case 2: offsets = $self->EdgeVerticesOffsets(); indices = $self->EdgeVertices(); break;
+          case 3: offsets = $self->VertexEdgesOffsets(); indices = $self->VertexEdges(); break;
+          default: offsets = $self->FaceFacesOffsets(); indices = $self->FaceFaces(); break;
+        }
+        PyObject* offsets_view = _shared_vector_as_memoryview(offsets);
+        if (!offsets_view) {
+          return NULL;
+        }
+        PyObject* indices_view = _shared_vector_as_memoryview(indices);
+        if (!indices_view) {
+          Py_DECREF(offsets_view);
+          return NULL;
+        }
+        PyObject* result = PyTuple_Pack(2, offsets_view, indices_view);
+        Py_DECREF(offsets_view);
+        Py_DECREF(indices_view);
+        return result;
+    }
+    %pythoncode {
+    def _csr_arrays(self, graph):
+        offsets, indices = self._CSRBuffers(graph)
+        return (_buffer_as_array(self, offsets, "int32", 1).reshape(-1),
+                _buffer_as_array(self, indices, "int32", 1).reshape(-1))
+
+    def GetFaceEdgesAsArrays(self):
+        """ Returns the (offsets, indices) int32 numpy arrays of the face -> edges
+        CSR graph: the edges of face i are indices[offsets[i]:offsets[i + 1]]
+        """
+        return self._csr_arrays(0)
+
+    def GetEdgeFacesAsArrays(self):
+        """ Returns the (offsets, indices) arrays of the edge -> faces CSR graph """
+        return self._csr_arrays(1)
+
+    def GetEdgeVerticesAsArrays(self):
+        """ Returns the (offsets, indices) arrays of the edge -> vertices CSR graph """
+        return self._csr_arrays(2)
+
+    def GetVertexEdgesAsArrays(self):
+        """ Returns the (offsets, indices) arrays of the vertex -> edges CSR graph """
+        return self._csr_arrays(3)
+
+    def GetFaceAdjacencyAsArrays(self):
+        """ Returns the (offsets, indices) arrays of the face -> faces CSR graph,
+        two faces being adjacent if they share an edge
+        """
+        return self._csr_arrays(4)
+    }
+};
+
+class EdgeDiscretizer {
+    public:
+        enum {QuasiUniformDeflection = 0, UniformAbscissa = 1, UniformDeflection = 2};
+        %feature("autodoc", "1");
+        EdgeDiscretizer();
+        void AddShape(const TopoDS_Shape& aShape);
+        void Compute(double aDeflection, int anAlgorithm);
+        int NbEdges();
+        int NbPoints();
+        TopoDS_Edge Edge(int anIndex);
+};
+
+%extend EdgeDiscretizer {
+    PyObject* _PointsBuffer() {
+        return _shared_vector_as_memoryview($self->Points());
+    }
+    PyObject* _OffsetsBuffer() {
+        return _shared_vector_as_memoryview($self->Offsets());
+    }
+    %pythoncode {
+    def GetPointsAsArray(self):
+        """ Returns a read-only numpy float64 array of shape (NbPoints(), 3),
+        the points of all the edges (no copy). The array keeps the points of
+        the last Compute call, a new Compute does not modify it.
+        """
+        return _buffer_as_array(self, self._PointsBuffer(), "float64", 3)
+
+    def GetOffsetsAsArray(self):
+        """ Returns a read-only numpy int32 array of NbEdges() + 1 offsets:
+        the points of edge i are points[offsets[i]:offsets[i + 1]]
+        """
+        return _buffer_as_array(self, self._OffsetsBuffer(), "int32", 1).reshape(-1)
+
+    def GetEdgePoints(self, anIndex):
+        """ Returns the list of (x, y, z) tuples of the edge anIndex,
+        does not require numpy
+        """
+        offsets = self._OffsetsBuffer().cast("i")
+        points = self._PointsBuffer().cast("d")
+        return [tuple(points[3 * i:3 * i + 3])
+                for i in range(offsets[anIndex], offsets[anIndex + 1])]
+    }
+};
+
+%extend ShapeTesselator {
+    PyObject* _VerticesPositionBuffer() {
+        return _shared_vector_as_memoryview($self->VerticesPositionBuffer());
+    }
+    PyObject* _NormalsBuffer() {
+        return _shared_vector_as_memoryview($self->NormalsBuffer());
+    }
+    PyObject* _IndexedVerticesPositionBuffer() {
+        return _shared_vector_as_memoryview($self->IndexedVerticesPositionBuffer());
+    }
+    PyObject* _IndexedNormalsBuffer() {
+        return _shared_vector_as_memoryview($self->IndexedNormalsBuffer());
+    }
+    PyObject* _TriangleIndicesBuffer() {
+        return _shared_vector_as_memoryview($self->TriangleIndicesBuffer());
+    }
+    PyObject* _FaceRangesBuffer() {
+        return _shared_vector_as_memoryview($self->FaceRangesBuffer());
+    }
+    PyObject* _EdgesPositionBuffer() {
+        return _shared_vector_as_memoryview($self->EdgesPositionBuffer());
+    }
+    PyObject* _EdgesOffsetsBuffer() {
+        return _shared_vector_as_memoryview($self->EdgesOffsetsBuffer());
+    }
+    PyObject* _EdgesSegmentsBuffer() {
+        return _shared_vector_as_memoryview($self->EdgesSegmentsBuffer());
+    }
+    %pythoncode {
+    def GetVerticesPositionBuffer(self):
+        """ Returns a read-only memoryview on the vertex positions, three
+        vertices per triangle, as float32. The view shares the memory of the
+        tesselator and keeps it alive: it remains valid after the tesselator
+        is deleted, or updated (it then views the previous mesh).
+        """
+        return self._VerticesPositionBuffer()
+
+    def GetNormalsBuffer(self):
+        """ Returns a read-only memoryview on the vertex normals, three
+        normals per triangle, as float32. Same lifetime as GetVerticesPositionBuffer.
+        """
+        return self._NormalsBuffer()
+
+    def GetVerticesPositionAsArray(self):
+        """ Returns a read-only numpy float32 array of shape (n, 3), viewing
+        the vertex positions stored by the tesselator (no copy)
+        """
+        return _buffer_as_array(self, self._VerticesPositionBuffer(), "float32", 3)
+
+    def GetNormalsAsArray(self):
+        """ Returns a read-only numpy float32 array of shape (n, 3), viewing
+        the vertex normals stored by the tesselator (no copy)
+        """
+        return _buffer_as_array(self, self._NormalsBuffer(), "float32", 3)
+
+    def GetIndexedVerticesPositionAsArray(self):
+        """ Indexed output mode. Returns a read-only numpy float32 array of
+        shape (ObjGetVertexCount(), 3): each triangulation node is stored once
+        """
+        return _buffer_as_array(self, self._IndexedVerticesPositionBuffer(), "float32", 3)
+
+    def GetIndexedNormalsAsArray(self):
+        """ Indexed output mode. Returns a read-only numpy float32 array of
+        shape (ObjGetNormalCount(), 3), one normal per triangulation node
+        """
+        return _buffer_as_array(self, self._IndexedNormalsBuffer(), "float32", 3)
+
+    def GetTriangleIndicesAsArray(self):
+        """ Indexed output mode. Returns a read-only numpy uint32 array of
+        shape (ObjGetTriangleCount(), 3), the node indices of each triangle
+        """
+        return _buffer_as_array(self, self._TriangleIndicesBuffer(), "uint32", 3)
+
+    def GetFaceRangesAsArray(self):
+        """ Returns a read-only numpy int32 array of shape (ObjGetFaceCount(), 5).
+        For each triangulated face: first triangle, number of triangles, first
+        vertex, number of vertices (indexed mode) and index of the parent solid
+        (-1 if none). Row i describes the face ObjGetFace(i).
+        """
+        return _buffer_as_array(self, self._FaceRangesBuffer(), "int32", 5)
+
+    def GetFaceRanges(self):
+        """ Returns the list of the (first triangle, number of triangles) tuples
+        of the triangulated faces, does not require numpy
+        """
+        face_ranges = self._FaceRangesBuffer().cast("i")
+        return [(face_ranges[i], face_ranges[i + 1]) for i in range(0, len(face_ranges), 5)]
+
+    def GetFaces(self):
+        """ Returns the list of the triangulated faces, in the order of the face ranges """
+        return [self.ObjGetFace(i) for i in range(self.ObjGetFaceCount())]
+
+    def GetEdgesPositionAsArray(self):
+        """ Returns a read-only numpy float32 array of shape (n, 3), the points
+        of all the edge polylines (Compute must be called with compute_edges=True)
+        """
+        return _buffer_as_array(self, self._EdgesPositionBuffer(), "float32", 3)
+
+    def GetEdgesOffsetsAsArray(self):
+        """ Returns a read-only numpy int32 array of ObjGetEdgeCount() + 1 offsets:
+        the points of edge i are GetEdgesPositionAsArray()[offsets[i]:offsets[i + 1]]
+        """
+        return _buffer_as_array(self, self._EdgesOffsetsBuffer(), "int32", 1).reshape(-1)
+
+    def GetEdgesSegmentsAsArray(self):
+        """ Returns a read-only numpy float32 array of shape (n, 2, 3), the line
+        segments of all the edge polylines, ready for a LineSegments geometry
+        """
+        return _buffer_as_array(self, self._EdgesSegmentsBuffer(), "float32", 6).reshape(-1, 2, 3)
+
+    def GetEdgesSegmentsBuffer(self):
+        """ Returns a read-only memoryview on the float32 line segments buffer """
+        return self._EdgesSegmentsBuffer()
+
+    def GetEdgesPolylines(self):
+        """ Returns the list of the edge polylines, each one being a list of
+        (x, y, z) tuples. Does not require numpy.
+        """
+        positions = self._EdgesPositionBuffer().cast("f")
+        offsets = self._EdgesOffsetsBuffer().cast("i")
+        return [[tuple(positions[3 * i:3 * i + 3]) for i in range(offsets[i_edge], offsets[i_edge + 1])]
+                for i_edge in range(len(offsets) - 1)]
+
+    def GetIndexedMesh(self):
+        """ Returns the tuple (vertices, normals, triangle_indices) of numpy
+        arrays describing the indexed mesh
+        """
+        return (self.GetIndexedVerticesPositionAsArray(),
+                self.GetIndexedNormalsAsArray(),
+                self.GetTriangleIndicesAsArray())
+
+    def to_glb_bytes(self, node_per="shape"):
+        """ Returns the mesh as a binary glTF 2.0 (GLB) bytes object.
+        node_per: "shape", "solid" or "face", the granularity of glTF nodes
+        """
+        return b"".join(_tesselator_to_glb_bytes(self, node_per))
+
+    def ExportShapeToGLB(self, filename, node_per="shape"):
+        """ Writes the mesh to a binary glTF 2.0 (GLB) file. Float32 and
+        uint32 buffers are written straight from the tesselator memory.
+        node_per: "shape", "solid" or "face", the granularity of glTF nodes
+        """
+        with open(filename, "wb") as glb_file:
+            for chunk in _tesselator_to_glb_bytes(self, node_per):
+                glb_file.write(chunk)
+    }
 };
@@ -0,0 +1,192 @@
+// Copyright 2020 Thomas Paviot (tpaviot@gmail.com)
+//
+//This file is part of pythonOCC.
+//
+//pythonOCC is free software: you can redistribute it and/or modify
+//it under the terms of the GNU Lesser General Public License as published by
+//the Free Software Foundation, either version 3 of the License, or
+//(at your option) any later version.
+//
+//pythonOCC is distributed in the hope that it will be useful,
+//but WITHOUT ANY WARRANTY; without even the implied warranty of
+//MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+//GNU Lesser General Public License for more details.
+//
+//You should have received a copy of the GNU Lesser General Public License
+//along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+//---------------------------------------------------------------------------
+#include "TopologyGraph.h"
+//---------------------------------------------------------------------------
+#include <Standard_OutOfRange.hxx>
+#include <TopExp.hxx>
+#include <TopExp_Explorer.hxx>
+#include <TopoDS.hxx>
+
+//---------------------------------------------------------------------------
+TopologyGraph::TopologyGraph(TopoDS_Shape aShape):
+  myShape(aShape),
+  myFaceEdgesOffsets(std::make_shared<std::vector<int> >()),
+  myFaceEdges(std::make_shared<std::vector<int> >()),
+  myEdgeVerticesOffsets(std::make_shared<std::vector<int> >()),
+  myEdgeVertices(std::make_shared<std::vector<int> >()),
+  myEdgeFacesOffsets(std::make_shared<std::vector<int> >()),
+  myEdgeFaces(std::make_shared<std::vector<int> >()),
+  myVertexEdgesOffsets(std::make_shared<std::vector<int> >()),
+  myVertexEdges(std::make_shared<std::vector<int> >()),
+  myFaceFacesOffsets(std::make_shared<std::vector<int> >()),
+  myFaceFaces(std::make_shared<std::vector<int> >())
+{
+    TopExp::MapShapes(myShape, TopAbs_FACE, myFaces);
+    TopExp::MapShapes(myShape, TopAbs_EDGE, myEdges);
+    TopExp::MapShapes(myShape, TopAbs_VERTEX, myVertices);
+    MapSubShapes(myFaces, TopAbs_EDGE, myEdges, *myFaceEdgesOffsets, *myFaceEdges);
+    MapSubShapes(myEdges, TopAbs_VERTEX, myVertices, *myEdgeVerticesOffsets, *myEdgeVertices);
+    Transpose(*myFaceEdgesOffsets, *myFaceEdges, myEdges.Extent(),
+              *myEdgeFacesOffsets, *myEdgeFaces);
+    Transpose(*myEdgeVerticesOffsets, *myEdgeVertices, myVertices.Extent(),
+              *myVertexEdgesOffsets, *myVertexEdges);
+    ComputeFaceAdjacency();
+}
+
+//---------------------------------------------------------------------------
+void TopologyGraph::MapSubShapes(const TopTools_IndexedMapOfShape& aParents,
+                                 TopAbs_ShapeEnum aChildType,
+                                 const TopTools_IndexedMapOfShape& aChildren,
+                                 std::vector<int>& anOffsets,
+                                 std::vector<int>& anIndices)
+{
+    anOffsets.assign(1, 0);
+    anOffsets.reserve(aParents.Extent() + 1);
+    for (int i = 1; i <= aParents.Extent(); i++) {
+      int first = (int)anIndices.size();
+      for (TopExp_Explorer ex(aParents(i), aChildType); ex.More(); ex.Next()) {
+        int child = aChildren.FindIndex(ex.Current()) - 1;
+        // seam edges and closed edges are found twice, keep them once
+        bool found = false;
+        for (size_t j = first; j < anIndices.size(); j++) {
+          if (anIndices[j] == child) {
+            found = true;
+            break;
+          }
+        }
+        if (!found) {
+          anIndices.push_back(child);
+        }
+      }
+      anOffsets.push_back((int)anIndices.size());
+    }
+}
+
+//---------------------------------------------------------------------------
+void TopologyGraph::Transpose(const std::vector<int>& anOffsets,
+                              const std::vector<int>& anIndices,
+                              int aNbTargets,
+                              std::vector<int>& aTransposedOffsets,
+                              std::vector<int>& aTransposedIndices)
+{
+    // counting sort: sources are visited in order, so that the
+    // neighbours of each target are sorted
+    aTransposedOffsets.assign(aNbTargets + 1, 0);
+    for (size_t i = 0; i < anIndices.size(); i++) {
+      aTransposedOffsets[anIndices[i] + 1]++;
+    }
+    for (int i = 0; i < aNbTargets; i++) {
+      aTransposedOffsets[i + 1] += aTransposedOffsets[i];
+    }
+    aTransposedIndices.resize(anIndices.size());
+    std::vector<int> position(aTransposedOffsets.begin(), aTransposedOffsets.end() - 1);
+    int nbSources = (int)anOffsets.size() - 1;
+    for (int source = 0; source < nbSources; source++) {
+      for (int j = anOffsets[source]; j < anOffsets[source + 1]; j++) {
+        aTransposedIndices[position[anIndices[j]]++] = source;
+      }
+    }
+}
+
+//---------------------------------------------------------------------------
+void TopologyGraph::ComputeFaceAdjacency()
+{
+    // two faces are adjacent if they share an edge
+    int nbFaces = myFaces.Extent();
+    const std::vector<int>& faceEdgesOffsets = *myFaceEdgesOffsets;
+    const std::vector<int>& faceEdges = *myFaceEdges;
+    const std::vector<int>& edgeFacesOffsets = *myEdgeFacesOffsets;
+    const std::vector<int>& edgeFaces = *myEdgeFaces;
+    std::vector<int>& faceFacesOffsets = *myFaceFacesOffsets;
+    std::vector<int>& faceFaces = *myFaceFaces;
+    std::vector<int> lastSeen(nbFaces, -1);
+    faceFacesOffsets.assign(1, 0);
+    faceFacesOffsets.reserve(nbFaces + 1);
+    for (int face = 0; face < nbFaces; face++) {
+      lastSeen[face] = face;
+      for (int j = faceEdgesOffsets[face]; j < faceEdgesOffsets[face + 1]; j++) {
+        int edge = faceEdges[j];
+        for (int k = edgeFacesOffsets[edge]; k < edgeFacesOffsets[edge + 1]; k++) {
+          int other = edgeFaces[k];
+          if (lastSeen[other] != face) {
+            lastSeen[other] = face;
+            faceFaces.push_back(other);
+          }
+        }
+      }
+      faceFacesOffsets.push_back((int)faceFaces.size());
+    }
+}
+
+//---------------------------------------------------------------------------
+int TopologyGraph::NbFaces() const
+{
+    return myFaces.Extent();
+}
+
+int TopologyGraph::NbEdges() const
+{
+    return myEdges.Extent();
+}
+
+int TopologyGraph::NbVertices() const
+{
+    return myVertices.Extent();
+}
+
+//---------------------------------------------------------------------------
+TopoDS_Face TopologyGraph::Face(int anIndex) const
+{
+    if (anIndex < 0 || anIndex >= myFaces.Extent()) {
+      throw Standard_OutOfRange("TopologyGraph::Face, index out of range");
+    }
+    return TopoDS::Face(myFaces(anIndex + 1));
+}
+
+TopoDS_Edge TopologyGraph::Edge(int anIndex) const
+{
+    if (anIndex < 0 || anIndex >= myEdges.Extent()) {
+      throw Standard_OutOfRange("TopologyGraph::Edge, index out of range");
+    }
+    return TopoDS::Edge(myEdges(anIndex + 1));
+}
+
+TopoDS_Vertex TopologyGraph::Vertex(int anIndex) const
+{
+    if (anIndex < 0 || anIndex >= myVertices.Extent()) {
+      throw Standard_OutOfRange("TopologyGraph::Vertex, index out of range");
+    }
+    return TopoDS::Vertex(myVertices(anIndex + 1));
+}
+
+//---------------------------------------------------------------------------
+int TopologyGraph::FaceIndex(const TopoDS_Shape& aShape) const
+{
+    return myFaces.FindIndex(aShape) - 1;
+}
+
+int TopologyGraph::EdgeIndex(const TopoDS_Shape& aShape) const
+{
+    return myEdges.FindIndex(aShape) - 1;
+}
+
+int TopologyGraph::VertexIndex(const TopoDS_Shape& aShape) const
+{
+    return myVertices.FindIndex(aShape) - 1;
+}
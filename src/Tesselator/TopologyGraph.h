@@ -0,0 +1,92 @@
+// Copyright 2020 Thomas Paviot (tpaviot@gmail.com)
+//
+//This file is part of pythonOCC.
+//
+//pythonOCC is free software: you can redistribute it and/or modify
+//it under the terms of the GNU Lesser General Public License as published by
+//the Free Software Foundation, either version 3 of the License, or
+//(at your option) any later version.
+//
+//pythonOCC is distributed in the hope that it will be useful,
+//but WITHOUT ANY WARRANTY; without even the implied warranty of
+//MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+//GNU Lesser General Public License for more details.
+//
+//You should have received a copy of the GNU Lesser General Public License
+//along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+//---------------------------------------------------------------------------
+#ifndef TopologyGraphH
+#define TopologyGraphH
+//---------------------------------------------------------------------------
+#include <memory>
+#include <vector>
+//---------------------------------------------------------------------------
+#include <TopoDS_Shape.hxx>
+#include <TopoDS_Face.hxx>
+#include <TopoDS_Edge.hxx>
+#include <TopoDS_Vertex.hxx>
+#include <TopTools_IndexedMapOfShape.hxx>
+//---------------------------------------------------------------------------
+// Face/edge/vertex adjacency of a shape, as CSR (compressed sparse row)
+// integer arrays: the neighbours of item i are
+// indices[offsets[i]:offsets[i + 1]].
+// Faces, edges and vertices are numbered from 0, in the order of
+// TopExp::MapShapes (sub-shapes with the same TShape and Location,
+// whatever their orientation, share the same index).
+// The arrays are shared with the python buffers that view them.
+class TopologyGraph
+{
+  protected:
+      TopoDS_Shape myShape;
+      TopTools_IndexedMapOfShape myFaces;
+      TopTools_IndexedMapOfShape myEdges;
+      TopTools_IndexedMapOfShape myVertices;
+      std::shared_ptr<std::vector<int> > myFaceEdgesOffsets;
+      std::shared_ptr<std::vector<int> > myFaceEdges;
+      std::shared_ptr<std::vector<int> > myEdgeVerticesOffsets;
+      std::shared_ptr<std::vector<int> > myEdgeVertices;
+      std::shared_ptr<std::vector<int> > myEdgeFacesOffsets;
+      std::shared_ptr<std::vector<int> > myEdgeFaces;
+      std::shared_ptr<std::vector<int> > myVertexEdgesOffsets;
+      std::shared_ptr<std::vector<int> > myVertexEdges;
+      std::shared_ptr<std::vector<int> > myFaceFacesOffsets;
+      std::shared_ptr<std::vector<int> > myFaceFaces;
+
+      void MapSubShapes(const TopTools_IndexedMapOfShape& aParents,
+                        TopAbs_ShapeEnum aChildType,
+                        const TopTools_IndexedMapOfShape& aChildren,
+                        std::vector<int>& anOffsets,
+                        std::vector<int>& anIndices);
+      void Transpose(const std::vector<int>& anOffsets,
+                     const std::vector<int>& anIndices,
+                     int aNbTargets,
+                     std::vector<int>& aTransposedOffsets,
+                     std::vector<int>& aTransposedIndices);
+      void ComputeFaceAdjacency();
+
+  public:
+      TopologyGraph(TopoDS_Shape aShape);
+      int NbFaces() const;
+      int NbEdges() const;
+      int NbVertices() const;
+      TopoDS_Face Face(int anIndex) const;
+      TopoDS_Edge Edge(int anIndex) const;
+      TopoDS_Vertex Vertex(int anIndex) const;
+      // returns -1 if the shape is not a sub-shape
+      int FaceIndex(const TopoDS_Shape& aShape) const;
+      int EdgeIndex(const TopoDS_Shape& aShape) const;
+      int VertexIndex(const TopoDS_Shape& aShape) const;
+      std::shared_ptr<const std::vector<int> > FaceEdgesOffsets() const {return myFaceEdgesOffsets;}
+      std::shared_ptr<const std::vector<int> > FaceEdges() const {return myFaceEdges;}
+      std::shared_ptr<const std::vector<int> > EdgeVerticesOffsets() const {return myEdgeVerticesOffsets;}
+      std::shared_ptr<const std::vector<int> > EdgeVertices() const {return myEdgeVertices;}
+      std::shared_ptr<const std::vector<int> > EdgeFacesOffsets() const {return myEdgeFacesOffsets;}
+      std::shared_ptr<const std::vector<int> > EdgeFaces() const {return myEdgeFaces;}
+      std::shared_ptr<const std::vector<int> > VertexEdgesOffsets() const {return myVertexEdgesOffsets;}
+      std::shared_ptr<const std::vector<int> > VertexEdges() const {return myVertexEdges;}
+      std::shared_ptr<const std::vector<int> > FaceFacesOffsets() const {return myFaceFacesOffsets;}
+      std::shared_ptr<const std::vector<int> > FaceFaces() const {return myFaceFaces;}
+};
+
+#endif
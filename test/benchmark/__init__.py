@@ -0,0 +1,32 @@
+##Copyright 2020 Thomas Paviot (tpaviot@gmail.com)
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+""" pythonocc benchmark suite.
+
+Run all the benchmarks and dump the results to a json file:
+
+    cd test
+    python -m benchmark.run_benchmarks --scale medium --output results.json
+
+Compare with a previous run:
+
+    python -m benchmark.run_benchmarks --output new.json --compare results.json
+
+Compare the TopoDS_Shape pickle formats on the sample files:
+
+    python -m benchmark.pickle_formats
+"""
@@ -0,0 +1,131 @@
+##Copyright 2020 Thomas Paviot (tpaviot@gmail.com)
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+""" Parametric models used by the benchmarks. Each generator takes the
+approximate number of faces of the resulting shape.
+"""
+
+import math
+import os
+
+from OCC.Core.gp import gp_Pnt, gp_Vec, gp_Trsf, gp_OX, gp_DZ, gp_Ax2
+from OCC.Core.GC import GC_MakeArcOfCircle, GC_MakeSegment
+from OCC.Core.BRep import BRep_Builder
+from OCC.Core.BRepAlgoAPI import BRepAlgoAPI_Fuse
+from OCC.Core.BRepBuilderAPI import (BRepBuilderAPI_MakeEdge, BRepBuilderAPI_MakeWire,
+                                     BRepBuilderAPI_MakeFace, BRepBuilderAPI_Transform)
+from OCC.Core.BRepFilletAPI import BRepFilletAPI_MakeFillet
+from OCC.Core.BRepPrimAPI import (BRepPrimAPI_MakeBox, BRepPrimAPI_MakeTorus,
+                                  BRepPrimAPI_MakePrism, BRepPrimAPI_MakeCylinder)
+from OCC.Core.TopAbs import TopAbs_EDGE, TopAbs_FACE
+from OCC.Core.TopExp import TopExp_Explorer
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.TopoDS import TopoDS_Compound, topods
+
+# the sample files shipped with the unit tests
+SAMPLES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test_io')
+
+SAMPLE_FILES = {"step_ap203": "as1_pe_203.stp",
+                "step_ap214": "as1-oc-214.stp",
+                "step_multiple_roots": "stp_multiple_shp_at_root.stp",
+                "iges": "sunglasses_lens.igs",
+                "stl_ascii": "bottle_ascii.stl",
+                "stl_binary": "cube_binary.stl"}
+
+
+def get_sample_filename(name):
+    return os.path.join(SAMPLES_DIRECTORY, SAMPLE_FILES[name])
+
+
+def _grid_compound(shape, nbr_copies, step):
+    """ returns a compound of nbr_copies located copies of shape,
+    on a square grid. The copies share the same TShape.
+    """
+    compound = TopoDS_Compound()
+    builder = BRep_Builder()
+    builder.MakeCompound(compound)
+    nbr_columns = int(math.ceil(math.sqrt(nbr_copies)))
+    for i in range(nbr_copies):
+        trsf = gp_Trsf()
+        trsf.SetTranslation(gp_Vec((i % nbr_columns) * step, (i // nbr_columns) * step, 0.))
+        builder.Add(compound, shape.Moved(TopLoc_Location(trsf)))
+    return compound
+
+
+def box_grid(nbr_faces):
+    """ a grid of independent boxes, 6 faces each """
+    compound = TopoDS_Compound()
+    builder = BRep_Builder()
+    builder.MakeCompound(compound)
+    nbr_boxes = max(1, nbr_faces // 6)
+    nbr_columns = int(math.ceil(math.sqrt(nbr_boxes)))
+    for i in range(nbr_boxes):
+        corner = gp_Pnt((i % nbr_columns) * 20., (i // nbr_columns) * 20., 0.)
+        builder.Add(compound, BRepPrimAPI_MakeBox(corner, 10., 10., 10.).Shape())
+    return compound
+
+
+def torus_array(nbr_faces):
+    """ an array of located tori, 1 face each. All tori share the same TShape """
+    torus = BRepPrimAPI_MakeTorus(10., 3.).Shape()
+    return _grid_compound(torus, max(1, nbr_faces), 30.)
+
+
+def bottle(nbr_faces=None):
+    """ the classic OCC bottle body (filleted prism fused with the neck).
+    If nbr_faces is set, the bottle is repeated to reach this number of faces.
+    """
+    height, width, thickness = 70., 50., 30.
+    pnt1 = gp_Pnt(-width / 2., 0, 0)
+    pnt2 = gp_Pnt(-width / 2., -thickness / 4., 0)
+    pnt3 = gp_Pnt(0, -thickness / 2., 0)
+    pnt4 = gp_Pnt(width / 2., -thickness / 4., 0)
+    pnt5 = gp_Pnt(width / 2., 0, 0)
+    edge1 = BRepBuilderAPI_MakeEdge(GC_MakeSegment(pnt1, pnt2).Value()).Edge()
+    edge2 = BRepBuilderAPI_MakeEdge(GC_MakeArcOfCircle(pnt2, pnt3, pnt4).Value()).Edge()
+    edge3 = BRepBuilderAPI_MakeEdge(GC_MakeSegment(pnt4, pnt5).Value()).Edge()
+    wire = BRepBuilderAPI_MakeWire(edge1, edge2, edge3).Wire()
+    mirror = gp_Trsf()
+    mirror.SetMirror(gp_OX())
+    mirrored_wire = topods.Wire(BRepBuilderAPI_Transform(wire, mirror).Shape())
+    make_wire = BRepBuilderAPI_MakeWire()
+    make_wire.Add(wire)
+    make_wire.Add(mirrored_wire)
+    face = BRepBuilderAPI_MakeFace(make_wire.Wire()).Face()
+    body = BRepPrimAPI_MakePrism(face, gp_Vec(0, 0, height)).Shape()
+    # fillet all edges
+    make_fillet = BRepFilletAPI_MakeFillet(body)
+    edge_explorer = TopExp_Explorer(body, TopAbs_EDGE)
+    while edge_explorer.More():
+        make_fillet.Add(thickness / 12., topods.Edge(edge_explorer.Current()))
+        edge_explorer.Next()
+    neck = BRepPrimAPI_MakeCylinder(gp_Ax2(gp_Pnt(0, 0, height), gp_DZ()),
+                                    thickness / 4., height / 10.).Shape()
+    shape = BRepAlgoAPI_Fuse(make_fillet.Shape(), neck).Shape()
+    if nbr_faces is None:
+        return shape
+    nbr_bottle_faces = 0
+    face_explorer = TopExp_Explorer(shape, TopAbs_FACE)
+    while face_explorer.More():
+        nbr_bottle_faces += 1
+        face_explorer.Next()
+    return _grid_compound(shape, max(1, nbr_faces // nbr_bottle_faces), 100.)
+
+
+MODELS = {"box_grid": box_grid,
+          "torus_array": torus_array,
+          "bottle": bottle}
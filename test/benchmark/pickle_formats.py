@@ -0,0 +1,108 @@
+##Copyright 2020 Thomas Paviot (tpaviot@gmail.com)
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+""" Compares the TopoDS_Shape pickle formats on the sample files: the
+text BRep format (version 1), the binary BRep format and the zlib
+compressed binary format. For each file and format, reports the pickle
+size and the best dumps + loads round-trip time. The shapes are not
+meshed: the text format also writes the triangulations, the OCCT 7.4
+binary format does not.
+
+    cd test
+    python -m benchmark.pickle_formats --output pickle_formats.json
+"""
+
+import argparse
+import json
+import pickle
+import sys
+import time
+
+from OCC.Core.BRepTools import BRepTools_ShapeSet
+from OCC.Core.TopoDS import TopoDS_Shape, set_pickle_compression_level
+
+from .models import SAMPLE_FILES, get_sample_filename
+from .run_benchmarks import _read_file
+
+FORMATS = ["text", "binary", "binary_zlib"]
+
+
+def _text_round_trip(shape):
+    """ the version 1 pickle: text BRep and location index """
+    shape_set = BRepTools_ShapeSet()
+    shape_set.Add(shape)
+    state = shape_set.WriteToString(), shape_set.Locations().Index(shape.Location())
+    dump = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    loaded_shape = TopoDS_Shape.__new__(TopoDS_Shape)
+    loaded_shape.__setstate__(pickle.loads(dump))
+    return len(dump)
+
+
+def _binary_round_trip(shape):
+    dump = pickle.dumps(shape, protocol=pickle.HIGHEST_PROTOCOL)
+    pickle.loads(dump)
+    return len(dump)
+
+
+def round_trip(shape, pickle_format):
+    """ dumps and loads the shape, returns the pickle size in bytes """
+    if pickle_format == "text":
+        return _text_round_trip(shape)
+    set_pickle_compression_level(6 if pickle_format == "binary_zlib" else 0)
+    try:
+        return _binary_round_trip(shape)
+    finally:
+        set_pickle_compression_level(0)
+
+
+def run(repeat=3, verbose=True):
+    """ returns a dict, for each sample file and format, of the pickle size
+    and the min round-trip time
+    """
+    results = {}
+    for sample in sorted(SAMPLE_FILES):
+        shape = _read_file(get_sample_filename(sample))
+        for pickle_format in FORMATS:
+            times = []
+            for _ in range(repeat):
+                init_time = time.perf_counter()
+                size = round_trip(shape, pickle_format)
+                times.append(time.perf_counter() - init_time)
+            name = "%s[%s]" % (sample, pickle_format)
+            results[name] = {"file": sample, "format": pickle_format,
+                             "bytes": size, "min": min(times)}
+            if verbose:
+                print("%-40s %12i bytes %10.4fs" % (name, size, min(times)))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TopoDS_Shape pickle formats benchmark")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="number of repetitions of each round-trip (default: 3)")
+    parser.add_argument("--output", default=None,
+                        help="dump the results to this json file")
+    args = parser.parse_args(argv)
+    results = run(args.repeat)
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+##Copyright 2020 Thomas Paviot (tpaviot@gmail.com)
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+""" Runs the benchmarks, and dumps timings and peak RSS to a json file.
+
+Each benchmark runs in its own process, so that the peak RSS is the one
+of the benchmark and not of the previous ones. The setup (model
+generation, file lookup, tesselation for the exporters) is done again
+before each repetition and is not timed: meshes are stored in the shape,
+tesselating twice the same shape would be much faster the second time.
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import pickle
+import platform
+import queue
+import statistics
+import sys
+import time
+
+try:
+    import resource
+    HAVE_RESOURCE = True
+except ImportError:  # Windows
+    HAVE_RESOURCE = False
+
+from OCC import VERSION as OCC_VERSION
+from OCC.Core.Tesselator import ShapeTesselator
+from OCC.Extend.DataExchange import read_step_file, read_iges_file, read_stl_file
+from OCC.Extend.TopologyUtils import TopologyExplorer
+
+from .models import MODELS, SAMPLE_FILES, get_sample_filename
+
+# the number of faces of the parametric models, for each scale
+SCALES = {"small": [10, 100, 1000],
+          "medium": [10, 100, 1000, 10000],
+          "large": [10, 100, 1000, 10000, 100000]}
+
+
+def _peak_rss_kb():
+    """ the peak resident set size of the current process, in kB """
+    if not HAVE_RESOURCE:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":  # bytes on macOS
+        return peak_rss // 1024
+    return peak_rss
+
+
+def _read_file(filename):
+    if filename.endswith(".stp"):
+        return read_step_file(filename, verbosity=False)
+    if filename.endswith(".igs"):
+        return read_iges_file(filename)
+    return read_stl_file(filename)
+
+
+def _computed_tesselator(shape):
+    tess = ShapeTesselator(shape)
+    tess.Compute(parallel=True)
+    return tess
+
+
+def _traverse(shape):
+    topo = TopologyExplorer(shape)
+    for _ in topo.faces():
+        pass
+    for _ in topo.edges():
+        pass
+    for _ in topo.vertices():
+        pass
+
+
+def _tesselate(shape, parallel):
+    ShapeTesselator(shape).Compute(parallel=parallel)
+
+
+# each benchmark group: (setup, run). setup takes the benchmark params and returns
+# the argument passed to run, which is the timed function.
+GROUPS = {
+    "read": (lambda params: get_sample_filename(params["file"]),
+             _read_file),
+    "tesselate": (lambda params: (MODELS[params["model"]](params["faces"]), params["parallel"]),
+                  lambda args: _tesselate(*args)),
+    "export_json": (lambda params: _computed_tesselator(MODELS[params["model"]](params["faces"])),
+                    lambda tess: tess.ExportShapeToThreejsJSONString("shape")),
+    "export_x3d": (lambda params: _computed_tesselator(MODELS[params["model"]](params["faces"])),
+                   lambda tess: tess.ExportShapeToX3DTriangleSet()),
+    "topology": (lambda params: MODELS[params["model"]](params["faces"]),
+                 _traverse),
+    "pickle": (lambda params: MODELS[params["model"]](params["faces"]),
+               lambda shape: pickle.loads(pickle.dumps(shape))),
+}
+
+
+def build_benchmarks(scale="small", groups=None):
+    """ returns the list of (name, group, params) to run """
+    benchmarks = []
+    for sample in sorted(SAMPLE_FILES):
+        benchmarks.append(("read[%s]" % sample, "read", {"file": sample}))
+    for model in sorted(MODELS):
+        for nbr_faces in SCALES[scale]:
+            for parallel in [False, True]:
+                benchmarks.append(("tesselate[%s,faces=%i,parallel=%s]" % (model, nbr_faces, parallel),
+                                   "tesselate",
+                                   {"model": model, "faces": nbr_faces, "parallel": parallel}))
+            for group in ["export_json", "export_x3d", "topology", "pickle"]:
+                benchmarks.append(("%s[%s,faces=%i]" % (group, model, nbr_faces),
+                                   group,
+                                   {"model": model, "faces": nbr_faces}))
+    if groups is not None:
+        benchmarks = [benchmark for benchmark in benchmarks if benchmark[1] in groups]
+    return benchmarks
+
+
+def _run_benchmark(group, params, repeat, result_queue):
+    """ runs in a child process, puts the result dict in the result_queue """
+    setup, run = GROUPS[group]
+    try:
+        times = []
+        rss_before = None
+        for _ in range(repeat):
+            arg = setup(params)
+            if rss_before is None:
+                rss_before = _peak_rss_kb()
+            init_time = time.perf_counter()
+            run(arg)
+            times.append(time.perf_counter() - init_time)
+            del arg
+        result_queue.put({"group": group,
+                          "params": params,
+                          "times": times,
+                          "min": min(times),
+                          "median": statistics.median(times),
+                          "mean": statistics.mean(times),
+                          "rss_before_kb": rss_before,
+                          "peak_rss_kb": _peak_rss_kb()})
+    except Exception as error:
+        result_queue.put({"group": group, "params": params,
+                          "error": "%s: %s" % (type(error).__name__, error)})
+
+
+def run_benchmarks(scale="small", repeat=3, groups=None, name_filter=None, verbose=True):
+    """ runs the benchmarks, each one in a new process, and returns
+    the results dict
+    """
+    results = {}
+    for name, group, params in build_benchmarks(scale, groups):
+        if name_filter is not None and name_filter not in name:
+            continue
+        result_queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=_run_benchmark, args=(group, params, repeat, result_queue))
+        process.start()
+        result = None
+        while result is None:
+            try:
+                result = result_queue.get(timeout=1.)
+            except queue.Empty:
+                # the benchmark crashed
+                if not process.is_alive():
+                    result = {"group": group, "params": params,
+                              "error": "process exited with code %s" % process.exitcode}
+        process.join()
+        results[name] = result
+        if verbose:
+            if "error" in result:
+                print("%-60s ERROR %s" % (name, result["error"]))
+            else:
+                print("%-60s %10.4fs %10s kB" % (name, result["min"], result["peak_rss_kb"]))
+    return {"metadata": {"date": datetime.datetime.now().isoformat(),
+                         "occ_version": OCC_VERSION,
+                         "python": platform.python_version(),
+                         "platform": platform.platform(),
+                         "cpu_count": multiprocessing.cpu_count(),
+                         "scale": scale,
+                         "repeat": repeat},
+            "results": results}
+
+
+def compare_results(new_results, old_results, threshold=0.1):
+    """ compares the min times of two runs. Returns the list of
+    (name, old time, new time) for the benchmarks slower by more than threshold
+    """
+    regressions = []
+    for name, new_result in sorted(new_results["results"].items()):
+        old_result = old_results["results"].get(name)
+        if old_result is None or "error" in old_result or "error" in new_result:
+            continue
+        ratio = new_result["min"] / old_result["min"] if old_result["min"] > 0. else 1.
+        flag = ""
+        if ratio > 1. + threshold:
+            flag = "REGRESSION"
+            regressions.append((name, old_result["min"], new_result["min"]))
+        print("%-60s %10.4fs %10.4fs %7.2f %s" % (name, old_result["min"], new_result["min"], ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="pythonocc benchmarks")
+    parser.add_argument("--scale", default="small", choices=sorted(SCALES),
+                        help="size of the parametric models (default: small)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="number of repetitions of each benchmark (default: 3)")
+    parser.add_argument("--group", action="append", choices=sorted(GROUPS),
+                        help="only run this group of benchmarks, can be repeated")
+    parser.add_argument("--filter", default=None,
+                        help="only run benchmarks whose name contains this string")
+    parser.add_argument("--output", default=None,
+                        help="dump the results to this json file")
+    parser.add_argument("--compare", default=None,
+                        help="a previous json result file to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative slowdown reported as a regression (default: 0.1)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scale, args.repeat, args.group, args.filter)
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.compare is not None:
+        with open(args.compare, "r") as compare_file:
+            old_results = json.load(compare_file)
+        if compare_results(results, old_results, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
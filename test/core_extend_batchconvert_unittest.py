@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+##Copyright 2009-2016 Thomas Paviot (tpaviot@gmail.com)
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import unittest
+
+from OCC.Extend.BatchConvert import batch_convert, output_filenames
+
+SAMPLES_DIRECTORY = os.path.join('.', 'test_io')
+
+def get_test_fullname(filename):
+    return os.path.join(SAMPLES_DIRECTORY, filename)
+
+# the sample files
+STEP_AP203_SAMPLE_FILE = get_test_fullname('as1_pe_203.stp')
+STL_BINARY_SAMPLE_FILE = get_test_fullname('cube_binary.stl')
+
+
+class TestExtendBatchConvert(unittest.TestCase):
+
+    def test_batch_convert(self):
+        output_directory = get_test_fullname("batch_convert")
+        summary_filename = os.path.join(output_directory, "summary.json")
+        input_files = [STEP_AP203_SAMPLE_FILE, STL_BINARY_SAMPLE_FILE,
+                       get_test_fullname("not_a_file.stp")]
+        summary = batch_convert(input_files, output_directory, "glb",
+                                processes=2, timeout=120, retries=1,
+                                summary_filename=summary_filename)
+        self.assertEqual(summary["succeeded"], 2)
+        self.assertEqual(summary["failed"], 1)
+        self.assertEqual(summary["failures"][0]["attempts"], 2)
+        self.assertEqual(summary["stages"]["mesh"]["files"], 2)
+        self.assertTrue(os.path.isfile(os.path.join(output_directory, "as1_pe_203.glb")))
+        self.assertTrue(os.path.isfile(summary_filename))
+
+    def test_output_filenames(self):
+        input_files = [os.path.join("in", "a", "part.step"), os.path.join("in", "b", "part.step"),
+                       os.path.join("in", "part.step"), os.path.join("in", "part.iges")]
+        self.assertEqual(output_filenames(input_files, "out", "glb"),
+                         [os.path.join("out", "a", "part.glb"), os.path.join("out", "b", "part.glb"),
+                          os.path.join("out", "part.step.glb"), os.path.join("out", "part.iges.glb")])
+        with self.assertRaises(AssertionError):
+            output_filenames(input_files[:1] * 2, "out", "glb")
+
+    def test_batch_convert_same_stem(self):
+        input_directory = get_test_fullname("batch_convert_same_stem")
+        input_files = []
+        for sub_directory in ["a", "b"]:
+            os.makedirs(os.path.join(input_directory, sub_directory), exist_ok=True)
+            input_files.append(os.path.join(input_directory, sub_directory, "cube.stl"))
+            shutil.copy(STL_BINARY_SAMPLE_FILE, input_files[-1])
+        output_directory = get_test_fullname("batch_convert_same_stem_output")
+        summary = batch_convert(input_files, output_directory, "brep", processes=2)
+        self.assertEqual(summary["succeeded"], 2)
+        for sub_directory in ["a", "b"]:
+            self.assertTrue(os.path.isfile(os.path.join(output_directory, sub_directory, "cube.brep")))
+
+
+def suite():
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(TestExtendBatchConvert))
+    return test_suite
+
+if __name__ == "__main__":
+    unittest.main()
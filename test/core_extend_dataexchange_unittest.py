@@ -17,21 +17,40 @@
 ##You should have received a copy of the GNU Lesser General Public License
 ##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
 
+from concurrent.futures import ThreadPoolExecutor
 import os
 import unittest
 
-from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeTorus
+from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeTorus, BRepPrimAPI_MakeBox
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.gp import gp_Trsf, gp_Vec
 from OCC.Core.TopoDS import TopoDS_Compound
+from OCC.Core.BRep import BRep_Tool
 
 from OCC.Extend.DataExchange import (read_step_file,
                                      read_step_file_with_names_colors,
+                                     read_step_assembly,
+                                     iter_step_roots,
                                      read_stl_file,
+                                     read_stl_mesh,
+                                     weld_vertices,
+                                     mesh_to_triangulated_face,
                                      read_iges_file,
                                      write_step_file,
                                      write_stl_file,
+                                     write_stl_from_tesselator,
+                                     write_stl_files,
                                      write_iges_file,
-                                     export_shape_to_svg)
+                                     export_shape_to_svg,
+                                     shape_content_hash)
+from OCC.Extend.TesselatorLOD import TesselatorLOD
+from OCC.Core.Tesselator import ShapeTesselator
 
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except ImportError:
+    HAVE_NUMPY = False
 
 SAMPLES_DIRECTORY = os.path.join('.', 'test_io')
 
@@ -49,6 +68,7 @@ STL_BINARY_SAMPLE_FILE = get_test_fullname('cube_binary.stl')
 # the basic geometry to test exporters
 A_TOPODS_SHAPE = BRepPrimAPI_MakeTorus(200, 50).Shape()
 
+
 class TestExtendDataExchange(unittest.TestCase):
 
     def test_read_step_file(self):
@@ -64,11 +84,58 @@ class TestExtendDataExchange(unittest.TestCase):
         self.assertEqual(len(l), 3)
 
 
+    def test_read_step_file_parallel(self):
+        timings = {}
+        shps = read_step_file(STEP_MULTIPLE_ROOT, as_compound=False, verbosity=False,
+                              parallel=True, max_workers=2, timings=timings)
+        self.assertEqual(len(shps), 3)
+        # the same shapes, in the same order, as the serial transfer
+        serial_shps = read_step_file(STEP_MULTIPLE_ROOT, as_compound=False, verbosity=False)
+        for shp, serial_shp in zip(shps, serial_shps):
+            self.assertEqual(shp.ShapeType(), serial_shp.ShapeType())
+            self.assertEqual(shape_content_hash(shp), shape_content_hash(serial_shp))
+        self.assertEqual(sorted(timings), [1, 2, 3])
+        for transfer_time in timings.values():
+            self.assertGreaterEqual(transfer_time, 0.)
+        compound = read_step_file(STEP_MULTIPLE_ROOT, verbosity=False, parallel=True, max_workers=2)
+        self.assertTrue(isinstance(compound, TopoDS_Compound))
+        # a single root, more workers than roots
+        self.assertFalse(read_step_file(STEP_AP203_SAMPLE_FILE, verbosity=False,
+                                        parallel=True, max_workers=2).IsNull())
+
+
+    def test_iter_step_roots(self):
+        shps = list(iter_step_roots(STEP_MULTIPLE_ROOT))
+        self.assertEqual(len(shps), 3)
+        for shp in shps:
+            self.assertFalse(shp.IsNull())
+        self.assertEqual(len(list(iter_step_roots(STEP_AP203_SAMPLE_FILE))), 1)
+
+
+    def test_read_step_file_from_threads(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            shapes = list(executor.map(read_step_file,
+                                       [STEP_AP203_SAMPLE_FILE, STEP_AP214_SAMPLE_FILE] * 4,
+                                       [True] * 8,
+                                       [False] * 8))
+        for shape in shapes:
+            self.assertFalse(shape.IsNull())
+
+
     def test_read_step_file_names_colors(self):
         read_step_file_with_names_colors(STEP_AP203_SAMPLE_FILE)
         read_step_file_with_names_colors(STEP_AP214_SAMPLE_FILE)
 
 
+    def test_read_step_assembly(self):
+        prototypes, instances = read_step_assembly(STEP_AP214_SAMPLE_FILE)
+        self.assertTrue(prototypes)
+        self.assertEqual(set(prototypes.keys()), set(instances.keys()))
+        # the as1 assembly references the same parts several times
+        nbr_instances = sum(len(locations) for locations in instances.values())
+        self.assertGreater(nbr_instances, len(prototypes))
+
+
     def test_read_iges_file(self):
         read_iges_file(IGES_SAMPLE_FILE)
 
@@ -78,6 +145,59 @@ class TestExtendDataExchange(unittest.TestCase):
         read_stl_file(STL_BINARY_SAMPLE_FILE)
 
 
+    @unittest.skipUnless(HAVE_NUMPY, "numpy not installed")
+    def test_read_stl_mesh_binary(self):
+        vertices, normals, triangles = read_stl_mesh(STL_BINARY_SAMPLE_FILE)
+        self.assertEqual(vertices.shape, (36, 3))
+        self.assertEqual(normals.shape, (12, 3))
+        self.assertEqual(triangles.shape, (12, 3))
+        self.assertEqual(vertices.dtype, np.float32)
+        self.assertEqual(triangles.dtype, np.int32)
+        # the 8 corners of the cube
+        welded_vertices, normals, welded_triangles = read_stl_mesh(STL_BINARY_SAMPLE_FILE, weld=True)
+        self.assertEqual(welded_vertices.shape, (8, 3))
+        self.assertEqual(welded_triangles.shape, (12, 3))
+        # welding does not move the triangles
+        self.assertTrue(np.array_equal(welded_vertices[welded_triangles],
+                                       vertices[triangles]))
+
+
+    @unittest.skipUnless(HAVE_NUMPY, "numpy not installed")
+    def test_read_stl_mesh_ascii(self):
+        vertices, normals, triangles = read_stl_mesh(STL_ASCII_SAMPLE_FILE)
+        self.assertEqual(triangles.shape, (1240, 3))
+        self.assertEqual(vertices.shape, (3720, 3))
+        self.assertAlmostEqual(float(normals[0][1]), -0.966960, places=5)
+        self.assertAlmostEqual(float(vertices[1][0]), -6.75880, places=4)
+        welded_vertices, _, welded_triangles = read_stl_mesh(STL_ASCII_SAMPLE_FILE, weld=True)
+        self.assertLess(len(welded_vertices), len(vertices))
+        self.assertTrue(np.array_equal(welded_vertices[welded_triangles],
+                                       vertices[triangles]))
+
+
+    @unittest.skipUnless(HAVE_NUMPY, "numpy not installed")
+    def test_weld_vertices_tolerance(self):
+        vertices = np.array([[0., 0., 0.], [1., 0., 0.], [0., 1., 0.],
+                             [-0., 0., 0.], [1., 1e-7, 0.], [0., 0., 1.]], dtype=np.float32)
+        triangles = np.arange(6, dtype=np.int32).reshape(-1, 3)
+        # 0. and -0. are merged
+        welded_vertices, welded_triangles = weld_vertices(vertices, triangles)
+        self.assertEqual(len(welded_vertices), 5)
+        self.assertEqual(welded_triangles[0][0], welded_triangles[1][0])
+        welded_vertices, welded_triangles = weld_vertices(vertices, triangles, tolerance=1e-5)
+        self.assertEqual(len(welded_vertices), 4)
+        self.assertEqual(welded_triangles[0][1], welded_triangles[1][1])
+
+
+    @unittest.skipUnless(HAVE_NUMPY, "numpy not installed")
+    def test_mesh_to_triangulated_face(self):
+        vertices, _, triangles = read_stl_mesh(STL_BINARY_SAMPLE_FILE, weld=True)
+        face = mesh_to_triangulated_face(vertices, triangles)
+        triangulation = BRep_Tool.Triangulation(face, TopLoc_Location())
+        self.assertEqual(triangulation.NbNodes(), 8)
+        self.assertEqual(triangulation.NbTriangles(), 12)
+
+
     def test_export_shape_to_svg(self):
         export_shape_to_svg(A_TOPODS_SHAPE, get_test_fullname('sample.svg'))
 
@@ -117,6 +237,53 @@ class TestExtendDataExchange(unittest.TestCase):
                        mode="binary")
 
 
+    def test_write_stl_from_tesselator(self):
+        tess = ShapeTesselator(A_TOPODS_SHAPE)
+        tess.Compute(mesh_quality=0.5)
+        filename = get_test_fullname("sample_tesselator.stl")
+        write_stl_from_tesselator(tess, filename)
+        nbr_triangles = tess.ObjGetTriangleCount()
+        self.assertEqual(os.path.getsize(filename), 84 + 50 * nbr_triangles)
+        # the file can be read back by OCCT
+        self.assertFalse(read_stl_file(filename).IsNull())
+        if HAVE_NUMPY:
+            vertices, normals, triangles = read_stl_mesh(filename)
+            self.assertEqual(len(triangles), nbr_triangles)
+            self.assertTrue(np.allclose(vertices, tess.GetVerticesPositionAsArray()))
+            self.assertTrue(np.allclose(np.linalg.norm(normals, axis=1), 1., atol=1e-3))
+        # the finest computed level of a TesselatorLOD
+        lod = TesselatorLOD(BRepPrimAPI_MakeBox(10, 20, 30).Shape(), nbr_levels=2)
+        write_stl_from_tesselator(lod, filename)
+        self.assertTrue(lod.is_computed(1))
+        self.assertEqual(os.path.getsize(filename), 84 + 50 * 12)
+
+
+    def test_write_stl_files(self):
+        shapes = [BRepPrimAPI_MakeBox(10, 20, 30 + i).Shape() for i in range(4)]
+        filenames = [get_test_fullname("sample_box_%i.stl" % i) for i in range(4)]
+        write_stl_files(shapes, filenames, max_workers=2)
+        for filename in filenames:
+            self.assertEqual(os.path.getsize(filename), 84 + 50 * 12)
+        with self.assertRaises(AssertionError):
+            write_stl_files(shapes, filenames[:2])
+
+
+    def test_shape_content_hash(self):
+        # two boxes built the same way have the same hash
+        box_1 = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        box_2 = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        self.assertEqual(shape_content_hash(box_1), shape_content_hash(box_2))
+        self.assertEqual(shape_content_hash(box_1, 1., "json"), shape_content_hash(box_2, 1., "json"))
+        # the parameters, the location and the geometry change the hash
+        self.assertNotEqual(shape_content_hash(box_1, 1.), shape_content_hash(box_1, 0.5))
+        trsf = gp_Trsf()
+        trsf.SetTranslation(gp_Vec(10., 0., 0.))
+        moved_box = box_1.Moved(TopLoc_Location(trsf))
+        self.assertNotEqual(shape_content_hash(box_1), shape_content_hash(moved_box))
+        box_3 = BRepPrimAPI_MakeBox(10, 20, 31).Shape()
+        self.assertNotEqual(shape_content_hash(box_1), shape_content_hash(box_3))
+
+
 def suite():
     test_suite = unittest.TestSuite()
     test_suite.addTest(unittest.makeSuite(TestExtendDataExchange))
@@ -22,11 +22,12 @@ import unittest
 
 from OCC.Core.BRepPrimAPI import (BRepPrimAPI_MakeBox, BRepPrimAPI_MakeSphere,
                                   BRepPrimAPI_MakeTorus)
-from OCC.Core.gp import gp_Pnt, gp_Vec
+from OCC.Core.gp import gp_Pnt, gp_Vec, gp_Trsf, gp_OZ
+from OCC.Core.TopLoc import TopLoc_Location
 
 from OCC.Extend.ShapeFactory import (midpoint, scale_shape, measure_shape_volume,
                                      translate_shp, measure_shape_mass_center_of_gravity,
-                                     edge_to_bezier)
+                                     edge_to_bezier, trsf_to_matrix)
 from OCC.Extend.TopologyUtils import TopologyExplorer
 
 
@@ -90,6 +91,28 @@ class TestExtendShapeFactory(unittest.TestCase):
             else:
                 self.assertTrue(isinstance(degree, int))
 
+
+    def test_trsf_to_matrix(self):
+        # a quarter turn around (O,z), then a translation
+        trsf = gp_Trsf()
+        trsf.SetRotation(gp_OZ(), math.pi / 2.)
+        trsf.SetTranslationPart(gp_Vec(1., 2., 3.))
+        row_major = [0., -1., 0., 1.,
+                     1., 0., 0., 2.,
+                     0., 0., 1., 3.,
+                     0., 0., 0., 1.]
+        column_major = [0., 1., 0., 0.,
+                        -1., 0., 0., 0.,
+                        0., 0., 1., 0.,
+                        1., 2., 3., 1.]
+        for matrix, expected in [(trsf_to_matrix(trsf), row_major),
+                                 (trsf_to_matrix(trsf, column_major=True), column_major),
+                                 (trsf_to_matrix(TopLoc_Location(trsf)), row_major)]:
+            self.assertEqual(len(matrix), 16)
+            for value, expected_value in zip(matrix, expected):
+                self.assertAlmostEqual(value, expected_value)
+
+
 def suite():
     test_suite = unittest.TestSuite()
     test_suite.addTest(unittest.makeSuite(TestExtendShapeFactory))
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+##Copyright 2009-2016 Thomas Paviot (tpaviot@gmail.com)
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+import multiprocessing
+import os
+import subprocess
+import sys
+import textwrap
+import unittest
+
+from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox
+from OCC.Core.TopAbs import TopAbs_FACE
+from OCC.Core.GProp import GProp_GProps
+from OCC.Core.BRepGProp import brepgprop_SurfaceProperties
+
+from OCC.Extend.SharedShape import SharedShape, HAVE_SHARED_MEMORY
+
+SAMPLES_DIRECTORY = os.path.join('.', 'test_io')
+
+def get_test_fullname(filename):
+    return os.path.join(SAMPLES_DIRECTORY, filename)
+
+
+def _face_areas(shared_shape, first, last):
+    """ run by the pool workers, the shape is not sent, only the range """
+    areas = []
+    for face in shared_shape.sub_shapes(first, last):
+        props = GProp_GProps()
+        brepgprop_SurfaceProperties(face, props)
+        areas.append(props.Mass())
+    return areas
+
+
+class TestExtendSharedShape(unittest.TestCase):
+
+    def _check_shared_shape(self, shared_shape, shape):
+        self.assertEqual(len(shared_shape), 6)
+        ranges = shared_shape.index_ranges(4)
+        self.assertEqual(ranges[0][0], 1)
+        self.assertEqual(ranges[-1][1], 7)
+        with multiprocessing.Pool(2) as pool:
+            areas = sum(pool.starmap(_face_areas, [(shared_shape, first, last)
+                                                   for first, last in ranges]), [])
+        self.assertEqual(sorted(round(area) for area in areas), [200, 200, 300, 300, 600, 600])
+        self.assertTrue(shared_shape.shape().IsSame(shape))
+
+
+    @unittest.skipUnless(HAVE_SHARED_MEMORY, "requires multiprocessing.shared_memory")
+    def test_shared_shape(self):
+        box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        with SharedShape(box, TopAbs_FACE) as shared_shape:
+            self._check_shared_shape(shared_shape, box)
+        with self.assertRaises(FileNotFoundError):
+            from multiprocessing import shared_memory
+            shared_memory.SharedMemory(name=shared_shape.name)
+
+
+    @unittest.skipUnless(HAVE_SHARED_MEMORY, "requires multiprocessing.shared_memory")
+    def test_shared_shape_resource_tracker(self):
+        """ the block is unlinked once, without any resource tracker warning """
+        script = textwrap.dedent("""
+            import multiprocessing
+            import sys
+            from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox
+            from OCC.Core.TopAbs import TopAbs_FACE
+            from OCC.Extend.SharedShape import SharedShape
+
+            def nbr_faces(shared_shape):
+                return len(shared_shape)
+
+            if __name__ == "__main__":
+                context = multiprocessing.get_context(sys.argv[1])
+                box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+                with SharedShape(box, TopAbs_FACE) as shared_shape:
+                    with context.Pool(2) as pool:
+                        assert pool.map(nbr_faces, [shared_shape] * 4) == [6] * 4
+            """)
+        script_filename = get_test_fullname("shared_shape_tracker.py")
+        with open(script_filename, "w") as script_file:
+            script_file.write(script)
+        try:
+            for start_method in multiprocessing.get_all_start_methods():
+                result = subprocess.run([sys.executable, script_filename, start_method],
+                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                        universal_newlines=True)
+                self.assertEqual(result.returncode, 0, result.stderr)
+                self.assertNotIn("resource_tracker", result.stderr)
+                self.assertNotIn("KeyError", result.stderr)
+        finally:
+            os.remove(script_filename)
+
+
+    def test_shared_shape_file(self):
+        box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        filename = get_test_fullname("shared_box.bin")
+        with SharedShape(box, TopAbs_FACE, filename=filename) as shared_shape:
+            self._check_shared_shape(shared_shape, box)
+        self.assertFalse(os.path.isfile(filename))
+
+
+def suite():
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(TestExtendSharedShape))
+    return test_suite
+
+if __name__ == "__main__":
+    unittest.main()
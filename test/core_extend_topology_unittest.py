@@ -17,12 +17,24 @@
 ##You should have received a copy of the GNU Lesser General Public License
 ##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
 
+import gc
 import unittest
 
 from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeTorus, BRepPrimAPI_MakeBox
 from OCC.Extend.TopologyUtils import (TopologyExplorer, WireExplorer,
-                                      discretize_edge, discretize_wire)
-from OCC.Core.TopoDS import TopoDS_Face, TopoDS_Edge
+                                      discretize_edge, discretize_wire,
+                                      discretize_edges, group_shapes_sharing_subshapes)
+from OCC.Core.TopoDS import TopoDS_Face, TopoDS_Edge, TopoDS_Compound
+from OCC.Core.BRep import BRep_Builder
+from OCC.Core.gp import gp_Trsf, gp_Vec
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.Tesselator import EdgeDiscretizer, TopologyGraph
+
+try:
+    import numpy
+    HAVE_NUMPY = True
+except ImportError:
+    HAVE_NUMPY = False
 
 
 def get_test_box_shape():
@@ -52,6 +64,42 @@ class TestExtendTopology(unittest.TestCase):
             self.assertTrue(pnts)
 
 
+    @unittest.skipUnless(HAVE_NUMPY, "numpy not installed")
+    def test_discretize_edges(self):
+        tor = BRepPrimAPI_MakeTorus(50, 20).Shape()
+        edges = list(TopologyExplorer(tor).edges())
+        points, offsets = discretize_edges(tor)
+        self.assertEqual(points.shape[1], 3)
+        self.assertEqual(points.dtype, numpy.float64)
+        self.assertEqual(len(offsets), len(edges) + 1)
+        self.assertEqual(offsets[-1], points.shape[0])
+        # same points as the single edge discretizer
+        for i, edge in enumerate(edges):
+            edge_points = points[offsets[i]:offsets[i + 1]]
+            self.assertEqual([tuple(p) for p in edge_points], discretize_edge(edge))
+        # a list of shapes
+        box = get_test_box_shape()
+        points, offsets = discretize_edges([box, tor], algorithm="UniformAbscissa")
+        self.assertEqual(len(offsets), 12 + len(edges) + 1)
+
+
+    @unittest.skipUnless(HAVE_NUMPY, "numpy not installed")
+    def test_discretizer_arrays_after_compute(self):
+        '''arrays keep the points of their Compute call'''
+        discretizer = EdgeDiscretizer()
+        discretizer.AddShape(BRepPrimAPI_MakeTorus(50, 20).Shape())
+        discretizer.Compute(0.2, EdgeDiscretizer.QuasiUniformDeflection)
+        points = discretizer.GetPointsAsArray()
+        offsets = discretizer.GetOffsetsAsArray()
+        expected_points = points.copy()
+        expected_offsets = offsets.copy()
+        discretizer.AddShape(get_test_box_shape())
+        discretizer.Compute(0.01, EdgeDiscretizer.QuasiUniformDeflection)
+        self.assertGreater(discretizer.NbPoints(), len(expected_points))
+        numpy.testing.assert_array_equal(points, expected_points)
+        numpy.testing.assert_array_equal(offsets, expected_offsets)
+
+
     def test_loop_faces(self):
         i = 0
         for face in topo.faces():
@@ -79,6 +127,90 @@ class TestExtendTopology(unittest.TestCase):
         self.assertEqual(topo.number_of_comp_solids(), 0)
 
 
+    def test_ignore_orientation(self):
+        '''with ignore_orientation=False, edges are listed once per face'''
+        box_topo = TopologyExplorer(get_test_box_shape(), ignore_orientation=False)
+        self.assertEqual(box_topo.number_of_edges(), 24)
+        self.assertEqual(box_topo.number_of_vertices(), 48)
+
+
+    def test_located_copies(self):
+        '''copies of the same TShape at different locations are different
+        sub-shapes, the same copy added twice is listed once'''
+        box = get_test_box_shape()
+        compound = TopoDS_Compound()
+        builder = BRep_Builder()
+        builder.MakeCompound(compound)
+        for i in range(10):
+            trsf = gp_Trsf()
+            trsf.SetTranslation(gp_Vec(i * 100., 0., 0.))
+            builder.Add(compound, box.Moved(TopLoc_Location(trsf)))
+        builder.Add(compound, box)
+        compound_topo = TopologyExplorer(compound)
+        self.assertEqual(compound_topo.number_of_solids(), 10)
+        self.assertEqual(compound_topo.number_of_faces(), 60)
+        self.assertEqual(compound_topo.number_of_edges(), 120)
+
+
+    def test_ancestors_map_cache(self):
+        '''ancestors maps are computed once, until invalidated'''
+        box_topo = TopologyExplorer(get_test_box_shape())
+        for edge in box_topo.edges():
+            self.assertEqual(box_topo.number_of_faces_from_edge(edge), 2)
+        self.assertEqual(len(box_topo._ancestors_maps), 1)
+        for vertex in box_topo.vertices():
+            self.assertEqual(box_topo.number_of_edges_from_vertex(vertex), 3)
+        self.assertEqual(len(box_topo._ancestors_maps), 2)
+        box_topo.invalidate()
+        self.assertEqual(len(box_topo._ancestors_maps), 0)
+        edge = next(box_topo.edges())
+        self.assertEqual(len(list(box_topo.faces_from_edge(edge))), 2)
+
+
+    @unittest.skipUnless(HAVE_NUMPY, "numpy not installed")
+    def test_to_graph(self):
+        '''CSR graphs of a box'''
+        box_topo = TopologyExplorer(get_test_box_shape())
+        graph = box_topo.to_graph()
+        self.assertEqual(graph.NbFaces(), 6)
+        self.assertEqual(graph.NbEdges(), 12)
+        self.assertEqual(graph.NbVertices(), 8)
+        # same numbering as the explorer
+        for i, face in enumerate(box_topo.faces()):
+            self.assertTrue(graph.Face(i).IsSame(face))
+            self.assertEqual(graph.FaceIndex(face), i)
+        self.assertEqual(graph.FaceIndex(BRepPrimAPI_MakeBox(1, 1, 1).Shape()), -1)
+        offsets, indices = graph.GetFaceEdgesAsArrays()
+        self.assertEqual(list(offsets), [0, 4, 8, 12, 16, 20, 24])
+        self.assertEqual(len(indices), 24)
+        offsets, indices = graph.GetEdgeFacesAsArrays()
+        self.assertEqual(len(offsets), 13)
+        self.assertEqual(len(indices), 24)
+        offsets, indices = graph.GetEdgeVerticesAsArrays()
+        self.assertEqual(len(indices), 24)
+        offsets, indices = graph.GetVertexEdgesAsArrays()
+        self.assertEqual(len(indices), 24)
+        # each face of a box is adjacent to 4 faces
+        offsets, indices = graph.GetFaceAdjacencyAsArrays()
+        self.assertEqual(list(offsets), [0, 4, 8, 12, 16, 20, 24])
+        for i in range(6):
+            self.assertNotIn(i, list(indices[offsets[i]:offsets[i + 1]]))
+        # the graph is cached
+        self.assertTrue(box_topo.to_graph() is graph)
+        # the arrays outlive the graph
+        offsets, indices = TopologyGraph(get_test_box_shape()).GetFaceEdgesAsArrays()
+        gc.collect()
+        self.assertEqual(list(offsets), [0, 4, 8, 12, 16, 20, 24])
+        self.assertEqual(len(indices), 24)
+
+
+    def test_lazy_iteration(self):
+        '''faces are yielded one at a time'''
+        faces = topo.faces()
+        self.assertTrue(isinstance(next(faces), TopoDS_Face))
+        self.assertEqual(len(list(faces)), 5)
+
+
     def test_nested_iteration(self):
         '''check nested looping'''
         for f in topo.faces():
@@ -173,6 +305,26 @@ class TestExtendTopology(unittest.TestCase):
         for v in _vertices:
             self.assertFalse(v.IsNull())
 
+
+    def test_group_shapes_sharing_subshapes(self):
+        box = get_test_box_shape()
+        trsf = gp_Trsf()
+        trsf.SetTranslation(gp_Vec(50., 0., 0.))
+        moved_box = box.Moved(TopLoc_Location(trsf))
+        box_face = next(TopologyExplorer(box).faces())
+        other_box = get_test_box_shape()
+        # the moved box and the face share faces with the box, not the other box
+        groups = group_shapes_sharing_subshapes([box, other_box, moved_box, box_face])
+        self.assertEqual(sorted(groups), [[0, 2, 3], [1]])
+        self.assertEqual(group_shapes_sharing_subshapes([]), [])
+        # two adjacent faces only share an edge
+        box_topo = TopologyExplorer(other_box)
+        an_edge = next(box_topo.edges())
+        adjacent_faces = list(box_topo.faces_from_edge(an_edge))
+        self.assertEqual(len(adjacent_faces), 2)
+        groups = group_shapes_sharing_subshapes(adjacent_faces + [box_face])
+        self.assertEqual(sorted(groups), [[0, 1], [2]])
+
 def suite():
     test_suite = unittest.TestSuite()
     test_suite.addTest(unittest.makeSuite(TestExtendTopology))
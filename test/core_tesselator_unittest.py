@@ -19,8 +19,14 @@
 Usage :
 $ python core_visualization_unittest.python """
 
+from concurrent.futures import ThreadPoolExecutor
+import gc
 import json
 import os
+import struct
+import sys
+import threading
+import time
 import unittest
 from xml.etree import ElementTree as ET
 
@@ -28,8 +34,34 @@ from OCC.Core.BRepPrimAPI import (BRepPrimAPI_MakeBox,
                                   BRepPrimAPI_MakeTorus,
                                   BRepPrimAPI_MakeSphere)
 from OCC.Core.Tesselator import ShapeTesselator
+from OCC.Core.gp import gp_Pnt, gp_Trsf, gp_Vec
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.TopoDS import TopoDS_Compound
+from OCC.Core.BRep import BRep_Builder, BRep_Tool
+from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
+from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_MakeEdge
+from OCC.Core.Poly import Poly_Triangulation
 
 from OCC.Extend.DataExchange import read_step_file
+from OCC.Extend.TopologyUtils import TopologyExplorer
+from OCC.Extend.TesselatorCache import TesselatorCache, _mesh_keys
+from OCC.Extend.TesselatorLOD import TesselatorLOD, lod_mesh_qualities
+
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except ImportError:
+    HAVE_NUMPY = False
+
+
+def _make_compound(shapes):
+    compound = TopoDS_Compound()
+    builder = BRep_Builder()
+    builder.MakeCompound(compound)
+    for shape in shapes:
+        builder.Add(compound, shape)
+    return compound
+
 
 class TestTesselator(unittest.TestCase):
     """ A class for testing tesselation algorithm """
@@ -99,6 +131,29 @@ class TestTesselator(unittest.TestCase):
         # after that, check that the number of vertices is ok
         self.assertEqual(len(dico["data"]["attributes"]["position"]["array"]), 36*3)
 
+    def test_export_to_3js_JSON_stream(self):
+        """ the streamed JSON is the same as the JSON string """
+        a_torus = BRepPrimAPI_MakeTorus(10, 4).Shape()
+        tess = ShapeTesselator(a_torus)
+        tess.Compute()
+        json_filename = os.path.join("test_io", "torus.json")
+        with open(json_filename, "w") as json_file:
+            tess.ExportShapeToThreejsJSON(json_file, "myshapeid")
+        with open(json_filename, "r") as json_file:
+            json_content = json_file.read()
+        self.assertEqual(json_content, tess.ExportShapeToThreejsJSONString("myshapeid"))
+        dico = json.loads(json_content)
+        self.assertEqual(len(dico["data"]["attributes"]["normal"]["array"]),
+                         tess.ObjGetTriangleCount() * 9)
+        # a file descriptor can be used
+        fd = os.open(json_filename, os.O_WRONLY | os.O_TRUNC)
+        try:
+            tess.ExportShapeToThreejsJSON(fd, "myshapeid")
+        finally:
+            os.close(fd)
+        with open(json_filename, "r") as json_file:
+            self.assertEqual(json_file.read(), json_content)
+
     def test_x3d_file_is_valid_xml(self):
         """ use ElementTree to parse X3D output """
         another_torus = BRepPrimAPI_MakeTorus(10, 4).Shape()
@@ -121,6 +176,175 @@ class TestTesselator(unittest.TestCase):
         # free edges have been excluded, then should work as expected
         stp_file_tesselator.Compute(compute_edges=True)
 
+    def test_vertices_and_normals_buffers(self):
+        """ vertices and normals are exposed as float32 buffers, without copy
+        """
+        a_box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        tess = ShapeTesselator(a_box)
+        tess.Compute()
+        vertices_buffer = tess.GetVerticesPositionBuffer()
+        normals_buffer = tess.GetNormalsBuffer()
+        self.assertTrue(vertices_buffer.readonly)
+        self.assertEqual(vertices_buffer.nbytes, 36 * 3 * 4)
+        self.assertEqual(normals_buffer.nbytes, 36 * 3 * 4)
+        # the buffers hold the same values as the tuples
+        self.assertEqual(list(vertices_buffer.cast('f')),
+                         list(tess.GetVerticesPositionAsTuple()))
+        self.assertEqual(list(normals_buffer.cast('f')),
+                         list(tess.GetNormalsAsTuple()))
+
+    def test_buffers_outlive_tesselator(self):
+        """ the memoryviews keep the memory alive, not the tesselator """
+        a_box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        tess = ShapeTesselator(a_box)
+        tess.Compute(compute_edges=True)
+        expected_vertices = list(tess.GetVerticesPositionAsTuple())
+        vertices_buffer = tess.GetVerticesPositionBuffer()
+        segments_buffer = tess.GetEdgesSegmentsBuffer()
+        expected_segments = list(segments_buffer.cast('f'))
+        del tess
+        gc.collect()
+        # other allocations, that would reuse the freed memory
+        ShapeTesselator(BRepPrimAPI_MakeTorus(10, 4).Shape()).Compute(compute_edges=True)
+        self.assertEqual(list(vertices_buffer.cast('f')), expected_vertices)
+        self.assertEqual(list(segments_buffer.cast('f')), expected_segments)
+        # a buffer of a temporary tesselator
+        def _computed_tesselator(shape):
+            tess = ShapeTesselator(shape)
+            tess.Compute()
+            return tess
+        normals_buffer = _computed_tesselator(a_box).GetNormalsBuffer()
+        gc.collect()
+        self.assertEqual(list(normals_buffer.cast('f')),
+                         list(_computed_tesselator(a_box).GetNormalsAsTuple()))
+
+    @unittest.skipUnless(HAVE_NUMPY, "numpy not installed")
+    def test_vertices_and_normals_as_arrays(self):
+        """ numpy arrays view the tesselator memory and keep it alive """
+        a_box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        tess = ShapeTesselator(a_box)
+        tess.Compute()
+        np_vertices = tess.GetVerticesPositionAsArray()
+        np_normals = tess.GetNormalsAsArray()
+        self.assertEqual(np_vertices.shape, (36, 3))
+        self.assertEqual(np_normals.shape, (36, 3))
+        self.assertEqual(np_vertices.dtype, np.float32)
+        self.assertFalse(np_vertices.flags.writeable)
+        # the array should remain valid even if the tesselator is deleted
+        expected_max = np_vertices.max(axis=0).tolist()
+        del tess
+        self.assertEqual(np_vertices.max(axis=0).tolist(), expected_max)
+        self.assertEqual(expected_max, [10., 20., 30.])
+
+    @unittest.skipUnless(HAVE_NUMPY, "numpy not installed")
+    def test_indexed_mesh(self):
+        """ indexed output mode stores each node once """
+        a_box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        tess = ShapeTesselator(a_box)
+        tess.Compute()
+        vertices, normals, triangles = tess.GetIndexedMesh()
+        # 6 faces, 4 nodes per face, 2 triangles per face
+        self.assertEqual(vertices.shape, (24, 3))
+        self.assertEqual(normals.shape, (24, 3))
+        self.assertEqual(triangles.shape, (12, 3))
+        self.assertEqual(triangles.dtype, np.uint32)
+        self.assertEqual(triangles.max(), 23)
+        # indexing the nodes gives back the unrolled triangles
+        np.testing.assert_array_equal(vertices[triangles.reshape(-1)],
+                                      tess.GetVerticesPositionAsArray())
+
+    @unittest.skipUnless(HAVE_NUMPY, "numpy not installed")
+    def test_indexed_normals_without_uv_nodes(self):
+        """ a face triangulation without uv nodes gets the face normal, one per node """
+        a_box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        BRepMesh_IncrementalMesh(a_box, 0.1)
+        # replace the triangulation of the first face by one without uv nodes
+        face = next(iter(TopologyExplorer(a_box).faces()))
+        triangulation = BRep_Tool.Triangulation(face, TopLoc_Location())
+        no_uv_triangulation = Poly_Triangulation(triangulation.Nodes(), triangulation.Triangles())
+        no_uv_triangulation.Deflection(triangulation.Deflection())
+        self.assertFalse(no_uv_triangulation.HasUVNodes())
+        BRep_Builder().UpdateFace(face, no_uv_triangulation)
+        tess = ShapeTesselator(a_box)
+        tess.Compute(keep_triangulation=True)
+        vertices, normals, _ = tess.GetIndexedMesh()
+        self.assertEqual(len(normals), len(vertices))
+        self.assertEqual(tess.ObjGetNormalCount(), tess.ObjGetVertexCount())
+        # the nodes of the first face share the same unit normal
+        _, _, first_vertex, nbr_vertices, _ = tess.GetFaceRangesAsArray()[0]
+        first_face_normals = normals[first_vertex:first_vertex + nbr_vertices]
+        np.testing.assert_allclose(np.linalg.norm(first_face_normals, axis=1), 1., rtol=1e-6)
+        np.testing.assert_allclose(first_face_normals, np.tile(first_face_normals[0], (nbr_vertices, 1)))
+
+    def test_edges_buffers(self):
+        """ all the edge polylines in a single buffer """
+        a_box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        tess = ShapeTesselator(a_box)
+        tess.Compute(compute_edges=True)
+        polylines = tess.GetEdgesPolylines()
+        self.assertEqual(len(polylines), tess.ObjGetEdgeCount())
+        for i_edge, polyline in enumerate(polylines):
+            self.assertEqual(len(polyline), tess.ObjEdgeGetVertexCount(i_edge))
+            self.assertEqual(polyline[0], tess.GetEdgeVertex(i_edge, 0))
+        nbr_segments = sum(len(polyline) - 1 for polyline in polylines)
+        self.assertEqual(tess.GetEdgesSegmentsBuffer().nbytes, nbr_segments * 2 * 3 * 4)
+
+    @unittest.skipUnless(HAVE_NUMPY, "numpy not installed")
+    def test_edges_arrays(self):
+        """ edge polylines and line segments as numpy arrays """
+        a_torus = BRepPrimAPI_MakeTorus(10, 4).Shape()
+        tess = ShapeTesselator(a_torus)
+        tess.Compute(compute_edges=True)
+        positions = tess.GetEdgesPositionAsArray()
+        offsets = tess.GetEdgesOffsetsAsArray()
+        segments = tess.GetEdgesSegmentsAsArray()
+        self.assertEqual(len(offsets), tess.ObjGetEdgeCount() + 1)
+        self.assertEqual(offsets[-1], positions.shape[0])
+        self.assertEqual(segments.shape, (positions.shape[0] - tess.ObjGetEdgeCount(), 2, 3))
+        # the first segment links the first two points of the first edge
+        np.testing.assert_array_equal(segments[0], positions[0:2])
+
+    def test_export_to_glb(self):
+        """ export a box to a binary glTF buffer, with one node per face """
+        a_box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        tess = ShapeTesselator(a_box)
+        tess.Compute()
+        glb = tess.to_glb_bytes(node_per="face")
+        magic, version, length = struct.unpack("<III", glb[:12])
+        self.assertEqual(magic, 0x46546C67)
+        self.assertEqual(version, 2)
+        self.assertEqual(length, len(glb))
+        json_length, json_type = struct.unpack("<II", glb[12:20])
+        self.assertEqual(json_type, 0x4E4F534A)
+        gltf = json.loads(glb[20:20 + json_length].decode("utf-8"))
+        self.assertEqual(len(gltf["nodes"]), 6)
+        self.assertEqual(gltf["accessors"][0]["count"], 24)
+        self.assertEqual(gltf["accessors"][0]["max"], [10., 20., 30.])
+        # binary chunk: 24 positions, 24 normals, 36 indices
+        bin_length, bin_type = struct.unpack("<II", glb[20 + json_length:28 + json_length])
+        self.assertEqual(bin_type, 0x004E4942)
+        self.assertEqual(bin_length, 24 * 12 * 2 + 36 * 4)
+        # and to a file
+        glb_filename = os.path.join("test_io", "box.glb")
+        tess.ExportShapeToGLB(glb_filename, node_per="solid")
+        self.assertTrue(os.path.exists(glb_filename))
+
+    def test_export_empty_shape_to_glb(self):
+        """ a shape without triangles is exported to a valid, mesh-less glTF scene """
+        an_edge = BRepBuilderAPI_MakeEdge(gp_Pnt(0, 0, 0), gp_Pnt(10, 0, 0)).Edge()
+        tess = ShapeTesselator(an_edge)
+        tess.Compute()
+        glb = tess.to_glb_bytes()
+        _, _, length = struct.unpack("<III", glb[:12])
+        self.assertEqual(length, len(glb))
+        json_length, _ = struct.unpack("<II", glb[12:20])
+        # no binary chunk
+        self.assertEqual(len(glb), 20 + json_length)
+        gltf = json.loads(glb[20:20 + json_length].decode("utf-8"))
+        self.assertEqual(gltf["scenes"], [{}])
+        for key in ["meshes", "accessors", "bufferViews", "buffers"]:
+            self.assertNotIn(key, gltf)
+
     def test_tesselate_twice(self):
         """ calling Compte() many times should no raise an exception
         """
@@ -129,11 +353,303 @@ class TestTesselator(unittest.TestCase):
         torus_tess.Compute()
         torus_tess.Compute()
 
+    def test_keep_triangulation(self):
+        """ the triangulation of the shape is only reused on demand """
+        a_torus = BRepPrimAPI_MakeTorus(10, 4).Shape()
+        BRepMesh_IncrementalMesh(a_torus, 0.01)
+        face = next(iter(TopologyExplorer(a_torus).faces()))
+        nbr_triangles = BRep_Tool.Triangulation(face, TopLoc_Location()).NbTriangles()
+        kept_tess = ShapeTesselator(a_torus)
+        kept_tess.Compute(keep_triangulation=True)
+        self.assertEqual(kept_tess.ObjGetTriangleCount(), nbr_triangles)
+        tess = ShapeTesselator(a_torus)
+        tess.Compute()
+        self.assertLess(tess.ObjGetTriangleCount(), nbr_triangles)
+
+    def test_face_ranges(self):
+        """ each triangle can be mapped to its face """
+        a_box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        tess = ShapeTesselator(a_box)
+        tess.Compute()
+        self.assertEqual(tess.ObjGetFaceCount(), 6)
+        faces = tess.GetFaces()
+        self.assertEqual(len(faces), 6)
+        explored_faces = TopologyExplorer(a_box).faces()
+        for face, explored_face in zip(faces, explored_faces):
+            self.assertTrue(face.IsEqual(explored_face))
+        face_ranges = tess.GetFaceRanges()
+        self.assertEqual(face_ranges, [(2 * i, 2) for i in range(6)])
+        for triangle in range(tess.ObjGetTriangleCount()):
+            self.assertEqual(tess.ObjGetTriangleFaceIndex(triangle), triangle // 2)
+        self.assertRaises(RuntimeError, tess.ObjGetFace, 6)
+        self.assertRaises(RuntimeError, tess.ObjGetTriangleFaceIndex, 12)
+
+    @unittest.skipUnless(HAVE_NUMPY, "numpy not installed")
+    def test_face_ranges_as_array(self):
+        a_box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        tess = ShapeTesselator(a_box)
+        tess.Compute()
+        face_ranges = tess.GetFaceRangesAsArray()
+        self.assertEqual(face_ranges.shape, (6, 5))
+        self.assertEqual(face_ranges[:, 1].sum(), tess.ObjGetTriangleCount())
+        self.assertEqual(face_ranges[:, 3].sum(), tess.ObjGetVertexCount())
+        # the box is a single solid
+        self.assertTrue((face_ranges[:, 4] == 0).all())
+
+    def test_update(self):
+        """ only the faces that are not part of the previous shape are meshed
+        """
+        first_box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        second_box = BRepPrimAPI_MakeBox(gp_Pnt(50, 0, 0), 10, 20, 30).Shape()
+        third_box = BRepPrimAPI_MakeBox(gp_Pnt(100, 0, 0), 10, 20, 30).Shape()
+        tess = ShapeTesselator(_make_compound([first_box, second_box]))
+        tess.Compute()
+        self.assertEqual(tess.ObjGetComputedFaceCount(), 12)
+        self.assertEqual(tess.ObjGetReusedFaceCount(), 0)
+        first_vertices = [tess.GetVertex(i) for i in range(tess.ObjGetVertexCount() // 2)]
+        tess.Update(_make_compound([first_box, third_box]), compute_edges=True)
+        self.assertEqual(tess.ObjGetReusedFaceCount(), 6)
+        self.assertEqual(tess.ObjGetComputedFaceCount(), 6)
+        self.assertEqual(tess.ObjGetTriangleCount(), 24)
+        self.assertEqual(tess.ObjGetEdgeCount(), 24)
+        # the faces of the first box are unchanged
+        self.assertEqual([tess.GetVertex(i) for i in range(len(first_vertices))],
+                         first_vertices)
+        # the third box is meshed
+        x_max = max(tess.GetVertex(i)[0] for i in range(tess.ObjGetVertexCount()))
+        self.assertAlmostEqual(x_max, 110.)
+
+    @unittest.skipUnless(HAVE_NUMPY, "numpy not installed")
+    def test_arrays_after_update(self):
+        """ the arrays obtained before an update keep the previous mesh
+        """
+        def _arrays(tess):
+            return [tess.GetVerticesPositionAsArray(), tess.GetNormalsAsArray(),
+                    tess.GetIndexedVerticesPositionAsArray(), tess.GetTriangleIndicesAsArray(),
+                    tess.GetFaceRangesAsArray(), tess.GetEdgesSegmentsAsArray()]
+
+        first_box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        tess = ShapeTesselator(first_box)
+        tess.Compute(compute_edges=True)
+        arrays = _arrays(tess)
+        copies = [array.copy() for array in arrays]
+        shape = _make_compound([first_box, BRepPrimAPI_MakeSphere(gp_Pnt(50, 0, 0), 10.).Shape()])
+        tess.Update(shape, compute_edges=True)
+        # the new buffers are bigger, the previous arrays are unchanged
+        self.assertGreater(len(tess.GetVerticesPositionAsArray()), len(arrays[0]))
+        for array, array_copy in zip(arrays, copies):
+            np.testing.assert_array_equal(array, array_copy)
+        # same thing when a computed tesselator is refined
+        arrays = _arrays(tess)
+        copies = [array.copy() for array in arrays]
+        coarse_tess = ShapeTesselator(shape)
+        coarse_tess.Compute(mesh_quality=4.)
+        tess.Refine(coarse_tess, compute_edges=True, mesh_quality=0.5)
+        self.assertNotEqual(tess.ObjGetTriangleCount(), len(arrays[3]))
+        for array, array_copy in zip(arrays, copies):
+            np.testing.assert_array_equal(array, array_copy)
+
+    def test_compute_releases_gil(self):
+        """ a python thread runs while a shape is tesselated """
+        progress = [0]
+        stop = threading.Event()
+
+        def _count():
+            while not stop.is_set():
+                progress[0] += 1
+
+        shapes = [BRepPrimAPI_MakeTorus(20., 5. + i).Shape() for i in range(4)]
+        tess = ShapeTesselator(_make_compound(shapes))
+        switch_interval = sys.getswitchinterval()
+        # while the GIL is held by Compute, the counter can only run during
+        # the switch intervals before and after the call
+        sys.setswitchinterval(0.0005)
+        counter = threading.Thread(target=_count)
+        counter.start()
+        try:
+            # the counter speed when it runs alone
+            start_progress = progress[0]
+            time.sleep(0.05)
+            rate = (progress[0] - start_progress) / 0.05
+            start_progress = progress[0]
+            init_time = time.perf_counter()
+            tess.Compute(mesh_quality=0.02)
+            compute_time = time.perf_counter() - init_time
+            compute_progress = progress[0] - start_progress
+        finally:
+            stop.set()
+            counter.join()
+            sys.setswitchinterval(switch_interval)
+        self.assertGreater(tess.ObjGetTriangleCount(), 0)
+        if compute_time < 0.05:
+            self.skipTest("tesselation too fast to be measured")
+        # the counter ran for a significant part of the tesselation, even on
+        # a single core shared with Compute
+        self.assertGreater(compute_progress, rate * compute_time / 10.)
+
+    def test_compute_from_threads(self):
+        """ independent shapes are tesselated concurrently from python threads """
+        def _tesselate(shape):
+            tess = ShapeTesselator(shape)
+            tess.Compute(mesh_quality=0.05)
+            return tess.ObjGetTriangleCount()
+
+        def _shapes():
+            # new shapes for each run, so that no triangulation is reused
+            return [BRepPrimAPI_MakeTorus(20., 5. + i).Shape() for i in range(8)]
+
+        sequential_triangles = list(map(_tesselate, _shapes()))
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            threaded_triangles = list(executor.map(_tesselate, _shapes()))
+        self.assertEqual(sequential_triangles, threaded_triangles)
+
+
+class TestTesselatorLOD(unittest.TestCase):
+    """ A class for testing levels of detail """
+    def test_refine(self):
+        """ the planar faces of the coarser level are reused """
+        a_box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        a_sphere = BRepPrimAPI_MakeSphere(gp_Pnt(50, 0, 0), 10.).Shape()
+        shape = _make_compound([a_box, a_sphere])
+        coarse_tess = ShapeTesselator(shape)
+        coarse_tess.Compute(mesh_quality=4.)
+        fine_tess = ShapeTesselator(shape)
+        fine_tess.Refine(coarse_tess, mesh_quality=1.)
+        self.assertEqual(fine_tess.ObjGetReusedFaceCount(), 6)
+        self.assertEqual(fine_tess.ObjGetComputedFaceCount(), 1)
+        self.assertGreater(fine_tess.ObjGetTriangleCount(), coarse_tess.ObjGetTriangleCount())
+        # the coarser level is still valid
+        self.assertEqual(coarse_tess.ObjGetFaceCount(), 7)
+        self.assertRaises(RuntimeError, fine_tess.Refine, fine_tess)
+        self.assertRaises(RuntimeError, ShapeTesselator(a_box).Refine, coarse_tess)
+
+    def test_lod_pyramid(self):
+        self.assertEqual(lod_mesh_qualities(3, 4., 0.5), [8., 2., 0.5])
+        a_torus = BRepPrimAPI_MakeTorus(10, 4).Shape()
+        lod = TesselatorLOD(a_torus, nbr_levels=3)
+        self.assertEqual(len(lod), 3)
+        self.assertFalse(lod.is_computed(0))
+        # levels are computed on demand, coarser levels first
+        finest = lod.get_level(2)
+        self.assertTrue(lod.is_computed(1))
+        nbr_triangles = [tess.ObjGetTriangleCount() for _, tess in lod.iter_levels()]
+        self.assertEqual(nbr_triangles, sorted(nbr_triangles))
+        self.assertGreater(nbr_triangles[2], nbr_triangles[0])
+        self.assertIs(lod.get_level(2), finest)
+        self.assertRaises(IndexError, lod.get_level, 3)
+        # screen space selection
+        self.assertEqual(lod.screen_fractions(), [0., 1. / 16., 1. / 4.])
+        self.assertEqual(lod.select_level(0.01), 0)
+        self.assertEqual(lod.select_level(0.1), 1)
+        self.assertEqual(lod.select_level(2.), 2)
+        center, radius = lod.bounding_sphere()
+        self.assertAlmostEqual(center[2], 0., places=3)
+        self.assertGreater(radius, 14.)
+
+    def test_lod_after_fine_compute(self):
+        """ the coarse level does not reuse a finer triangulation of the shape """
+        a_torus = BRepPrimAPI_MakeTorus(10, 4).Shape()
+        fine_tess = ShapeTesselator(a_torus)
+        fine_tess.Compute(mesh_quality=0.5)
+        lod = TesselatorLOD(a_torus, nbr_levels=3, mesh_quality=0.5)
+        coarse_triangles = lod.get_level(0).ObjGetTriangleCount()
+        self.assertLess(coarse_triangles, fine_tess.ObjGetTriangleCount())
+        self.assertLess(coarse_triangles, lod.get_level(2).ObjGetTriangleCount())
+        # the finest level stored in the shape does not change a new pyramid
+        other_lod = TesselatorLOD(a_torus, nbr_levels=3, mesh_quality=0.5)
+        self.assertEqual(other_lod.get_level(0).ObjGetTriangleCount(), coarse_triangles)
+
+
+class TestTesselatorCache(unittest.TestCase):
+    """ A class for testing the tesselator cache """
+    def test_cache_hit_and_miss(self):
+        cache = TesselatorCache()
+        a_box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        tess_1 = cache.get(a_box)
+        tess_2 = cache.get(a_box)
+        self.assertIs(tess_1, tess_2)
+        self.assertEqual(tess_1.ObjGetTriangleCount(), 12)
+        # other mesh parameters, another tesselator
+        tess_3 = cache.get(a_box, mesh_quality=0.5)
+        self.assertIsNot(tess_1, tess_3)
+        # a tesselator with edges can be used when edges are not required
+        tess_4 = cache.get(a_box, compute_edges=True, mesh_quality=2.)
+        self.assertIs(cache.get(a_box, mesh_quality=2.), tess_4)
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 3)
+        self.assertEqual(stats["entries"], 3)
+        self.assertGreater(stats["memory"], 0)
+
+    def test_cache_location(self):
+        """ a moved shape shares its TShape, but not its mesh """
+        cache = TesselatorCache()
+        a_box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        a_trsf = gp_Trsf()
+        a_trsf.SetTranslation(gp_Vec(100, 0, 0))
+        moved_box = a_box.Moved(TopLoc_Location(a_trsf))
+        self.assertIsNot(cache.get(a_box), cache.get(moved_box))
+
+    def test_cache_memory_cap(self):
+        cache = TesselatorCache(max_memory=0)
+        a_torus = BRepPrimAPI_MakeTorus(10, 4).Shape()
+        cache.get(a_torus)
+        self.assertEqual(len(cache), 0)
+        cache.max_memory = 1024 * 1024 * 1024
+        cache.get(a_torus)
+        cache.get(BRepPrimAPI_MakeSphere(10.).Shape())
+        self.assertEqual(len(cache), 2)
+        cache.max_memory = 1
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats()["evictions"], 2)
+        cache.clear()
+        self.assertEqual(cache.stats()["misses"], 0)
+
+    def test_cache_unbounded(self):
+        cache = TesselatorCache(max_memory=None)
+        cache.get(BRepPrimAPI_MakeTorus(10, 4).Shape())
+        cache.get(BRepPrimAPI_MakeSphere(10.).Shape())
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats()["evictions"], 0)
+
+    def test_cache_shared_faces(self):
+        """ a solid and its faces, requested from several threads """
+        cache = TesselatorCache()
+        a_sphere = BRepPrimAPI_MakeSphere(10.).Shape()
+        shapes = [a_sphere] + list(TopologyExplorer(a_sphere).faces())
+        self.assertFalse(_mesh_keys(a_sphere).isdisjoint(_mesh_keys(shapes[1])))
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            tesselators = list(executor.map(lambda shape: cache.get(shape, mesh_quality=0.1), shapes))
+        self.assertEqual(sum(tess.ObjGetTriangleCount() for tess in tesselators[1:]),
+                         tesselators[0].ObjGetTriangleCount())
+
+    def test_cache_concurrent_misses(self):
+        """ threads missing the same shape wait for a single computation """
+        cache = TesselatorCache()
+        a_sphere = BRepPrimAPI_MakeSphere(10.).Shape()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            tesselators = list(executor.map(lambda _: cache.get(a_sphere, mesh_quality=0.1), range(8)))
+        for tess in tesselators:
+            self.assertIs(tess, tesselators[0])
+        self.assertEqual(cache.stats()["misses"], 1)
+        self.assertEqual(cache.stats()["hits"], 7)
+
+    def test_cache_mesh_quality(self):
+        """ a finer triangulation of the shape is not reused by the cache """
+        a_torus = BRepPrimAPI_MakeTorus(10, 4).Shape()
+        BRepMesh_IncrementalMesh(a_torus, 0.01)
+        face = next(iter(TopologyExplorer(a_torus).faces()))
+        nbr_triangles = BRep_Tool.Triangulation(face, TopLoc_Location()).NbTriangles()
+        tess = TesselatorCache().get(a_torus)
+        self.assertLess(tess.ObjGetTriangleCount(), nbr_triangles)
+
 
 def suite():
     """ builds the test suite """
     test_suite = unittest.TestSuite()
     test_suite.addTest(unittest.makeSuite(TestTesselator))
+    test_suite.addTest(unittest.makeSuite(TestTesselatorLOD))
+    test_suite.addTest(unittest.makeSuite(TestTesselatorCache))
     return test_suite
 
 if __name__ == '__main__':
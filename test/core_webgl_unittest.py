@@ -17,10 +17,12 @@
 ##You should have received a copy of the GNU Lesser General Public License
 ##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
 import unittest
 import random
 
 from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeTorus, BRepPrimAPI_MakeBox
+from OCC.Core.gp import gp_Trsf, gp_Vec
 from OCC.Display.WebGl import threejs_renderer, x3dom_renderer
 
 from OCC.Extend.TopologyUtils import TopologyExplorer
@@ -66,6 +68,93 @@ class TestWebGL(unittest.TestCase):
         self.assertTrue(dict_shape)
         self.assertTrue(not dict_edge)
 
+    def test_threejs_render_torus_glb(self):
+        """ Render a simple torus in threejs, using glb files
+        """
+        my_threejs_renderer = threejs_renderer.ThreejsRenderer(mesh_format="glb")
+        dict_shape, dict_edge = my_threejs_renderer.DisplayShape(torus_shp)
+        self.assertTrue(dict_shape)
+        self.assertTrue(not dict_edge)
+        my_threejs_renderer.generate_html_file()
+        with open(my_threejs_renderer._html_filename, "r") as html_file:
+            self.assertIn("GLTFLoader.js", html_file.read())
+
+    def test_threejs_render_torus_lods(self):
+        """ Render a torus with 3 levels of detail, one mesh file per level
+        """
+        my_threejs_renderer = threejs_renderer.ThreejsRenderer()
+        dict_shape, _ = my_threejs_renderer.DisplayShape(torus_shp, lod_levels=3)
+        shape_hash = list(dict_shape)[0]
+        for file_hash in [shape_hash, shape_hash + "_lod1", shape_hash + "_lod2"]:
+            self.assertTrue(os.path.isfile(os.path.join(my_threejs_renderer._path, file_hash + ".json")))
+        my_threejs_renderer.generate_html_file()
+        with open(my_threejs_renderer._html_filename, "r") as html_file:
+            html = html_file.read()
+        self.assertIn("THREE.LOD", html)
+        # json meshes do not need the glTF loader
+        self.assertNotIn("GLTFLoader", html)
+
+    def test_threejs_render_twice(self):
+        """ The files are named after the shape content, rendering the same
+        shape again in the same directory reuses them
+        """
+        first_renderer = threejs_renderer.ThreejsRenderer()
+        first_shapes, first_edges = first_renderer.DisplayShape(torus_shp, export_edges=True)
+        mesh_filename = os.path.join(first_renderer._path, list(first_shapes)[0] + ".json")
+        mtime = os.path.getmtime(mesh_filename)
+        second_renderer = threejs_renderer.ThreejsRenderer(path=first_renderer._path)
+        second_shapes, second_edges = second_renderer.DisplayShape(BRepPrimAPI_MakeTorus(20., 10.).Shape(),
+                                                                   export_edges=True)
+        self.assertEqual(list(first_shapes), list(second_shapes))
+        self.assertEqual(sorted(first_edges), sorted(second_edges))
+        self.assertEqual(os.path.getmtime(mesh_filename), mtime)
+        # another color, another shape hash
+        third_shapes, _ = second_renderer.DisplayShape(torus_shp, color=(1., 0., 0.))
+        self.assertEqual(len(third_shapes), 2)
+
+    def test_threejs_display_shapes(self):
+        """ Tesselate and export a batch of boxes from a pool of threads
+        """
+        my_threejs_renderer = threejs_renderer.ThreejsRenderer()
+        boxes = [BRepPrimAPI_MakeBox(i + 1., 2., 3.).Shape() for i in range(20)]
+        dict_shape, dict_edge = my_threejs_renderer.DisplayShapes(boxes, export_edges=True, max_workers=4)
+        self.assertEqual(len(dict_shape), 20)
+        self.assertEqual(len(dict_edge), 20 * 12)
+        for shape_hash in dict_shape:
+            self.assertTrue(os.path.isfile(os.path.join(my_threejs_renderer._path, shape_hash + ".json")))
+        # the same shapes, displayed one by one, get the same files
+        for box in boxes:
+            my_threejs_renderer.DisplayShape(box, export_edges=True)
+        self.assertEqual(len(dict_shape), 20)
+        # distinct TShapes with the same content are written to the same file, once
+        copies = [BRepPrimAPI_MakeBox(1., 2., 3.).Shape() for i in range(4)]
+        dict_shape, _ = my_threejs_renderer.DisplayShapes(copies, max_workers=4)
+        self.assertEqual(len(dict_shape), 21)
+        my_threejs_renderer.generate_html_file()
+
+    def test_x3dom_display_shapes(self):
+        """ Tesselate and export a batch of shapes to x3d from a pool of threads
+        """
+        my_x3dom_renderer = x3dom_renderer.X3DomRenderer()
+        shapes = [BRepPrimAPI_MakeBox(i + 1., 2., 3.).Shape() for i in range(10)] + [torus_shp]
+        dict_shape, _ = my_x3dom_renderer.DisplayShapes(shapes, max_workers=4)
+        self.assertEqual(len(dict_shape), 11)
+
+    def test_threejs_display_instances(self):
+        """ Render the same box at several locations, tesselated once
+        """
+        my_threejs_renderer = threejs_renderer.ThreejsRenderer()
+        box_shp = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        locations = []
+        for i in range(5):
+            trsf = gp_Trsf()
+            trsf.SetTranslation(gp_Vec(i * 50., 0., 0.))
+            locations.append(trsf)
+        dict_shape, _ = my_threejs_renderer.DisplayInstances(box_shp, locations)
+        self.assertEqual(len(dict_shape), 1)
+        self.assertEqual(len(list(my_threejs_renderer._3js_instances.values())[0]), 5)
+        my_threejs_renderer.generate_html_file()
+
     def test_x3dom_render_torus(self):
         """ Render a simple torus using x3dom
         """
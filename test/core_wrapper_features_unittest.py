@@ -39,14 +39,17 @@ from OCC.Core.BRepBuilderAPI import (BRepBuilderAPI_MakeVertex,
                                      BRepBuilderAPI_MakeEdge,
                                      BRepBuilderAPI_Sewing)
 from OCC.Core.gp import (gp_Pnt, gp_Vec, gp_Pnt2d, gp_Lin, gp_Dir, gp_Ax2,
-                         gp_Quaternion, gp_QuaternionSLerp, gp_XYZ, gp_Mat)
+                         gp_Quaternion, gp_QuaternionSLerp, gp_XYZ, gp_Mat, gp_Trsf)
 from OCC.Core.math import math_Matrix, math_Vector
 from OCC.Core.GC import GC_MakeSegment
 from OCC.Core.STEPControl import STEPControl_Writer
 from OCC.Core.Interface import Interface_Static_SetCVal, Interface_Static_CVal
 from OCC.Core.GCE2d import GCE2d_MakeSegment
 from OCC.Core.ShapeFix import ShapeFix_Solid, ShapeFix_Wire
-from OCC.Core.TopoDS import TopoDS_Compound, TopoDS_Builder, TopoDS_Edge, TopoDS_Vertex, TopoDS_Shape
+from OCC.Core.TopoDS import (TopoDS_Compound, TopoDS_Builder, TopoDS_Edge, TopoDS_Vertex, TopoDS_Shape,
+                             set_pickle_compression_level)
+from OCC.Core.BRepTools import BRepTools_ShapeSet
+from OCC.Core.TopLoc import TopLoc_Location
 from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeCylinder
 from OCC.Core.TColStd import TColStd_Array1OfReal, TColStd_Array1OfInteger
 from OCC.Core.TColgp import TColgp_Array1OfPnt
@@ -377,6 +380,50 @@ class TestWrapperFeatures(unittest.TestCase):
             pickled_shape = pickle.load(dump_from_file)
         self.assertFalse(pickled_shape.IsNull())       
 
+    def test_pickle_topods_shape_formats(self) -> None:
+        '''
+        Checks the binary, compressed and text (version 1) pickle formats
+        '''
+        trsf = gp_Trsf()
+        trsf.SetTranslation(gp_Vec(10., 20., 30.))
+        box_shape = BRepPrimAPI_MakeBox(100, 200, 300).Shape().Moved(TopLoc_Location(trsf))
+        binary_dump = pickle.dumps(box_shape)
+        try:
+            set_pickle_compression_level(6)
+            compressed_dump = pickle.dumps(box_shape)
+        finally:
+            set_pickle_compression_level(0)
+        self.assertLess(len(compressed_dump), len(binary_dump))
+        for dump in [binary_dump, compressed_dump]:
+            loaded_shape = pickle.loads(dump)
+            self.assertTrue(loaded_shape.Location().Transformation().TranslationPart().IsEqual(gp_XYZ(10., 20., 30.), 1e-9))
+            props = GProp_GProps()
+            brepgprop_LinearProperties(loaded_shape, props)
+            self.assertAlmostEqual(props.Mass(), 4 * (100 + 200 + 300))
+        # the text pickles of the previous versions can still be loaded
+        shape_set = BRepTools_ShapeSet()
+        shape_set.Add(box_shape)
+        text_state = shape_set.WriteToString(), shape_set.Locations().Index(box_shape.Location())
+        old_shape = TopoDS_Shape.__new__(TopoDS_Shape)
+        old_shape.__setstate__(text_state)
+        self.assertFalse(old_shape.IsNull())
+        self.assertTrue(old_shape.Location().Transformation().TranslationPart().IsEqual(gp_XYZ(10., 20., 30.), 1e-9))
+        with self.assertRaises(AssertionError):
+            set_pickle_compression_level(10)
+
+    @unittest.skipUnless(pickle.HIGHEST_PROTOCOL >= 5, "requires pickle protocol 5")
+    def test_pickle_topods_shape_out_of_band(self) -> None:
+        '''
+        With pickle protocol 5, the BRep data is sent out-of-band
+        '''
+        box_shape = BRepPrimAPI_MakeBox(100, 200, 300).Shape()
+        buffers = []
+        dump = pickle.dumps(box_shape, protocol=5, buffer_callback=buffers.append)
+        self.assertEqual(len(buffers), 1)
+        self.assertLess(len(dump), buffers[0].raw().nbytes)
+        loaded_shape = pickle.loads(dump, buffers=buffers)
+        self.assertFalse(loaded_shape.IsNull())
+
     def test_sub_class(self) -> None:
         """ Test: subclass """
         # Checks that OCC objects can be subclassed, and passed as parameters.
@@ -26,6 +26,8 @@ import core_extend_topology_unittest
 import core_webgl_unittest
 import core_extend_dataexchange_unittest
 import core_extend_shapefactory_unittest
+import core_extend_batchconvert_unittest
+import core_extend_sharedshape_unittest
 import core_ocaf_unittest
 
 suite = unittest.TestSuite()
@@ -39,8 +41,11 @@ suite5 = core_webgl_unittest.suite()
 suite6 = core_extend_topology_unittest.suite()
 suite7 = core_extend_dataexchange_unittest.suite()
 suite8 = core_extend_shapefactory_unittest.suite()
+suite9 = core_extend_batchconvert_unittest.suite()
+suite10 = core_extend_sharedshape_unittest.suite()
 # Add test cases
-tests = [suite1, suite2, suite3, suite4, suite5, suite6, suite7, suite8]
+tests = [suite1, suite2, suite3, suite4, suite5, suite6, suite7, suite8, suite9,
+         suite10]
 suite.addTests(tests)
 
 # Run test suite